@@ -1,6 +1,12 @@
+from pathlib import Path
+from urllib.parse import urlsplit
+
 import click
 
-from .process import initialize
+from .process import deploy_apps, initialize, initialize_all
+from .process.agent import forward
+
+timings_option = click.option("--timings", is_flag=True, help="Print how long each phase took (always appended to the timings report).")
 
 
 @click.group()
@@ -10,27 +16,113 @@ def cli():
 
 @cli.command()
 @click.argument("deploy_mode")
-def deploy(deploy_mode: str):
-    shinylive_ = initialize(deploy_mode)
+@click.option(
+    "--transport", type=click.Choice(["sftp", "tar"]), default=None,
+    help="Server upload transport; overrides `transport` in [deploy.server].",
+)
+@timings_option
+def deploy(deploy_mode: str, transport: str | None, timings: bool):
+    if forward("deploy", deploy_mode=deploy_mode, transport=transport, timings=timings):
+        return
+    shinylive_ = initialize(deploy_mode, transport=transport)
+    shinylive_.show_timings = timings
     shinylive_.deploy()
 
 
 @cli.command()
 @click.argument("deploy_mode")
-def rollback(deploy_mode: str):
+@click.option(
+    "--transport", type=click.Choice(["sftp", "tar"]), default=None,
+    help="Server upload transport; overrides `transport` in [deploy.server].",
+)
+@timings_option
+def deploy_all(deploy_mode: str, transport: str | None, timings: bool):
+    if forward("deploy-all", deploy_mode=deploy_mode, transport=transport, timings=timings):
+        return
+    deployers = initialize_all(deploy_mode, transport=transport)
+    for deployer in deployers:
+        deployer.show_timings = timings
+    deploy_apps(deployers)
+
+
+@cli.command()
+@click.argument("deploy_mode")
+@click.option("--to", default=None, help="Release id to make live (local deploys; see `releases`).")
+@timings_option
+def rollback(deploy_mode: str, to: str | None, timings: bool):
+    if to is not None and deploy_mode != "local":
+        raise click.UsageError("`--to` is only supported for `local` deploys")
+    if forward("rollback", deploy_mode=deploy_mode, to=to, timings=timings):
+        return
+    shinylive_ = initialize(deploy_mode)
+    shinylive_.show_timings = timings
+    if to is None:
+        shinylive_.rollback()
+    else:
+        shinylive_.rollback(to=to)
+
+
+@cli.command()
+@click.argument("deploy_mode")
+def releases(deploy_mode: str):
+    if deploy_mode != "local":
+        raise click.UsageError("Release history is only kept for `local` deploys")
+    if forward("releases", deploy_mode=deploy_mode):
+        return
     shinylive_ = initialize(deploy_mode)
-    shinylive_.rollback()
+    shinylive_.releases()
 
 
 @cli.command()
 @click.argument("deploy_mode")
-def clean_rollback(deploy_mode: str):
+@timings_option
+def clean_rollback(deploy_mode: str, timings: bool):
+    if forward("clean-rollback", deploy_mode=deploy_mode, timings=timings):
+        return
     shinylive_ = initialize(deploy_mode)
+    shinylive_.show_timings = timings
     shinylive_.clean_rollback()
 
 
 @cli.command()
 @click.argument("deploy_mode")
-def remove(deploy_mode: str):
+@timings_option
+def remove(deploy_mode: str, timings: bool):
+    if forward("remove", deploy_mode=deploy_mode, timings=timings):
+        return
     shinylive_ = initialize(deploy_mode)
+    shinylive_.show_timings = timings
     shinylive_.remove()
+
+
+@cli.command()
+@click.option("--staging", is_flag=True, help="Serve the staging directory (`staging_only` exports) instead of local deployments.")
+@click.option("--host", default=None, help="Defaults to the host of [deploy.local] `base_url`.")
+@click.option("--port", type=int, default=None, help="Defaults to the port of [deploy.local] `base_url` (8008 with --staging).")
+@click.option("--workers", type=int, default=1, help="Pre-forked worker processes sharing the listening socket.")
+@click.option("--access-log", is_flag=True, help="Log every request to stderr.")
+def serve(staging: bool, host: str | None, port: int | None, workers: int, access_log: bool):
+    from .config import config
+    from .serve import serve as serve_directory
+
+    base_url = urlsplit(config.deploy_local["base_url"])
+    if staging:
+        directory, prefix, default_port = Path(config.staging.get("directory", "staging")), "", 8008
+    else:
+        directory, prefix, default_port = Path(config.deploy_local["directory"]), base_url.path, base_url.port or 8000
+    serve_directory(directory, host or base_url.hostname or "localhost", port or default_port, prefix, workers, access_log)
+
+
+@cli.command()
+@click.option("--idle", type=float, default=8 * 3600, help="Seconds without commands after which the agent exits.")
+@click.option("--stop", is_flag=True, help="Stop the agent running for this directory.")
+def agent(idle: float, stop: bool):
+    from .process.agent import DeployAgent, stop_agent
+    from .process.ipc import supported
+
+    if not supported():
+        raise click.UsageError("The deploy agent needs Unix sockets, which this platform does not provide")
+    if stop:
+        print("Deploy agent stopped" if stop_agent() else "No deploy agent running for this directory")
+        return
+    DeployAgent(idle).serve()
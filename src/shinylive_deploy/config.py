@@ -1,10 +1,11 @@
 import os
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import tomllib
 
-CONFIG_FILEPATH = os.environ.get("SHINYLIVE_DEPLOY_CONFIG", Path.cwd() / "shinylive_deploy.toml")
-
 
 toml_text = """
 [general]
@@ -13,17 +14,32 @@ app_name = "app1"
 [development]
 directory = "src"
 
+# Optional: apps deployed together by `shinylive_deploy deploy-all <mode>`
+# [apps.app1]
+# directory = "src/app1"
+# [apps.app2]
+# directory = "src/app2"
+
 [deploy.gitbranch]
 prod = "main"
 beta = "main"
 
 [deploy.staging]
 directory = "staging"
+export_cache = true  # reuse the last export while app sources and shinylive version are unchanged
+export_backend = "auto"  # "inprocess", "subprocess", or "auto" (in-process, falling back to the CLI)
+app_json_transforms = []  # "strip" and/or "minify"; "windows_paths" is always applied on Windows
+strip_patterns = []  # globs dropped from app.json by "strip", e.g. ["tests/*", "*.md"]
+fingerprint_runtime = false  # serve `shinylive/` as `shinylive-<hash>/` so it can be cached as immutable
+precompress = []  # e.g. ["gzip", "br"]: ship .gz/.br siblings for static serving ("br" requires `brotli`)
+timings_report = ".deploy-timings.jsonl"  # per-phase timings appended by each command (relative to `directory`); "" to disable
 
 [deploy.local]
 staging_only = false
 directory = "src_test_webserver/shinyapps/"
 base_url = "http://localhost:8000/apps"
+shared_runtime = false  # hardlink `shinylive/` runtime files from one content-addressed store
+history = 1  # previous releases kept; above 1, deploys no longer wait for `clean-rollback`
 
 [deploy.server]
 host = "127.0.0.1"
@@ -31,35 +47,111 @@ user = "shinylive"
 port = 2222
 directory = "shinyapps"
 base_url = "http://localhost:5000"
+upload_workers = 4
+transport = "sftp"  # "sftp" (parallel per-file) or "tar" (one compressed stream)
+tar_compression = "gzip"  # "gzip", "zstd" (requires `zstandard`) or "none"
+shared_runtime = false
+auth = "password"  # "password" (prompted) or "key" (ssh-agent, ~/.ssh keys or `key_filename`)
+key_filename = ""
+connection_persist = 0  # seconds an idle SSH connection is kept open for later commands (not on Windows); 0 to disable
+host_key_policy = "auto-add"  # hosts missing from ~/.ssh/known_hosts: "auto-add" (accepted unverified), "warn" or "reject"
+pipeline_upload = false  # upload files while the export is still writing them ("sftp" transport; not with shared_runtime or fingerprint_runtime)
 """
 
 
-def create_config():
-    if not CONFIG_FILEPATH.exists():
-        with open(CONFIG_FILEPATH, "w") as f:
+def config_filepath() -> Path:
+    """Config file in effect: `SHINYLIVE_DEPLOY_CONFIG` if set, else `shinylive_deploy.toml` in the working directory."""
+    return Path(os.environ.get("SHINYLIVE_DEPLOY_CONFIG", Path.cwd() / "shinylive_deploy.toml"))
+
+
+def create_config(filepath: Path | None = None):
+    filepath = Path(filepath or config_filepath())
+    if not filepath.exists():
+        with open(filepath, "w") as f:
             f.write(toml_text)
 
 
-def read_config() -> dict:
-    if not CONFIG_FILEPATH.exists():
-        create_config()
-        print(f"\n>>> WARNING <<<: {CONFIG_FILEPATH.name} did not yet exist. Default config file created. Please update, then run deploy again.\n")
+def read_config(filepath: Path | None = None) -> dict:
+    filepath = Path(filepath or config_filepath())
+    if not filepath.exists():
+        create_config(filepath)
+        print(f"\n>>> WARNING <<<: {filepath.name} did not yet exist. Default config file created. Please update, then run deploy again.\n")
         exit()
-    with open(CONFIG_FILEPATH, "rb") as f:
+    with open(filepath, "rb") as f:
         return tomllib.load(f)
 
 
-# if not CONFIG_FILEPATH.exists():
-#     create_config()
-toml = read_config()
-
-
+@dataclass(frozen=True)
 class Config:
-    app_name = toml["general"]["app_name"]
-    deploy_local = toml["deploy"]["local"]
-    deploy_server = toml["deploy"]["server"]
-    development: dict = toml.get("development", {})
-    staging: dict = toml["deploy"].get("staging", {})
-    gitbranch: dict = toml["deploy"].get("gitbranch", {})
-
-config = Config()
+    app_name: str
+    deploy_local: dict
+    deploy_server: dict
+    development: dict = field(default_factory=dict)
+    staging: dict = field(default_factory=dict)
+    gitbranch: dict = field(default_factory=dict)
+    apps: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_toml(cls, toml: dict) -> "Config":
+        return cls(
+            app_name=toml["general"]["app_name"],
+            deploy_local=toml["deploy"]["local"],
+            deploy_server=toml["deploy"]["server"],
+            development=toml.get("development", {}),
+            staging=toml["deploy"].get("staging", {}),
+            gitbranch=toml["deploy"].get("gitbranch", {}),
+            apps=toml.get("apps", {}),
+        )
+
+
+_loaded: dict[Path, tuple[tuple[int, int], Config]] = {}
+_overrides: list[Config] = []
+
+
+def load_config(filepath: Path | str | None = None) -> Config:
+    """Parsed config file (default: the active override, else `config_filepath()`), re-read only when it changes."""
+    if filepath is None and _overrides:
+        return _overrides[-1]
+    filepath = Path(filepath or config_filepath()).absolute()
+    try:
+        stat = filepath.stat()
+    except FileNotFoundError:
+        return Config.from_toml(read_config(filepath))
+    version = (stat.st_mtime_ns, stat.st_size)
+    if (cached := _loaded.get(filepath)) and cached[0] == version:
+        return cached[1]
+    loaded = Config.from_toml(read_config(filepath))
+    _loaded[filepath] = (version, loaded)
+    return loaded
+
+
+@contextmanager
+def override_config(config: Config | Path | str):
+    """Uses `config` (or the config file at that path) instead of the default config file within the block."""
+    _overrides.append(config if isinstance(config, Config) else load_config(config))
+    try:
+        yield _overrides[-1]
+    finally:
+        _overrides.pop()
+
+
+def config_available() -> bool:
+    return bool(_overrides) or config_filepath().exists()
+
+
+def setting(section: str, key: str, default=None, convert: Callable | None = None):
+    """Dataclass field defaulting to `key` of a config section, read when the instance is created."""
+    def factory():
+        value = getattr(load_config(), section).get(key, default)
+        return convert(value) if convert else value
+
+    return field(default_factory=factory)
+
+
+class _LazyConfig:
+    """Attribute access to the config in effect at the time of access; nothing is read at import."""
+    def __getattr__(self, name: str):
+        return getattr(load_config(), name)
+
+
+config = _LazyConfig()
@@ -1,36 +1,75 @@
+from dataclasses import replace
 from getpass import getpass
+from typing import TYPE_CHECKING
 
-from pydantic import SecretStr
-from shinylive_deploy.config import CONFIG_FILEPATH, create_config
-from shinylive_deploy.config import config as loaded_config
+from shinylive_deploy.config import config_available, create_config, load_config
 
+from .batch import deploy_apps
 from .local import LocalShinyDeploy
-from .server import ServerShinyDeploy
 
+if TYPE_CHECKING:
+    from .server import ServerShinyDeploy
 
-def initialize(deploy_mode: str) -> LocalShinyDeploy | ServerShinyDeploy:
+__all__ = ["deploy_apps", "initialize", "initialize_all"]
+
+
+def initialize(
+    deploy_mode: str, transport: str | None = None, prompt_password: bool = True
+) -> "LocalShinyDeploy | ServerShinyDeploy":
     if deploy_mode not in ("local", "test", "beta", "prod"):
         raise ValueError('`DEPLOY_MODE` must be on of the following: "local", "test", "beta", "prod"')
 
-    if not CONFIG_FILEPATH.exists():
+    if not config_available():
         create_config()
         return
+    loaded_config = load_config()
     if deploy_mode in ("test", "beta", "prod"):
+        # paramiko and pydantic are only imported for server deploys; they dominate CLI startup time
+        from pydantic import SecretStr
+
+        from .server import ServerShinyDeploy
+
         config = loaded_config.deploy_server
-        return ServerShinyDeploy(
+        deployer = ServerShinyDeploy(
             mode=deploy_mode,
             base_url=config["base_url"],
             dir_deployment=config["directory"],
             host=config["host"],
             user=config["user"],
             port=config.get("port", 22),
-            password=SecretStr(value=getpass(f"SSH password for [{config["user"]}]: "))
+            upload_workers=config.get("upload_workers", 4),
+            transport=transport or config.get("transport", "sftp"),
+            tar_compression=config.get("tar_compression", "gzip"),
+            shared_runtime=config.get("shared_runtime", False),
+            auth=config.get("auth", "password"),
+            key_filename=config.get("key_filename") or None,
+            connection_persist=config.get("connection_persist", 0),
+            host_key_policy=config.get("host_key_policy", "auto-add"),
+            pipeline_upload=config.get("pipeline_upload", False),
         )
+        if prompt_password and deployer._password_required():
+            deployer.password = SecretStr(value=getpass(f"SSH password for [{config['user']}]: "))
+        return deployer
     else:  # local
         config = loaded_config.deploy_local
         return LocalShinyDeploy(
             mode=deploy_mode,
             base_url=config["base_url"],
             dir_deployment=config["directory"],
-            staging_only=config.get("staging_only", False)
-        )
\ No newline at end of file
+            staging_only=config.get("staging_only", False),
+            shared_runtime=config.get("shared_runtime", False),
+            history=config.get("history", 1),
+        )
+
+def initialize_all(
+    deploy_mode: str, transport: str | None = None, prompt_password: bool = True
+) -> "list[LocalShinyDeploy | ServerShinyDeploy]":
+    """One deployer per `[apps.<name>]` config section (or just `general.app_name`), sharing one password prompt."""
+    shinylive_ = initialize(deploy_mode, transport=transport, prompt_password=prompt_password)
+    if shinylive_ is None:
+        return []
+    apps = load_config().apps or {shinylive_.app_name: {}}
+    return [
+        replace(shinylive_, app_name=name, dir_development=app.get("directory", shinylive_.dir_development))
+        for name, app in apps.items()
+    ]
@@ -0,0 +1,226 @@
+"""Optional long-running deploy agent: `shinylive_deploy agent` runs the CLI commands of one project directory.
+
+While it runs, commands in that directory are sent to it over a Unix socket instead of starting from scratch, so
+imports, the parsed config, SSH connections, file digests and server release manifests stay warm between them.
+The client side only imports what a CLI invocation needs anyway.
+"""
+import contextlib
+import socket
+import sys
+import threading
+import time
+import traceback
+from getpass import getpass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from shinylive_deploy.config import config_filepath
+
+from .ipc import bind, read_line, send_line, socket_path, supported, unlink_if_same
+
+if TYPE_CHECKING:
+    from paramiko import SSHClient
+    from pydantic import SecretStr
+
+    from .local import LocalShinyDeploy
+    from .server import ServerShinyDeploy
+
+
+def agent_socket_path() -> Path:
+    return socket_path(f"agent:{Path.cwd().resolve()}:{config_filepath().resolve()}")
+
+
+def _agent_connection() -> socket.socket | None:
+    if not supported():
+        return None
+    sock = socket.socket(socket.AF_UNIX)
+    try:
+        sock.connect(str(agent_socket_path()))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def forward(command: str, **options) -> bool:
+    """Runs `command` in the agent for this directory; False if none is running. Exits if the command fails there."""
+    sock = _agent_connection()
+    if sock is None:
+        return False
+    streams = {"out": sys.stdout, "err": sys.stderr}  # bound before the agent starts writing
+    with sock:
+        send_line(sock, {"command": command, "options": options})
+        while message := read_line(sock):
+            if kind := next((x for x in streams if x in message), None):
+                streams[kind].write(message[kind])
+                streams[kind].flush()
+            elif "prompt" in message:
+                send_line(sock, {"password": getpass(message["prompt"])})
+            elif "exit" in message:
+                if message.get("error"):
+                    print(message["error"], file=streams["err"])
+                if message["exit"]:
+                    raise SystemExit(message["exit"])
+                return True
+    raise SystemExit("The deploy agent stopped before the command finished")
+
+
+def stop_agent() -> bool:
+    """Asks the agent for this directory to exit; False if none is running."""
+    sock = _agent_connection()
+    if sock is None:
+        return False
+    with sock:
+        send_line(sock, {"stop": True})
+        return read_line(sock).get("ok", False)
+
+
+class DeployAgent:
+    """Runs forwarded commands one at a time (they share staging, stdout and connections) until idle for `idle` seconds."""
+
+    def __init__(self, idle: float):
+        self.idle = idle
+        self.path = agent_socket_path()
+        self._clients: dict[str, SSHClient] = {}  # `user@host:port` -> connected client
+        self._passwords: dict[str, SecretStr] = {}
+        self._command_lock = threading.Lock()  # stdout and stderr are redirected process-wide, so one command at a time
+        self._lock = threading.Lock()
+        self._active = 0
+        self._last_active = time.monotonic()
+        self._stop = threading.Event()
+
+    def serve(self):
+        listener, inode = bind(self.path)
+        print(f"Deploy agent ready for `{Path.cwd()}`; stop it with Ctrl+C or `shinylive_deploy agent --stop`", flush=True)
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = listener.accept()
+                except TimeoutError:
+                    with self._lock:
+                        if not self._active and time.monotonic() - self._last_active > self.idle:
+                            print(f"No commands for {self.idle:g}s; stopping", flush=True)
+                            return
+                    continue
+                with self._lock:
+                    self._active += 1
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            unlink_if_same(self.path, inode)
+            for client in self._clients.values():
+                client.close()
+
+    def _handle(self, conn: socket.socket):
+        try:
+            with conn:
+                request = read_line(conn)
+                if request.get("ping") or request.get("stop"):
+                    if request.get("stop"):
+                        self._stop.set()
+                    send_line(conn, {"ok": True})
+                    return
+                with self._command_lock:
+                    started = time.monotonic()
+                    status = self._run(conn, request["command"], request.get("options", {}))
+                    print(f"{request['command']} {request.get('options', {})}: exit {status} in {time.monotonic() - started:.2f}s", flush=True)
+        except OSError:
+            pass  # the CLI went away mid-command
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_active = time.monotonic()
+
+    def _run(self, conn: socket.socket, command: str, options: dict) -> int:
+        """Runs one command with its stdout and stderr sent to the waiting CLI; callers hold `_command_lock`."""
+        error = None
+        lock = threading.Lock()  # upload worker threads may write too
+        with (
+            contextlib.redirect_stdout(_SocketWriter(conn, "out", lock)),
+            contextlib.redirect_stderr(_SocketWriter(conn, "err", lock)),
+        ):
+            try:
+                self._command(conn, command, **options)
+                status = 0
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else int(e.code is not None)
+                error = e.code if isinstance(e.code, str) else None
+            except Exception:  # noqa: BLE001
+                status, error = 1, traceback.format_exc()
+        send_line(conn, {"exit": status, "error": error})
+        return status
+
+    def _command(
+        self, conn: socket.socket, command: str, deploy_mode: str, transport: str | None = None, timings: bool = False,
+        to: str | None = None,
+    ):
+        from . import deploy_apps, initialize, initialize_all
+
+        if command == "deploy-all":
+            deployers = initialize_all(deploy_mode, transport=transport, prompt_password=False)
+        else:
+            deployers = [x] if (x := initialize(deploy_mode, transport=transport, prompt_password=False)) else []
+        if not deployers:
+            return  # the config file was just created
+        for deployer in deployers:
+            deployer.show_timings = timings
+        self._share_connection(conn, deployers)
+
+        deployer = deployers[0]
+        if command == "deploy-all":
+            deploy_apps(deployers)
+        elif command == "deploy":
+            deployer.deploy()
+        elif command == "rollback":
+            deployer.rollback() if to is None else deployer.rollback(to=to)
+        elif command == "releases":
+            deployer.releases()
+        elif command == "clean-rollback":
+            deployer.clean_rollback()
+        elif command == "remove":
+            deployer.remove()
+        else:
+            raise SystemExit(f"Unknown command `{command}`")
+
+    def _share_connection(self, conn: socket.socket, deployers: "list[LocalShinyDeploy | ServerShinyDeploy]"):
+        """Hands server deployers the agent's connection to their host, connecting (and asking for a password) once."""
+        from .server import ServerShinyDeploy
+
+        first = deployers[0]
+        if not isinstance(first, ServerShinyDeploy):
+            return
+        target = first._ssh_target
+        client = self._clients.get(target)
+        if client is None or client.get_transport() is None or not client.get_transport().is_active():
+            from paramiko import SSHClient
+            from pydantic import SecretStr
+
+            if client is not None:
+                client.close()
+            first.password = self._passwords.get(target)
+            if first.auth == "password" and first.password is None:
+                send_line(conn, {"prompt": f"SSH password for [{first.user}]: "})
+                first.password = SecretStr(read_line(conn).get("password", ""))
+            client = self._clients[target] = first._ssh_connection(SSHClient())
+            if first.password is not None:
+                self._passwords[target] = first.password
+        for deployer in deployers:
+            deployer.ssh_client = client
+
+
+class _SocketWriter:
+    """Stdout (`out`) or stderr (`err`) of a forwarded command, sent to the CLI that is waiting for it."""
+    def __init__(self, conn: socket.socket, kind: str, lock: threading.Lock):
+        self.conn = conn
+        self.kind = kind
+        self.lock = lock
+
+    def write(self, text: str) -> int:
+        with self.lock:
+            send_line(self.conn, {self.kind: text})
+        return len(text)
+
+    def flush(self):
+        pass
@@ -1,24 +1,62 @@
-import re
-import subprocess
-from dataclasses import dataclass
-from logging import getLogger
+import platform
+import shutil
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from functools import wraps
 from pathlib import Path
 from typing import Literal
 
-import git
-from shinylive_deploy.config import config
+from shinylive_deploy.config import load_config, setting
+
+from .cache import ExportCache, shinylive_version, source_key
+from .dirindex import DirIndex
+from .exceptions import DeployException
+from .export import export_app
+from .fingerprint import fingerprint_runtime
+from .gitinfo import read_head
+from .precompress import PRECOMPRESS_CACHE_DIRNAME, precompress
+from .timings import TIMINGS_REPORT_FILENAME, Span, Timings
+from .transforms import AppJsonPipeline, windows_paths
+
+
+def timed(command: str):
+    """Records the phases of a deployer command and reports them when it finishes, including when it fails."""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            self.timings = Timings(command=command, mode=self.mode, apps=[self.deploy_name])
+            self.dir_index = None  # nothing cached from an earlier command
+            try:
+                with self.timings.record():
+                    return method(self, *args, **kwargs)
+            finally:
+                self._report_timings()
+
+        return wrapper
+    return decorator
 
 
 @dataclass
 class ShinyDeploy:
     base_url: str = None
-    app_name: str = config.app_name
+    app_name: str = field(default_factory=lambda: load_config().app_name)
     dir_deployment: str = None
-    dir_development: str = config.development.get("directory", "src")
-    dir_staging: str = config.staging.get("directory", "staging")
-    prod_branch: str = config.gitbranch.get("prod", "main")
-    beta_branch: str = config.gitbranch.get("beta", "main")
+    dir_development: str = setting("development", "directory", "src")
+    dir_staging: str = setting("staging", "directory", "staging")
+    prod_branch: str = setting("gitbranch", "prod", "main")
+    beta_branch: str = setting("gitbranch", "beta", "main")
     mode: Literal["local", "test", "beta", "prod"] = None
+    shared_runtime: bool = False
+    export_cache: bool = setting("staging", "export_cache", True)
+    export_backend: Literal["auto", "inprocess", "subprocess"] = setting("staging", "export_backend", "auto")
+    fingerprint_runtime: bool = setting("staging", "fingerprint_runtime", False)
+    precompress: tuple[str, ...] = setting("staging", "precompress", (), tuple)
+    app_json_transforms: tuple[str, ...] = setting("staging", "app_json_transforms", (), tuple)
+    strip_patterns: tuple[str, ...] = setting("staging", "strip_patterns", (), tuple)
+    timings_report: str = setting("staging", "timings_report", TIMINGS_REPORT_FILENAME)
+    show_timings: bool = False
+    timings: Timings = field(default_factory=Timings, init=False, repr=False, compare=False)
+    dir_index: DirIndex | None = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def deploy_name(self):
@@ -33,52 +71,100 @@ class ShinyDeploy:
             "\n##################################"
         )
     
+    def _span(self, name: str) -> AbstractContextManager[Span]:
+        """Timing span of the current command; qualified with the deploy name when it covers several apps."""
+        return self.timings.span(f"{name}:{self.deploy_name}" if len(self.timings.apps) > 1 else name)
+
+    def _report_timings(self):
+        if self.timings_report:
+            filepath = Path(self.dir_staging) / self.timings_report
+            try:
+                self.timings.write(filepath)
+            except OSError as e:
+                print(f"\n>>> WARNING <<<: Could not write the timings report `{filepath}`: {e}")
+        if self.show_timings:
+            print(self.timings.summary())
+
     def _check_git_requirements(self):
-        repo = git.Repo()
-        if self.mode == "prod" and str(repo.active_branch) != self.prod_branch:
-            raise DeployException(f"Missing Requirement: `prod` deployments can only be executed from the `{self.prod_branch}` branch")
-        elif self.mode == "beta" and str(repo.active_branch) != self.beta_branch:
-            raise DeployException(f"Missing Requirement: `beta` deployments can only be executed from the `{self.beta_branch}` branch")
+        """prod and beta deploys must run from their configured branch; local and test need no git repository."""
+        if self.mode not in ("prod", "beta"):
+            return
+        required = self.prod_branch if self.mode == "prod" else self.beta_branch
+        with self._span("git_check"):
+            head = read_head()
+        if head.branch != required:
+            on = "a detached HEAD" if head.detached else f"`{head.branch}`"
+            raise DeployException(
+                f"Missing Requirement: `{self.mode}` deployments can only be executed from the `{required}` branch (currently on {on})"
+            )
     
     def _compile(self):
         staging_dir = Path.cwd() / "staging"
         if not staging_dir.exists():
-            staging_dir.mkdir()
+            staging_dir.mkdir(parents=True, exist_ok=True)  # batch exports may get here in several processes at once
             with open(".gitkeep", "w") as f: f.write("")
-        cmd = f"shinylive export {Path(self.dir_development)} {Path(self.dir_staging) / self.deploy_name}"
+        export_dir = Path(self.dir_staging) / self.deploy_name
+        cache = None
+        if self.export_cache:
+            key = source_key(Path(self.dir_development), shinylive_version(), self.app_name)
+            cache = ExportCache(root=Path(self.dir_staging), app_name=self.app_name, key=key)
+            if cache.restore(export_dir):
+                print(f"\nExport cache: sources unchanged, reused `{cache.path}` for `{export_dir}`")
+                return
+        if export_dir.exists():
+            shutil.rmtree(export_dir)  # may hold hardlinks into the cache; never export over them
+        cmd = f"shinylive export {Path(self.dir_development)} {export_dir}"
         print(f"\nExport Command: {cmd}")
-        subprocess.run(cmd, shell=True, check=True)  # noqa: S602
+        result = export_app(Path(self.dir_development), export_dir, backend=self.export_backend)
+        print(f"\nExport backend: {result.backend} ({result.summary()})")
+        if cache:
+            cache.save(export_dir)
 
+    def _post_export(self):
+        """Export post-processing, in order: later steps must see the files rewritten by earlier ones."""
+        self._transform_app_json()
+        self._fingerprint_runtime()
+        self._precompress()
 
-class WindowsPaths:
-    @staticmethod
-    def workaround(app_js_path: Path):
-        # app_file = Path(self.dir_staging) / self.deploy_name / "app.js"
-        with open(app_js_path) as f:
-            text = f.read()
-
-        if path_fix_required := WindowsPaths._find_impacted(text):
-            text = WindowsPaths._fix_impacted(text, path_fix_required)
-            with open(app_js_path, "w") as f:
-                f.write(text)
-            print(f"Windows only step: fixed module paths in `{app_js_path}`")
+    def _transform_app_json(self):
+        names = list(self.app_json_transforms)
+        if platform.system() == "Windows" and "windows_paths" not in names:
+            names.insert(0, "windows_paths")
+        app_json_path = Path(self.dir_staging) / self.deploy_name / "app.json"
+        if not names or not app_json_path.exists():
+            return
+        with self._span("app_json_transforms") as span:
+            result = AppJsonPipeline.from_names(names, self.strip_patterns).run(app_json_path)
+            span.bytes = result.size_after
+        print(
+            f"\napp.json transforms ({', '.join(names)}): {result.changed} files rewritten, {result.removed} removed, "
+            f"{result.size_before / 1e6:.2f} MB -> {result.size_after / 1e6:.2f} MB"
+        )
 
-    @staticmethod
-    def _find_impacted(app_js_text: str) -> list[str]:
-            matches = re.findall(r'("name": "\S*.py", "content":)', app_js_text)
-            return [x for x in matches if "\\" in x]
-        
-    @staticmethod
-    def _fix_impacted(app_js_text: str, py_module_paths: list[str]):
-        def fix_path_slashes(match_obj):
-            return re.sub(r"\\\\", "/", match_obj.group(1))
-        
-        for m in py_module_paths:
-            logger = getLogger()
-            logger.debug(">", m.replace('"name": "', "").replace('", "content":', ""))
-        return re.sub(r'("name": "\S*.py", "content":)', fix_path_slashes, app_js_text)
+    def _fingerprint_runtime(self):
+        if not self.fingerprint_runtime:
+            return
+        with self._span("fingerprint_runtime"):
+            fingerprinted = fingerprint_runtime(Path(self.dir_staging) / self.deploy_name)
+        if fingerprinted:
+            print(f"\nFingerprinted runtime: `shinylive/` renamed to `{fingerprinted}/`")
 
+    def _precompress(self):
+        if not self.precompress:
+            return
+        cache_dir = Path(self.dir_staging) / PRECOMPRESS_CACHE_DIRNAME
+        with self._span("precompress") as span:
+            compressed, reused = precompress(Path(self.dir_staging) / self.deploy_name, cache_dir, self.precompress)
+            span.files = compressed
+        print(
+            f"\nPrecompressed ({', '.join(self.precompress)}): {compressed} files compressed, "
+            f"{reused} reused from `{cache_dir}` in {span.seconds:.2f}s"
+        )
 
 
-class DeployException(Exception):
-    pass
+class WindowsPaths:
+    @staticmethod
+    def workaround(app_js_path: Path):
+        result = AppJsonPipeline(transforms=[windows_paths]).run(Path(app_js_path))
+        if result.changed:
+            print(f"Windows only step: fixed module paths in `{app_js_path}`")
@@ -0,0 +1,61 @@
+import os
+from dataclasses import fields
+from typing import TYPE_CHECKING
+
+from .base import ShinyDeploy
+from .local import LocalShinyDeploy
+from .timings import Timings
+
+if TYPE_CHECKING:
+    from .server import ServerShinyDeploy
+
+
+def _compile(deployer: ShinyDeploy):
+    deployer._compile()
+
+
+def compile_apps(deployers: list[ShinyDeploy], workers: int | None = None):
+    """Exports every app, in parallel worker processes when there is more than one."""
+    workers = min(len(deployers), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for deployer in deployers:
+            deployer._compile()
+        return
+    # only the base (export) settings are sent to the workers; never the SSH credentials
+    compile_only = [ShinyDeploy(**{f.name: getattr(d, f.name) for f in fields(ShinyDeploy) if f.init}) for d in deployers]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_compile, compile_only))
+
+
+def deploy_apps(deployers: "list[LocalShinyDeploy] | list[ServerShinyDeploy]", testing: bool = False):
+    if not deployers:
+        return
+    timings = Timings(command="deploy-all", mode=deployers[0].mode, apps=[d.deploy_name for d in deployers])
+    for deployer in deployers:
+        deployer.timings = timings  # one report for the batch; per-app spans are qualified with the deploy name
+    try:
+        with timings.record():
+            _deploy_apps(deployers, testing)
+    finally:
+        deployers[0]._report_timings()
+
+
+def _deploy_apps(deployers: "list[LocalShinyDeploy] | list[ServerShinyDeploy]", testing: bool):
+    deployers[0]._check_git_requirements()  # same repo and mode for every app
+    print(f"\nBATCH DEPLOYMENT: {len(deployers)} apps ({', '.join(d.deploy_name for d in deployers)})")
+    with deployers[0].timings.span("export"):
+        compile_apps(deployers)
+    for deployer in deployers:
+        deployer._post_export()
+
+    if isinstance(deployers[0], LocalShinyDeploy):
+        for deployer in deployers:
+            deployer._message()
+            deployer._publish()
+    else:
+        with deployers[0]._connect() as ssh:
+            for deployer in deployers:
+                deployer._message()
+                deployer._publish(ssh, testing)
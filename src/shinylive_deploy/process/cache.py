@@ -0,0 +1,61 @@
+import hashlib
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+from .fsops import link_tree
+from .manifest import hash_file
+
+EXPORT_CACHE_DIRNAME = ".export-cache"
+EXCLUDED_SOURCE_NAMES = {"__pycache__", "venv", ".venv"}  # mirrors what `shinylive export` skips
+
+
+def shinylive_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version  # slow to import; only needed once an export runs
+
+    try:
+        return version("shinylive")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def source_key(directory: Path, *extra: str) -> str:
+    """Hash of every exported source file (path + content) in `directory`, plus any `extra` inputs."""
+    digest = hashlib.sha256("\0".join(extra).encode())
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in EXCLUDED_SOURCE_NAMES)
+        for filename in sorted(f for f in files if not f.startswith(".")):
+            filepath = Path(root) / filename
+            digest.update(f"\0{filepath.relative_to(directory).as_posix()}\0{hash_file(filepath)}".encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class ExportCache:
+    """Last `shinylive export` output per app, reused while sources and shinylive version are unchanged.
+
+    Entries share inodes with the staging tree, so later steps must replace files rather than write into them.
+    """
+    root: Path
+    app_name: str
+    key: str
+
+    @property
+    def path(self) -> Path:
+        return Path(self.root) / EXPORT_CACHE_DIRNAME / self.app_name / self.key
+
+    def restore(self, target: Path) -> bool:
+        if not self.path.exists():
+            return False
+        if target.exists():
+            shutil.rmtree(target)
+        link_tree(self.path, target)
+        return True
+
+    def save(self, target: Path):
+        app_cache = self.path.parent
+        if app_cache.exists():
+            shutil.rmtree(app_cache)  # only the latest export per app is kept
+        app_cache.mkdir(parents=True)
+        link_tree(target, self.path)
@@ -0,0 +1,66 @@
+import json
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+CHECKPOINT_DIRNAME = ".upload-checkpoints"
+
+
+@dataclass
+class UploadCheckpoint:
+    """Progress of an upload into a server release directory, appended to a local JSON Lines file as it happens.
+
+    The first line names the target and release, a `prepared` line follows once the release holds the hardlinked copy
+    of the live release it is based on (minus the `unlinked` files), then one `{"name", "digest", "size"}` line per
+    file confirmed uploaded.
+    """
+    filepath: Path
+    target: str = ""
+    release: str = ""
+    base: str | None = None  # live release the upload was prepared from
+    prepared: bool = False
+    unlinked: set[str] = field(default_factory=set)  # base files removed from the release before uploading
+    files: dict[str, tuple[str, int]] = field(default_factory=dict)  # name -> (sha256, size)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @classmethod
+    def load(cls, filepath: Path) -> "UploadCheckpoint | None":
+        if not filepath.exists():
+            return None
+        lines = filepath.read_text(encoding="utf-8").splitlines()
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, json.JSONDecodeError):
+            return None
+        checkpoint = cls(filepath, target=header["target"], release=header["release"], base=header["base"])
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # interrupted mid-write; everything before it still holds
+            if entry.get("prepared"):
+                checkpoint.prepared, checkpoint.unlinked = True, set(entry["unlinked"])
+            else:
+                checkpoint.files[entry["name"]] = (entry["digest"], entry["size"])
+        return checkpoint
+
+    def start(self):
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self.filepath.write_text(json.dumps({"target": self.target, "release": self.release, "base": self.base}) + "\n")
+
+    def mark_prepared(self, unlinked: list[str]):
+        self.prepared, self.unlinked = True, set(unlinked)
+        self._append({"prepared": True, "unlinked": sorted(unlinked)})
+
+    def mark_uploaded(self, name: str, digest: str, size: int):
+        """Thread safe; called by upload workers as each file completes."""
+        with self._lock:
+            self.files[name] = (digest, size)
+            self._append({"name": name, "digest": digest, "size": size})
+
+    def clear(self):
+        self.filepath.unlink(missing_ok=True)
+
+    def _append(self, entry: dict):
+        with open(self.filepath, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
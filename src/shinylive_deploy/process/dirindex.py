@@ -0,0 +1,57 @@
+import os
+from collections.abc import Callable
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING
+
+from .fsops import is_link
+
+if TYPE_CHECKING:
+    from paramiko import SFTPClient
+
+
+class DirIndex:
+    """Entries of the deployment directory, each looked up with one `lstat` and cached for the rest of the command.
+
+    Existence checks no longer list the whole directory (hundreds of apps on a shared host). Nothing else is expected to
+    change the directory during a command; the deployer invalidates the names it changes itself.
+    """
+    def __init__(self, directory: Path | PurePosixPath, lstat: Callable, readlink: Callable[[str], str]):
+        self.directory = directory
+        self._lstat = lstat
+        self._readlink = readlink
+        self._targets: dict[str, str | None] = {}
+
+    @classmethod
+    def local(cls, directory: str | Path) -> "DirIndex":
+        directory = Path(directory)
+
+        def readlink(filepath: str) -> str:
+            target = os.readlink(filepath).removeprefix("\\\\?\\")  # Windows junctions hold absolute `\\?\` paths
+            if os.path.isabs(target):
+                target = os.path.relpath(target, directory)
+            return Path(target).as_posix()  # release paths use `/`, whatever the platform
+
+        return cls(directory, os.lstat, readlink)
+
+    @classmethod
+    def remote(cls, sftp: "SFTPClient", directory: str | PurePosixPath) -> "DirIndex":
+        return cls(PurePosixPath(directory), sftp.lstat, sftp.readlink)
+
+    def target(self, name: str) -> str | None:
+        """Release path `name` links to, `name` itself for a pre-release-layout directory, or None if missing."""
+        if name not in self._targets:
+            filepath = str(self.directory / name)
+            try:
+                st = self._lstat(filepath)
+            except FileNotFoundError:
+                self._targets[name] = None
+            else:
+                self._targets[name] = self._readlink(filepath) if is_link(st) else name
+        return self._targets[name]
+
+    def exists(self, name: str) -> bool:
+        return self.target(name) is not None
+
+    def invalidate(self, *names: str | None):
+        for name in names:
+            self._targets.pop(name, None)
@@ -0,0 +1,2 @@
+class DeployException(Exception):
+    pass
@@ -0,0 +1,89 @@
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .exceptions import DeployException
+
+EXPORT_BACKENDS = ("auto", "inprocess", "subprocess")
+
+_inprocess_export: Callable | None = None
+
+
+@dataclass
+class ExportResult:
+    backend: str
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        return ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items())
+
+
+class ExportError(DeployException):
+    def __init__(self, message: str, backend: str, appdir: Path, destdir: Path):
+        super().__init__(message)
+        self.backend = backend
+        self.appdir = appdir
+        self.destdir = destdir
+
+
+def load_inprocess_export() -> Callable | None:
+    """shinylive's export function, imported once per process; None when shinylive isn't importable."""
+    global _inprocess_export
+    if _inprocess_export is None:
+        try:
+            from shinylive._export import export
+        except ImportError:
+            return None
+        _inprocess_export = export
+    return _inprocess_export
+
+
+def export_app(appdir: Path, destdir: Path, backend: str = "auto") -> ExportResult:
+    """Runs `shinylive export appdir destdir` in-process when possible, falling back to the CLI in a subprocess."""
+    if backend not in EXPORT_BACKENDS:
+        raise DeployException(f"Unknown export backend `{backend}`; expected one of: {', '.join(EXPORT_BACKENDS)}")
+    timings = {}
+
+    if backend in ("auto", "inprocess"):
+        start = time.perf_counter()
+        export = load_inprocess_export()
+        timings["import"] = time.perf_counter() - start
+        if export is not None:
+            start = time.perf_counter()
+            try:
+                export(appdir, destdir)
+            except Exception as e:
+                raise ExportError(f"shinylive export of `{appdir}` failed: {e!r}", "inprocess", appdir, destdir) from e
+            timings["export"] = time.perf_counter() - start
+            return ExportResult(backend="inprocess", timings=timings)
+        if backend == "inprocess":
+            raise ExportError("In-process export unavailable: `shinylive` is not importable", "inprocess", appdir, destdir)
+
+    start = time.perf_counter()
+    relay = not (_has_fileno(sys.stdout) and _has_fileno(sys.stderr))  # e.g. redirected to a deploy agent's client
+    try:
+        result = subprocess.run(  # noqa: S603
+            ["shinylive", "export", str(appdir), str(destdir)], check=False, capture_output=relay, text=True  # noqa: S607
+        )
+    except FileNotFoundError as e:
+        raise ExportError("`shinylive` command not found", "subprocess", appdir, destdir) from e
+    if relay:
+        sys.stdout.write(result.stdout)
+        sys.stderr.write(result.stderr)
+    if result.returncode != 0:
+        raise ExportError(
+            f"`shinylive export {appdir} {destdir}` exited with status {result.returncode}", "subprocess", appdir, destdir
+        )
+    timings["export"] = time.perf_counter() - start
+    return ExportResult(backend="subprocess", timings=timings)
+
+
+def _has_fileno(stream) -> bool:
+    try:
+        stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+    return True
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+
+from .fsops import replacing
+from .manifest import hash_file
+
+RUNTIME_DIRNAME = "shinylive"
+RUNTIME_DIR_PATTERN = re.compile(r"^shinylive(-[0-9a-f]{12})?$")  # plain or fingerprinted runtime directory
+REWRITE_SUFFIXES = {".html", ".js"}
+RUNTIME_REFERENCE = re.compile(rb"(?<![\w.-])shinylive/")  # `./shinylive/...`, `../shinylive/...`; not `shinylive-sw.js`
+
+
+def runtime_fingerprint(runtime_dir: Path) -> str:
+    """Short hash of every file (path + content) in the runtime directory."""
+    digest = hashlib.sha256()
+    for filepath in sorted(x for x in runtime_dir.rglob("*") if x.is_file()):
+        digest.update(f"{filepath.relative_to(runtime_dir).as_posix()}\0{hash_file(filepath)}\0".encode())
+    return digest.hexdigest()[:12]
+
+
+def fingerprint_runtime(export_dir: Path) -> str | None:
+    """Renames `shinylive/` to `shinylive-<hash>/` and rewrites the pages and scripts referencing it.
+
+    The runtime's own files only reference each other relatively, so renaming the directory is enough to give every
+    asset a content-addressed URL. Returns the new directory name, or None when there is no plain runtime directory.
+    """
+    runtime_dir = export_dir / RUNTIME_DIRNAME
+    if not runtime_dir.is_dir():
+        return None
+    fingerprinted = f"{RUNTIME_DIRNAME}-{runtime_fingerprint(runtime_dir)}"
+    if (export_dir / fingerprinted).exists():
+        shutil.rmtree(export_dir / fingerprinted)
+    os.rename(runtime_dir, export_dir / fingerprinted)
+
+    replacement = f"{fingerprinted}/".encode()
+    for filepath in export_dir.rglob("*"):
+        relative = filepath.relative_to(export_dir)
+        if relative.parts[0] == fingerprinted or filepath.suffix not in REWRITE_SUFFIXES or not filepath.is_file():
+            continue
+        content = filepath.read_bytes()
+        rewritten = RUNTIME_REFERENCE.sub(replacement, content)
+        if rewritten != content:
+            with replacing(filepath) as tmp_path:
+                tmp_path.write_bytes(rewritten)
+    return fingerprinted
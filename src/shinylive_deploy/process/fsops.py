@@ -0,0 +1,125 @@
+import errno
+import os
+import shutil
+import stat
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+FICLONE = 0x40049409  # linux ioctl: share extents with another file (btrfs, xfs, bcachefs, ...)
+IO_REPARSE_TAG_MOUNT_POINT = 0xA0000003  # windows directory junction (`stat` only defines it on Windows)
+
+
+def clone_file(src: str, dst: str):
+    """Copy-on-write clone of `src` where the filesystem supports it, otherwise a regular copy."""
+    if sys.platform == "linux":
+        import fcntl
+
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                pass
+            else:
+                shutil.copystat(src, dst)
+                return
+    shutil.copy2(src, dst)
+
+
+def copy_tree(src: Path, dst: Path):
+    """Independent copy of `src` at `dst`, sharing data blocks (reflinks) where the filesystem supports it."""
+    shutil.copytree(src, dst, symlinks=True, copy_function=clone_file)
+
+
+def link_tree(src: Path, dst: Path):
+    """Recreates `src` at `dst` with hardlinks, cloning or copying where the filesystem doesn't support them."""
+    def link_or_clone(src_file: str, dst_file: str):
+        try:
+            os.link(src_file, dst_file)
+        except OSError:
+            clone_file(src_file, dst_file)
+
+    shutil.copytree(src, dst, symlinks=True, copy_function=link_or_clone)
+
+
+def move_tree(src: Path, dst: Path) -> str:
+    """Moves `src` to `dst`: an O(1) rename on the same filesystem, a clone/copy then delete across devices."""
+    try:
+        os.rename(src, dst)
+        return "rename"
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    copy_tree(src, dst)
+    shutil.rmtree(src)
+    return "copy"
+
+
+def is_link(st: os.stat_result) -> bool:
+    """Whether an `lstat` result is a symlink or, on Windows, a directory junction."""
+    return stat.S_ISLNK(st.st_mode) or getattr(st, "st_reparse_tag", 0) == IO_REPARSE_TAG_MOUNT_POINT
+
+
+def link_dir(target: Path, link: Path) -> str:
+    """Creates `link` pointing to the `target` directory, returning how: "symlink", "junction" or "copy".
+
+    The symlink is relative and uses native separators. Without symlink support (Windows without the privilege, some
+    filesystems) a junction is created on Windows, and a hardlinked copy of `target` anywhere else; a copy is a plain
+    directory, so deployers treat it like one deployed before the release layout.
+    """
+    try:
+        os.symlink(os.path.relpath(target, link.parent), link, target_is_directory=True)
+        return "symlink"
+    except OSError:
+        if sys.platform == "win32":
+            import _winapi
+
+            try:
+                _winapi.CreateJunction(os.path.abspath(target), os.path.abspath(link))
+                return "junction"
+            except OSError:
+                pass
+    link_tree(target, link)
+    return "copy"
+
+
+def replace_dir(src: Path, dst: Path):
+    """Renames `src` over `dst`. Atomic for symlinks on POSIX; where the rename can't replace `dst` (directory links
+    on Windows, real directories) `dst` is removed first and briefly missing.
+    """
+    try:
+        os.replace(src, dst)
+    except OSError:
+        if not os.path.lexists(dst):
+            raise
+        remove_tree(dst)
+        os.replace(src, dst)
+
+
+def remove_tree(path: Path):
+    """Removes a directory tree, file or link (the link itself, never its target); missing paths are ignored."""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if is_link(st) or not stat.S_ISDIR(st.st_mode):
+        os.unlink(path)  # also removes directory links on Windows
+    else:
+        shutil.rmtree(path)
+
+
+@contextmanager
+def replacing(path: Path) -> Iterator[Path]:
+    """Temporary sibling of `path`, renamed over it when the block exits cleanly; if the block didn't write it (or
+    deleted it), `path` is left alone.
+
+    Files are always replaced rather than written into, as they may be hardlinked from the export cache.
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        yield tmp_path
+        if tmp_path.exists():
+            os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,85 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+SHA = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+@dataclass(frozen=True)
+class GitHead:
+    git_dir: Path
+    branch: str | None  # None when HEAD is detached
+    commit: str | None  # None on a branch without commits
+
+    @property
+    def detached(self) -> bool:
+        return self.branch is None
+
+
+@lru_cache(maxsize=32)
+def find_git_dir(start: Path) -> Path | None:
+    """`.git` directory of the repository containing `start`; follows `gitdir:` files (worktrees, submodules)."""
+    for directory in (start, *start.parents):
+        dotgit = directory / ".git"
+        if dotgit.is_dir():
+            return dotgit
+        if dotgit.is_file():
+            text = dotgit.read_text().strip()
+            if text.startswith("gitdir:"):
+                return (directory / text.removeprefix("gitdir:").strip()).resolve()
+    return None
+
+
+def common_dir(git_dir: Path) -> Path:
+    """Directory holding refs shared by all worktrees (the main `.git`)."""
+    commondir = git_dir / "commondir"
+    return (git_dir / commondir.read_text().strip()).resolve() if commondir.exists() else git_dir
+
+
+def resolve_ref(git_dir: Path, ref: str) -> str | None:
+    for root in dict.fromkeys((git_dir, common_dir(git_dir))):
+        if (root / ref).is_file():
+            return (root / ref).read_text().strip()
+    packed_refs = common_dir(git_dir) / "packed-refs"
+    if packed_refs.exists():
+        for line in packed_refs.read_text().splitlines():
+            commit, _, name = line.partition(" ")
+            if name == ref:
+                return commit
+    return None
+
+
+@lru_cache(maxsize=32)
+def _parse_head(head: Path, mtime_ns: int, size: int) -> tuple[str, str] | None:
+    """("ref", name) or ("commit", sha) for a HEAD file; cached until HEAD changes (checkout, commit while detached)."""
+    text = head.read_text().strip()
+    if text.startswith("ref: refs/heads/"):
+        return "ref", text.removeprefix("ref: ")
+    if SHA.fullmatch(text):
+        return "commit", text
+    return None
+
+
+def read_head(start: Path | None = None) -> GitHead:
+    """Current branch and commit read straight from `.git`, without starting `git` or GitPython when possible."""
+    start = (start or Path.cwd()).resolve()
+    git_dir = find_git_dir(start)
+    if git_dir is not None and (git_dir / "HEAD").is_file():
+        stat = (git_dir / "HEAD").stat()
+        if parsed := _parse_head(git_dir / "HEAD", stat.st_mtime_ns, stat.st_size):
+            kind, value = parsed
+            if kind == "commit":
+                return GitHead(git_dir=git_dir, branch=None, commit=value)
+            return GitHead(git_dir=git_dir, branch=value.removeprefix("refs/heads/"), commit=resolve_ref(git_dir, value))
+    return _read_head_gitpython(start)
+
+
+def _read_head_gitpython(start: Path) -> GitHead:
+    """Fallback for layouts the fast path doesn't understand; raises GitPython's errors outside a repository."""
+    import git
+
+    repo = git.Repo(start, search_parent_directories=True)
+    commit = repo.head.commit.hexsha if repo.head.is_valid() else None
+    branch = None if repo.head.is_detached else repo.active_branch.name
+    return GitHead(git_dir=Path(repo.git_dir), branch=branch, commit=commit)
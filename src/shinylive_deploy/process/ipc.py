@@ -0,0 +1,104 @@
+"""Unix socket helpers shared by the connection daemon and the deploy agent; imports nothing heavy."""
+import hashlib
+import json
+import os
+import socket
+import tempfile
+from pathlib import Path
+
+from .exceptions import DeployException
+
+MAX_PATH_BYTES = 103  # sun_path is 104 bytes on macOS (108 on Linux), including the terminating NUL
+# short base for when TMPDIR is too deep; socket_path still checks the owner and mode of the directory it creates
+FALLBACK_BASE = "/tmp"  # noqa: S108
+
+
+def supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def socket_path(key: str) -> Path:
+    """Socket for `key`, in a directory only the current user can access.
+
+    Falls back to a directory under /tmp when the temp directory is too deep for a socket path.
+    """
+    filename = f"{hashlib.sha256(key.encode()).hexdigest()[:16]}.sock"
+    for base in (tempfile.gettempdir(), FALLBACK_BASE):
+        directory = Path(base) / f"shinylive_deploy-{os.getuid()}"
+        if _fits(_bind_tmp(directory / filename)):
+            break
+    else:
+        raise DeployException(f"No socket path short enough for AF_UNIX under `{tempfile.gettempdir()}` or `{FALLBACK_BASE}`")
+    directory.mkdir(mode=0o700, exist_ok=True)
+    if directory.stat().st_uid != os.getuid() or directory.stat().st_mode & 0o077:
+        raise DeployException(f"`{directory}` must be owned by and only accessible to the current user")
+    return directory / filename
+
+
+def _bind_tmp(path: Path) -> Path:
+    return path.with_name(f"{path.name}.{os.getpid()}")
+
+
+def _fits(path: Path) -> bool:
+    return len(os.fsencode(path)) <= MAX_PATH_BYTES
+
+
+def bind(path: Path) -> tuple[socket.socket, int]:
+    """Listening socket at `path` and its inode, replacing any socket already there.
+
+    Bound under a temporary name and renamed, so a client never finds a socket nobody listens on yet.
+    """
+    tmp = _bind_tmp(path)
+    if not _fits(tmp):
+        raise DeployException(f"Socket path `{tmp}` is too long for AF_UNIX ({MAX_PATH_BYTES} bytes at most)")
+    tmp.unlink(missing_ok=True)
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(tmp))
+    listener.listen(64)
+    listener.settimeout(1.0)
+    os.replace(tmp, path)
+    return listener, path.stat().st_ino
+
+
+def unlink_if_same(path: Path, inode: int):
+    """Removes the socket at `path` unless another process has replaced it since."""
+    try:
+        if path.stat().st_ino == inode:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def is_alive(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return False
+        send_line(sock, {"ping": True})
+        return read_line(sock).get("ok", False)
+
+
+def send_line(sock: socket.socket, message: dict):
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+def read_line(sock: socket.socket) -> dict:
+    """One JSON line, read byte by byte so nothing after it is consumed; empty once the peer has closed."""
+    line = b""
+    while (byte := sock.recv(1)) and byte != b"\n":
+        line += byte
+    return json.loads(line) if line else {}
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    """`size` bytes, or b"" if the peer closed before sending any."""
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            if data:
+                raise ConnectionResetError("Connection closed mid-frame")
+            return b""
+        data += chunk
+    return data
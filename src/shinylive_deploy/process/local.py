@@ -1,38 +1,65 @@
-# ruff: noqa: S602 S603
-import platform
-import subprocess
 from dataclasses import dataclass
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
-from .base import ShinyDeploy, WindowsPaths
+from .base import ShinyDeploy, timed
+from .dirindex import DirIndex
+from .fsops import link_dir, move_tree, remove_tree, replace_dir
+from .manifest import MANIFEST_FILENAME, Manifest
+from .releases import link_unchanged, new_release_id, release_path, release_sort_key
+from .store import STORE_DIRNAME, link_local_runtime, prune_local_store
 
-subprocess_config = {"capture_output": True, "text": True, "shell": True, "check": True}
 
 @dataclass
 class LocalShinyDeploy(ShinyDeploy):
     staging_only: bool = False
+    history: int = 1
 
+    @timed("deploy")
     def deploy(self):
         self._check_git_requirements()
         self._message()
-        self._compile()
-        if platform.system() == 'Windows':
-            app_js_path = Path(self.dir_staging) / self.deploy_name / "app.json"
-            WindowsPaths.workaround(app_js_path)
+        with self._span("export"):
+            self._compile()
+        self._post_export()
+        self._publish()
 
+    def _publish(self):
         if self.staging_only in ("true", True):
             print(
                 "\nCOMPLETE:"
                 "\n- deployed to 'staging' folder only."
-                "\n- To test: `python -m http.server -d staging --bind localhost 8008`")
+                "\n- To test: `shinylive_deploy serve --staging`")
             return
 
-        has_backup = self._manage_backup()
+        with self._span("check_backup"):
+            has_backup = self._manage_backup()
         if has_backup is None:
             return
 
         staging_dir = Path(self.dir_staging) / self.deploy_name
-        subprocess.run(f"mv {staging_dir} {Path(self.dir_deployment)}", shell=True, check=True)
+        release = release_path(self.deploy_name, new_release_id())
+        release_dir = Path(self.dir_deployment) / release
+        release_dir.parent.mkdir(parents=True, exist_ok=True)
+        with self._span("move"):
+            method = move_tree(staging_dir, release_dir)
+        if method == "copy":
+            print(f"Staging is on another filesystem than `{self.dir_deployment}`; copied the export instead of moving it")
+        with self._span("manifest") as span:
+            manifest = Manifest.from_directory(release_dir)
+            (release_dir / MANIFEST_FILENAME).write_text(manifest.dumps())
+            span.files = len(manifest.files)
+        if (current := self._release_target(self.deploy_name)) is not None:
+            with self._span("link_history") as span:
+                span.files = link_unchanged(release_dir, Path(self.dir_deployment) / current, manifest)
+            print(f"History: {span.files} unchanged files hardlinked from the live release")
+        if self.shared_runtime:
+            with self._span("shared_runtime") as span:
+                span.files = link_local_runtime(release_dir, Path(self.dir_deployment) / STORE_DIRNAME, manifest)
+            print(f"Shared runtime: {span.files} files linked from `{STORE_DIRNAME}`")
+        with self._span("go_live"):
+            self._go_live(release)
+        with self._span("prune"):
+            self._prune_releases()
         
         print(
             "\nCOMPLETE:"
@@ -42,19 +69,37 @@ class LocalShinyDeploy(ShinyDeploy):
         if has_backup:
             print(f"- Backup available at {self.base_url}/{self.deploy_name}-backup")
 
-    def rollback(self):
+    @timed("rollback")
+    def rollback(self, to: str | None = None):
         self._check_git_requirements()
-        existing_deploy_dir = Path(self.dir_deployment) / self.deploy_name
         if not self._deployed_dir_exists():
             print("\n>>> WARNING <<<: Backback STOPPED. No app directory exists to rollback to.\n")
             return
+        if to is not None:
+            self._switch_release(to)
+            return
         if not self._backup_dir_exists():
             print("\n>>> WARNING <<<: Backback STOPPED. No backup directory exists for rollback.\n")
             return
-        subprocess.run(f"rm -r {existing_deploy_dir}", **subprocess_config)
-        print(f"\n1. Removed `{self.deploy_name}`")
-        subprocess.run(f"mv {existing_deploy_dir}-backup {existing_deploy_dir}", **subprocess_config)
-        print(f"2. Renamed `{self.deploy_name}-backup` as `{self.deploy_name}`")
+        current = self._release_target(self.deploy_name)
+        backup = self._release_target(f"{self.deploy_name}-backup")
+        if backup == f"{self.deploy_name}-backup":
+            backup = self._adopt_legacy_dir(backup)
+        if current == self.deploy_name:
+            current = self._adopt_legacy_dir(current)
+        previous = self._previous_releases()
+        # both links switch before the rolled back release is removed, and are put back together if either fails
+        with self._span("switch"):
+            self._switch_links(
+                (self.deploy_name, backup),
+                (f"{self.deploy_name}-backup", previous[0] if previous else None),
+            )
+        print(f"\n1. Switched `{self.deploy_name}` to the `{self.deploy_name}-backup` release")
+        with self._span("remove"):
+            self._remove_paths(current)
+        print(f"2. Removed the rolled back release `{current}`")
+        if previous:
+            print(f"3. `{self.deploy_name}-backup` now points to `{previous[0]}`")
 
         print(
             "\nROLLBACK COMPLETE:"
@@ -62,53 +107,156 @@ class LocalShinyDeploy(ShinyDeploy):
             f"\n- Available at {self.base_url}/{self.deploy_name}"
         )
 
+    def releases(self):
+        live = self._release_target(self.deploy_name)
+        backup = self._release_target(f"{self.deploy_name}-backup")
+        ordered = [x for x in (live, backup) if x and x not in (self.deploy_name, f"{self.deploy_name}-backup")]
+        ordered = sorted(ordered + self._previous_releases(), key=lambda x: release_sort_key(PurePosixPath(x).name), reverse=True)
+        print(f"\nRELEASES of `{self.deploy_name}` (newest first):")
+        for release in ordered:
+            marker = " (live)" if release == live else " (backup)" if release == backup else ""
+            print(f"- {PurePosixPath(release).name}{marker}")
+
+    @timed("clean-rollback")
     def clean_rollback(self):
         self._check_git_requirements()
-        existing_deploy_dir = Path(self.dir_deployment) / self.deploy_name
         if not self._backup_dir_exists():
             print("\n>>> WARNING <<<: Rollback cleanup STOPPED. No backup directory exists to remove.\n")
             return
-        subprocess.run(f"rm -r {existing_deploy_dir}-backup", **subprocess_config)
+        with self._span("remove"):
+            self._remove_paths(f"{self.deploy_name}-backup", self._release_target(f"{self.deploy_name}-backup"))
         print(f"\nRemoved `{self.base_url}/{self.deploy_name}-backup`")
         print("\nROLLBACK CLEANUP COMPLETE")
 
+    @timed("remove")
     def remove(self):
         self._check_git_requirements()
-        self._check_git_requirements()
-        existing_deploy_dir = Path(self.dir_deployment) / self.deploy_name
         if not self._deployed_dir_exists():
             print("\n>>> WARNING <<<: App removal STOPPED. No app directory exists to remove.\n")
             return
-        subprocess.run(f"rm -r {existing_deploy_dir}", **subprocess_config)
+        with self._span("remove"):
+            self._remove_paths(self.deploy_name, self._release_target(self.deploy_name))
         print(f"\nRemoved `{self.deploy_name}`")
         print("\nAPPLICATION REMOVAL COMPLETE")
 
+    def _go_live(self, release: PurePosixPath):
+        """Atomically points `<deploy_name>` at `release`; the previously live release becomes `<deploy_name>-backup`."""
+        current = self._release_target(self.deploy_name)
+        if current == self.deploy_name:
+            current = self._adopt_legacy_dir(current)
+        links = [(self.deploy_name, str(release))]
+        if current is not None:
+            links.insert(0, (f"{self.deploy_name}-backup", current))
+        self._switch_links(*links)
+
+    @property
+    def _index(self) -> DirIndex:
+        if self.dir_index is None:
+            self.dir_index = DirIndex.local(self.dir_deployment)
+        return self.dir_index
+
+    def _release_target(self, name: str) -> str | None:
+        return self._index.target(name)
+
+    def _switch_link(self, name: str, target: str | None):
+        """Points `name` at the `target` release path, or removes it for None.
+
+        The new link replaces the old one atomically where the platform allows it (see `replace_dir`).
+        """
+        deploy_dir = Path(self.dir_deployment)
+        if target is None:
+            remove_tree(deploy_dir / name)
+        else:
+            tmp_path = deploy_dir / f".{name}.tmp-link"
+            remove_tree(tmp_path)
+            if link_dir(deploy_dir / target, tmp_path) == "copy":
+                print(f"Symlinks are not supported in `{self.dir_deployment}`; copied `{target}` to `{name}` instead")
+            replace_dir(tmp_path, deploy_dir / name)
+        self._index.invalidate(name)
+
+    def _switch_links(self, *links: tuple[str, str | None]):
+        """Switches each `(name, target)` in order; if one fails, the links already switched are put back."""
+        switched = []
+        try:
+            for name, target in links:
+                previous = self._release_target(name)
+                self._switch_link(name, target)
+                switched.append((name, previous))
+        except Exception:
+            for name, previous in reversed(switched):
+                if previous != name:  # a directory from before the release layout can't be put back
+                    self._switch_link(name, previous)
+            raise
+
+    def _adopt_legacy_dir(self, name: str) -> str:
+        """Moves a directory deployed before the release layout into `.releases`, returning its release path."""
+        legacy = release_path(self.deploy_name, new_release_id("legacy-"))
+        (Path(self.dir_deployment) / legacy).parent.mkdir(parents=True, exist_ok=True)
+        move_tree(Path(self.dir_deployment) / name, Path(self.dir_deployment) / legacy)
+        self._index.invalidate(name)
+        return str(legacy)
+
+    def _switch_release(self, release_id: str):
+        """Makes an earlier release live without deleting anything; the release it replaces becomes the backup."""
+        release = str(release_path(self.deploy_name, release_id))
+        if not (Path(self.dir_deployment) / release).is_dir():
+            print(f"\n>>> WARNING <<<: Rollback STOPPED. No release `{release_id}` exists for `{self.deploy_name}`.\n")
+            return
+        current = self._release_target(self.deploy_name)
+        if current == release:
+            print(f"\n>>> WARNING <<<: Rollback STOPPED. Release `{release_id}` is already live.\n")
+            return
+        if current == self.deploy_name:
+            current = self._adopt_legacy_dir(current)
+        with self._span("switch"):
+            self._switch_links((f"{self.deploy_name}-backup", current), (self.deploy_name, release))
+        print(
+            "\nROLLBACK COMPLETE:"
+            f"\n- Application `{self.app_name}` switched locally to release `{release_id}` as `{self.deploy_name}`"
+            f"\n- Available at {self.base_url}/{self.deploy_name}"
+            f"\n- Previous release available at {self.base_url}/{self.deploy_name}-backup"
+        )
+
+    def _previous_releases(self) -> list[str]:
+        """Release paths kept as history, i.e. neither live nor the backup, newest first."""
+        releases_dir = Path(self.dir_deployment) / release_path(self.deploy_name, "")
+        if not releases_dir.exists():
+            return []
+        linked = {self._release_target(self.deploy_name), self._release_target(f"{self.deploy_name}-backup")}
+        names = [x.name for x in releases_dir.iterdir() if str(release_path(self.deploy_name, x.name)) not in linked]
+        return [str(release_path(self.deploy_name, x)) for x in sorted(names, key=release_sort_key, reverse=True)]
+
+    def _prune_releases(self):
+        """Keeps the live release, the backup and up to `history - 1` older releases."""
+        for release in self._previous_releases()[max(self.history - 1, 0):]:
+            remove_tree(Path(self.dir_deployment) / release)
+        self._prune_store()
+
+    def _remove_paths(self, *names: str | None):
+        for name in dict.fromkeys(names):
+            if name:
+                remove_tree(Path(self.dir_deployment) / name)
+        self._index.invalidate(*names)
+        self._prune_store()
+
+    def _prune_store(self):
+        if self.shared_runtime:
+            prune_local_store(Path(self.dir_deployment) / STORE_DIRNAME)
+
     def _deployed_dir_exists(self):
-        deploy_dirs = [x.name for x in Path(self.dir_deployment).iterdir()]
-        # result = subprocess.run(f"ls {self.dir_deployment}", **subprocess_config)
-        # directories = result.stdout.split("\n")
-        if Path(self.deploy_name).name in deploy_dirs:
-            return True
-        return False
+        return self._index.exists(self.deploy_name)
     
     def _backup_dir_exists(self):
-        deploy_dirs = [x.name for x in Path(self.dir_deployment).iterdir()]
-        # result = subprocess.run(f"ls {self.dir_deployment}", **subprocess_config)
-        # directories = result.stdout.split("\n")
-        if Path(f"{self.deploy_name}-backup").name in deploy_dirs:
-            return True
-        return False
+        return self._index.exists(f"{self.deploy_name}-backup")
     
     def _manage_backup(self):
-        existing_deploy_dir = Path(self.dir_deployment) / self.deploy_name
         if self._deployed_dir_exists():
-            if self._backup_dir_exists():
+            if self._backup_dir_exists() and self.history <= 1:
                 print(
                     "\n>>> WARNING <<<: Deployment STOPPED. Backup directory already exists. "
                     "Delete current backup directory using `shinylive_deploy <mode> --clean-rollback`, "
                     "or rollback before redeploying using `shinylive_deploy <mode> --rollback`.\n"
                 )
                 return None
-            subprocess.run(f"mv {existing_deploy_dir} {existing_deploy_dir}-backup", shell=True)
-            return True
+            return True  # the current release becomes the backup when the new one goes live
         return False
@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+MANIFEST_FILENAME = ".shinylive-deploy-manifest.json"
+MAX_CACHED_DIGESTS = 500_000
+RACY_SECONDS = 2  # files modified more recently may change again within the mtime granularity; never cached
+
+# (device, inode, size, mtime) -> sha256; stays warm across commands in a long-running deploy agent
+_digests: dict[tuple[int, int, int, int], str] = {}
+
+
+def hash_file(path: Path) -> str:
+    """sha256 of the file at `path`, reused while its inode, size and mtime are unchanged."""
+    stat = os.stat(path)
+    key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if (digest := _digests.get(key)) is not None:
+        return digest
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    if time.time_ns() - stat.st_mtime_ns > RACY_SECONDS * 1e9:
+        if len(_digests) >= MAX_CACHED_DIGESTS:
+            _digests.clear()
+        _digests[key] = digest
+    return digest
+
+
+@dataclass
+class Manifest:
+    files: dict[str, str] = field(default_factory=dict)  # posix relative path -> sha256
+
+    @classmethod
+    def from_directory(cls, directory: Path) -> "Manifest":
+        directory = Path(directory)
+        files = {}
+        for path in sorted(directory.rglob("*")):
+            if path.is_file() and path.name != MANIFEST_FILENAME:
+                files[path.relative_to(directory).as_posix()] = hash_file(path)
+        return cls(files=files)
+
+    @classmethod
+    def loads(cls, text: str | bytes) -> "Manifest":
+        data = json.loads(text)
+        return cls(files=data.get("files", {}))
+
+    def dumps(self) -> str:
+        return json.dumps({"version": 1, "files": self.files}, indent=1, sort_keys=True)
+
+    def diff(self, previous: "Manifest") -> tuple[list[str], list[str]]:
+        """Returns (added or changed, removed) file paths relative to `previous`."""
+        changed = [name for name, digest in self.files.items() if previous.files.get(name) != digest]
+        removed = [name for name in previous.files if name not in self.files]
+        return changed, removed
@@ -0,0 +1,283 @@
+"""SSH connection kept open between commands, in the spirit of OpenSSH's ControlMaster.
+
+A background daemon (`python -m shinylive_deploy.process.mux`) holds one authenticated connection and serves a Unix
+socket; `MuxClient` stands in for a connected `SSHClient`, each channel it opens being one connection to that socket.
+The daemon exits once no channel has been open for `idle` seconds, or when the SSH connection drops.
+"""
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Self
+
+from paramiko import SFTPClient, SSHClient, Transport
+from paramiko.buffered_pipe import BufferedPipe
+from paramiko.channel import ChannelFile, ChannelStderrFile
+
+from .exceptions import DeployException
+from .ipc import bind, is_alive, read_line, recv_exact, send_line, socket_path, supported, unlink_if_same
+from .remote import set_host_key_policy
+
+CHUNK_SIZE = 2**15
+STARTUP_TIMEOUT = 60  # seconds; includes the password or key exchange with the host
+
+
+def is_running(target: str) -> bool:
+    """Whether a daemon holds a connection to `target` (`user@host:port`)."""
+    return supported() and is_alive(socket_path(f"mux:{target}"))
+
+
+def connect(
+    target: str, connect_kwargs: Callable[[], dict], idle: float, host_key_policy: str = "auto-add"
+) -> "MuxClient":
+    """Client for the daemon of `target`, first starting one connected with `connect_kwargs()` if none is running."""
+    path = socket_path(f"mux:{target}")
+    if not is_alive(path):
+        _start_daemon(path, connect_kwargs(), idle, host_key_policy)
+    return MuxClient(path)
+
+
+def _start_daemon(path: Path, connect_kwargs: dict, idle: float, host_key_policy: str):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "shinylive_deploy.process.mux"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, start_new_session=True, text=True,
+    )
+    # the password goes through the pipe, never the command line or environment
+    request = {"socket": str(path), "idle": idle, "connect": connect_kwargs, "host_key_policy": host_key_policy}
+    process.stdin.write(json.dumps(request) + "\n")
+    process.stdin.close()
+    timer = threading.Timer(STARTUP_TIMEOUT, process.kill)
+    timer.start()
+    try:
+        status = process.stdout.readline().strip()
+    finally:
+        timer.cancel()
+        process.stdout.close()
+    if status != "ready":
+        raise DeployException(f"Could not open the SSH connection: {status or 'the connection daemon exited'}")
+
+
+class MuxClient:
+    """Connected-`SSHClient` stand-in for the deploy code: `get_transport().open_session()` and `open_sftp()`."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._channels: list[_MuxChannel] = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_transport(self) -> "MuxClient":
+        return self
+
+    def open_session(self, window_size: int | None = None, max_packet_size: int | None = None) -> "_MuxChannel":
+        sock = socket.socket(socket.AF_UNIX)
+        sock.connect(str(self.path))
+        channel = _MuxChannel(sock, window_size)
+        self._channels.append(channel)
+        return channel
+
+    def open_sftp(self) -> SFTPClient:
+        return SFTPClient.from_transport(self)
+
+    def close(self):
+        """Closes this client's channels; the SSH connection itself stays open for the next command."""
+        for channel in self._channels:
+            channel.close()
+        self._channels.clear()
+
+
+class _MuxChannel:
+    """Channel-like view of one socket connection: raw bytes for a subsystem (sftp), framed output for a command."""
+
+    def __init__(self, sock: socket.socket, window_size: int | None = None):
+        self._sock = sock
+        self._window_size = window_size
+        self._stdout, self._stderr = BufferedPipe(), BufferedPipe()
+        self._exited = threading.Event()
+        self._status = -1
+        self._framed = False
+
+    def exec_command(self, command: str):
+        self._open({"exec": command})
+        self._framed = True
+        threading.Thread(target=self._read_frames, daemon=True).start()
+
+    def invoke_subsystem(self, name: str):
+        self._open({"subsystem": name})
+
+    def _open(self, request: dict):
+        send_line(self._sock, {**request, "window_size": self._window_size})
+        reply = read_line(self._sock)
+        if not reply.get("ok"):
+            raise DeployException(f"Could not open a channel on the kept-open SSH connection: {reply.get('error')}")
+
+    def _read_frames(self):
+        try:
+            while header := recv_exact(self._sock, 5):
+                payload = recv_exact(self._sock, int.from_bytes(header[1:], "big"))
+                if header[:1] == b"o":
+                    self._stdout.feed(payload)
+                elif header[:1] == b"e":
+                    self._stderr.feed(payload)
+                elif header[:1] == b"x":
+                    self._status = int.from_bytes(payload, "big", signed=True)
+        except OSError:
+            pass  # the exit status stays -1, like a paramiko channel closed without one
+        finally:
+            self._stdout.close()
+            self._stderr.close()
+            self._exited.set()
+
+    def get_name(self) -> str:
+        return f"mux:{self._sock.fileno()}"
+
+    def send(self, data: bytes) -> int:
+        return self._sock.send(data)
+
+    def sendall(self, data: bytes):
+        self._sock.sendall(data)
+
+    def recv(self, size: int) -> bytes:
+        return self._stdout.read(size) if self._framed else self._sock.recv(size)
+
+    def recv_stderr(self, size: int) -> bytes:
+        return self._stderr.read(size)
+
+    def makefile(self, mode: str = "r", bufsize: int = -1) -> ChannelFile:
+        return ChannelFile(self, mode, bufsize)
+
+    def makefile_stderr(self, mode: str = "r", bufsize: int = -1) -> ChannelStderrFile:
+        return ChannelStderrFile(self, mode, bufsize)
+
+    def shutdown_write(self):
+        self._sock.shutdown(socket.SHUT_WR)
+
+    def recv_exit_status(self) -> int:
+        self._exited.wait()
+        return self._status
+
+    def close(self):
+        self._sock.close()
+
+
+class MuxDaemon:
+    """Serves channels of `transport` on the Unix socket at `path` until idle for `idle` seconds."""
+
+    def __init__(self, transport: Transport, path: Path, idle: float):
+        self.transport = transport
+        self.path = path
+        self.idle = idle
+        self._active = 0
+        self._last_active = time.monotonic()
+        self._lock = threading.Lock()
+        self._listener: socket.socket | None = None
+        self._inode: int | None = None
+
+    def bind(self):
+        self._listener, self._inode = bind(self.path)
+
+    def serve(self):
+        try:
+            while self.transport.is_active():
+                try:
+                    conn, _ = self._listener.accept()
+                except TimeoutError:
+                    with self._lock:
+                        if not self._active and time.monotonic() - self._last_active > self.idle:
+                            return
+                    continue
+                with self._lock:
+                    self._active += 1
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            self._listener.close()
+            unlink_if_same(self.path, self._inode)
+            self.transport.close()
+
+    def _serve_connection(self, conn: socket.socket):
+        try:
+            with conn:
+                request = read_line(conn)
+                if request.get("ping"):
+                    send_line(conn, {"ok": True})
+                    return
+                try:
+                    channel = self.transport.open_session(window_size=request.get("window_size"))
+                    if "subsystem" in request:
+                        channel.invoke_subsystem(request["subsystem"])
+                    else:
+                        channel.exec_command(request["exec"])
+                except Exception as e:  # noqa: BLE001
+                    send_line(conn, {"error": str(e)})
+                    return
+                send_line(conn, {"ok": True})
+                with channel:
+                    threading.Thread(target=_pump_stdin, args=(conn, channel), daemon=True).start()
+                    if "subsystem" in request:
+                        while data := channel.recv(CHUNK_SIZE):
+                            conn.sendall(data)
+                    else:
+                        _pump_output(conn, channel)
+        except OSError:
+            pass  # the client went away; closing the channel is all that's left
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_active = time.monotonic()
+
+
+def _pump_stdin(conn: socket.socket, channel):
+    try:
+        while data := conn.recv(CHUNK_SIZE):
+            channel.sendall(data)
+        channel.shutdown_write()
+    except OSError:
+        channel.close()
+
+
+def _pump_output(conn: socket.socket, channel):
+    """Sends stdout and stderr as `o`/`e` frames, then the exit status as an `x` frame."""
+    lock = threading.Lock()
+
+    def send(kind: bytes, payload: bytes):
+        with lock:
+            conn.sendall(kind + len(payload).to_bytes(4, "big") + payload)
+
+    def pump_stderr():
+        while data := channel.recv_stderr(CHUNK_SIZE):
+            send(b"e", data)
+
+    stderr = threading.Thread(target=pump_stderr, daemon=True)
+    stderr.start()
+    while data := channel.recv(CHUNK_SIZE):
+        send(b"o", data)
+    stderr.join()
+    send(b"x", channel.recv_exit_status().to_bytes(4, "big", signed=True))
+
+
+def main():
+    request = json.loads(sys.stdin.readline())
+    client = SSHClient()
+    try:
+        set_host_key_policy(client, request["host_key_policy"])
+        client.connect(**request["connect"])
+    except Exception as e:  # noqa: BLE001
+        print(f"{type(e).__name__}: {e}", flush=True)
+        return
+    daemon = MuxDaemon(client.get_transport(), Path(request["socket"]), request["idle"])
+    daemon.bind()
+    print("ready", flush=True)
+    sys.stdout.close()
+    daemon.serve()
+
+
+if __name__ == "__main__":
+    main()
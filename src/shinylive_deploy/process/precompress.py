@@ -0,0 +1,84 @@
+import gzip
+import os
+import shutil
+from pathlib import Path
+
+from .exceptions import DeployException
+from .manifest import hash_file
+
+PRECOMPRESS_CACHE_DIRNAME = ".precompress-cache"
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+COMPRESSIBLE_SUFFIXES = {".js", ".mjs", ".wasm", ".json", ".css", ".html", ".svg", ".txt", ".map", ".py", ".data", ".ts"}
+MIN_SIZE = 1024  # smaller responses don't benefit from compression
+
+
+def check_encodings(encodings: list[str] | tuple[str, ...]):
+    for encoding in encodings:
+        if encoding not in ENCODING_SUFFIXES:
+            raise DeployException(f"Unknown precompress encoding `{encoding}`; expected one of: {', '.join(ENCODING_SUFFIXES)}")
+    if "br" in encodings:
+        try:
+            import brotli  # noqa: F401
+        except ImportError as e:
+            raise DeployException("`br` precompression requires the `brotli` package") from e
+
+
+def compressible_files(directory: Path) -> list[Path]:
+    return [
+        x for x in directory.rglob("*")
+        if x.suffix in COMPRESSIBLE_SUFFIXES and not x.name.startswith(".") and x.is_file() and x.stat().st_size >= MIN_SIZE
+    ]
+
+
+def _compress(src: str, blob: str, encoding: str):
+    tmp = f"{blob}.tmp{os.getpid()}"
+    if encoding == "gzip":
+        with open(src, "rb") as fsrc, open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as f:
+            shutil.copyfileobj(fsrc, f)
+    else:
+        import brotli
+
+        with open(src, "rb") as fsrc, open(tmp, "wb") as f:
+            f.write(brotli.compress(fsrc.read(), quality=11))
+    os.replace(tmp, blob)
+
+
+def precompress(directory: Path, cache_dir: Path, encodings: list[str] | tuple[str, ...], workers: int | None = None) -> tuple[int, int]:
+    """Writes `.gz`/`.br` siblings for compressible files in `directory`. Returns (files compressed, reused from cache).
+
+    Compressed copies live in `cache_dir`, keyed by the hash of the original, and are hardlinked next to it.
+    """
+    check_encodings(encodings)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    jobs, links = {}, []
+    for filepath in compressible_files(directory):
+        digest = hash_file(filepath)
+        for encoding in encodings:
+            suffix = ENCODING_SUFFIXES[encoding]
+            blob = cache_dir / f"{digest}{suffix}"
+            if not blob.exists():
+                jobs[blob] = (str(filepath), str(blob), encoding)
+            links.append((blob, filepath.with_name(filepath.name + suffix)))
+
+    if len(jobs) > 1 and (workers or os.cpu_count() or 1) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(_compress, *job) for job in jobs.values()]:
+                future.result()
+    else:
+        for job in jobs.values():
+            _compress(*job)
+
+    for blob, sibling in links:
+        tmp = sibling.with_name(f".{sibling.name}.link")
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            shutil.copy2(blob, tmp)
+        os.replace(tmp, sibling)
+
+    for blob in cache_dir.iterdir():
+        if blob.stat().st_nlink == 1:  # not linked from this export or any deployed release any more
+            blob.unlink()
+    return len(jobs), len(links) - len(jobs)
@@ -0,0 +1,46 @@
+import os
+from datetime import UTC, datetime
+from pathlib import Path, PurePosixPath
+
+from .manifest import MANIFEST_FILENAME, Manifest
+
+RELEASES_DIRNAME = ".releases"
+
+
+def new_release_id(prefix: str = "") -> str:
+    """Sortable, unique-per-deploy release directory name."""
+    return prefix + datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def release_path(deploy_name: str, release_id: str) -> PurePosixPath:
+    """Release directory relative to the deployment directory; also the target of the `<deploy_name>` symlink."""
+    return PurePosixPath(RELEASES_DIRNAME) / deploy_name / release_id
+
+
+def release_sort_key(release_id: str) -> str:
+    """Orders releases by creation time, including directories adopted from before the release layout."""
+    return release_id.removeprefix("legacy-")
+
+
+def link_unchanged(release_dir: Path, previous_dir: Path, manifest: Manifest) -> int:
+    """Replaces files in `release_dir` identical to those in `previous_dir` with hardlinks (`rsync --link-dest`).
+
+    Releases are never modified in place, so sharing inodes between them is safe. Returns the number of files linked.
+    """
+    manifest_filepath = previous_dir / MANIFEST_FILENAME
+    if manifest_filepath.exists():
+        previous = Manifest.loads(manifest_filepath.read_text())
+    else:
+        previous = Manifest.from_directory(previous_dir)
+    linked = 0
+    for name, digest in manifest.files.items():
+        if previous.files.get(name) != digest:
+            continue
+        filepath, previous_filepath = release_dir / name, previous_dir / name
+        if not previous_filepath.exists() or filepath.samefile(previous_filepath):
+            continue
+        tmp = filepath.with_name(f".{filepath.name}.link")
+        os.link(previous_filepath, tmp)
+        os.replace(tmp, filepath)
+        linked += 1
+    return linked
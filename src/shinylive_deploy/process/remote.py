@@ -0,0 +1,116 @@
+import re
+import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+from paramiko import AutoAddPolicy, RejectPolicy, SSHClient, WarningPolicy
+
+from .exceptions import DeployException
+
+FAILED_MARKER = "shinylive_deploy: failed step "
+MAX_ARGS = 500  # file names per command; keeps command lines well below ARG_MAX
+HOST_KEY_POLICIES = {"auto-add": AutoAddPolicy, "warn": WarningPolicy, "reject": RejectPolicy}
+
+
+def set_host_key_policy(client: SSHClient, policy: str):
+    """Verifies host keys against ~/.ssh/known_hosts; `policy` decides about hosts that are not listed there."""
+    if policy not in HOST_KEY_POLICIES:
+        raise DeployException(f"Unknown host key policy `{policy}`; expected one of: {', '.join(HOST_KEY_POLICIES)}")
+    client.load_system_host_keys()
+    client.set_missing_host_key_policy(HOST_KEY_POLICIES[policy]())
+
+
+def exec_command(ssh: SSHClient, cmd: str, stdin: str | None = None) -> str:
+    """Runs `cmd` on its own channel and waits for it; raises DeployException on a non-zero exit status."""
+    status, stdout, stderr = _run(ssh, cmd, stdin)
+    if status != 0:
+        raise DeployException(f"Remote command failed: `{cmd}`\n{stderr}")
+    return stdout
+
+
+def _run(ssh: SSHClient, cmd: str, stdin: str | None = None) -> tuple[int, str, str]:
+    channel = ssh.get_transport().open_session()
+    try:
+        channel.exec_command(cmd)
+        if stdin is not None:
+            channel.sendall(stdin.encode())
+        channel.shutdown_write()
+        # stderr is drained alongside stdout: both share the channel window, which only refills as data is read
+        stderr = []
+        drain = threading.Thread(target=lambda: stderr.append(channel.makefile_stderr("rb").read()), daemon=True)
+        drain.start()
+        output = channel.makefile("rb").read().decode()
+        drain.join()
+        return channel.recv_exit_status(), output, b"".join(stderr).decode()
+    finally:
+        channel.close()
+
+
+class RemoteOps:
+    """Shell commands queued with `add` and run in order as one script over a single exec channel by `run`.
+
+    Each command starts only after the previous one succeeded; the first failure stops the script and is raised as a
+    DeployException naming that command. Independent batches can run at the same time with `run_concurrently`.
+    """
+
+    def __init__(self, ssh: SSHClient):
+        self.ssh = ssh
+        self.commands: list[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.commands)
+
+    def add(self, *commands: str) -> "RemoteOps":
+        self.commands.extend(commands)
+        return self
+
+    def remove_files(self, directory: str | PurePosixPath, names: list[str]) -> "RemoteOps":
+        """Queues `rm -f` of `names` relative to `directory`, in chunks of MAX_ARGS."""
+        for i in range(0, len(names), MAX_ARGS):
+            quoted = " ".join(shlex.quote(str(PurePosixPath(directory) / x)) for x in names[i:i + MAX_ARGS])
+            self.add(f"rm -f -- {quoted}")
+        return self
+
+    def make_dirs(self, directory: str | PurePosixPath, names: list[str]) -> "RemoteOps":
+        """Queues `mkdir -p` of the parent directories of `names` relative to `directory`, in chunks of MAX_ARGS."""
+        parents = sorted({str(PurePosixPath(directory) / x) for x in {str(PurePosixPath(x).parent) for x in names} - {"."}})
+        parents = [x for i, x in enumerate(parents) if i + 1 == len(parents) or not parents[i + 1].startswith(f"{x}/")]
+        for i in range(0, len(parents), MAX_ARGS):
+            self.add(f"mkdir -p -- {' '.join(shlex.quote(x) for x in parents[i:i + MAX_ARGS])}")
+        return self
+
+    def switch_link(self, filepath: str | PurePosixPath, target: str) -> "RemoteOps":
+        """Queues creating or atomically replacing the `filepath` symlink (rename over the old link, never missing)."""
+        filepath = PurePosixPath(filepath)
+        tmp = shlex.quote(str(filepath.with_name(f".{filepath.name}.tmp-link")))
+        return self.add(f"ln -sfn {shlex.quote(target)} {tmp} && mv -Tf {tmp} {shlex.quote(str(filepath))}")
+
+    def script(self) -> str:
+        lines = []
+        for i, command in enumerate(self.commands):
+            lines.append(f'{{ {command}\n}} || {{ rc=$?; echo "{FAILED_MARKER}{i}" >&2; exit $rc; }}')
+        return "\n".join(lines) + "\n"
+
+    def run(self) -> str:
+        """Runs the queued commands and clears the queue; returns their combined stdout."""
+        if not self.commands:
+            return ""
+        commands, script = self.commands, self.script()
+        self.commands = []
+        status, stdout, stderr = _run(self.ssh, "sh -s", stdin=script)
+        if status != 0:
+            failed = re.search(rf"{FAILED_MARKER}(\d+)", stderr)
+            step = commands[int(failed.group(1))] if failed else script
+            stderr = re.sub(rf"{FAILED_MARKER}\d+\n?", "", stderr)
+            raise DeployException(f"Remote command failed: `{step}`\n{stderr}")
+        return stdout
+
+
+def run_concurrently(*batches: RemoteOps) -> list[str]:
+    """Runs independent batches at the same time, each on its own channel; waits for all before raising any failure."""
+    if sum(map(bool, batches)) <= 1:
+        return [x.run() for x in batches]
+    with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix="remote-ops") as pool:
+        futures = [pool.submit(x.run) for x in batches]
+    return [x.result() for x in futures]
@@ -1,14 +1,32 @@
-import platform
-import subprocess
-from dataclasses import dataclass
+import shlex
+import shutil
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from getpass import getpass
+from io import BytesIO
 from pathlib import Path, PurePosixPath
+from typing import Literal
 
-from paramiko import AutoAddPolicy, SFTPClient, SSHClient
+from paramiko import SFTPClient, SSHClient
 from pydantic import SecretStr
 
-from .base import DeployException, ShinyDeploy, WindowsPaths
+from . import mux
+from .base import DeployException, ShinyDeploy, timed
+from .checkpoint import CHECKPOINT_DIRNAME, UploadCheckpoint
+from .dirindex import DirIndex
+from .manifest import MANIFEST_FILENAME, Manifest
+from .releases import RELEASES_DIRNAME, new_release_id, release_path
+from .remote import RemoteOps, exec_command, run_concurrently, set_host_key_policy
+from .store import STORE_DIRNAME, remote_link_script, remote_prune_command, runtime_files
+from .upload import ParallelUploader, StreamingUpload, TarStreamUploader
+from .watch import settled_files
 
-subprocess_config = {"capture_output": True, "text": True, "shell": True, "check": True}
+# `user@host:port/<release dir>` -> its manifest; releases never change once written, so this stays valid while a
+# deploy agent keeps the process running
+_release_manifests: dict[str, Manifest] = {}
 
 
 @dataclass
@@ -17,30 +35,63 @@ class ServerShinyDeploy(ShinyDeploy):
     user: str = None
     port: int = 22
     password: SecretStr = None
+    upload_workers: int = 4
+    transport: Literal["sftp", "tar"] = "sftp"
+    tar_compression: Literal["gzip", "zstd", "none"] = "gzip"
+    auth: Literal["password", "key"] = "password"
+    key_filename: str | None = None
+    connection_persist: float = 0  # seconds an idle connection is kept open for the next command
+    host_key_policy: Literal["auto-add", "warn", "reject"] = "auto-add"  # for hosts missing from ~/.ssh/known_hosts
+    pipeline_upload: bool = False  # upload files while the export is still writing them
+    ssh_client: SSHClient | None = field(default=None, init=False, repr=False, compare=False)  # held by the deploy agent
 
-    @property
-    def base_ssh_cmd(self):
-        return f"ssh -p {self.port} {self.user}:{self.password.get_secret_value()}@{self.host}"
-    
+    @timed("deploy")
     def deploy(self, testing: bool = False):
-        if not all([self.host, self.user, self.password]):
-            raise ValueError("For ServerShinyDeploy, all of the following are required: host, user, password")
+        if not all([self.host, self.user]) or self.auth not in ("password", "key"):
+            raise ValueError("For ServerShinyDeploy, all of the following are required: host, user, auth (`password` or `key`)")
         self._check_git_requirements()
         self._message()
-        self._compile()
-        if platform.system() == 'Windows':
-            app_js_path = Path(self.dir_staging) / self.deploy_name / "app.json"
-            WindowsPaths.workaround(app_js_path)
+        pipelined = self._pipelined(testing)
+        if not pipelined:
+            self._export()
 
-        with SSHClient() as ssh:
-            ssh = self._ssh_connection(ssh)
-            sftp = ssh.open_sftp()
+        with self._connect() as ssh:
+            self._publish(ssh, testing, exported=not pipelined)
+
+    def _export(self):
+        with self._span("export"):
+            self._compile()
+        self._post_export()
 
-            has_backup = self._manage_backup(sftp)
+    def _pipelined(self, testing: bool) -> bool:
+        if not self.pipeline_upload or testing:
+            return False
+        if self.transport != "sftp" or self.shared_runtime or self.fingerprint_runtime:
+            # tar extracts the whole stream at the end; the shared store needs the complete runtime to decide uploads;
+            # fingerprinting renames `shinylive/` after the export, so the streamed runtime would be sent twice
+            print(
+                "\n>>> WARNING <<<: `pipeline_upload` requires the `sftp` transport without `shared_runtime` or "
+                "`fingerprint_runtime`; exporting first"
+            )
+            return False
+        return True
+
+    def _publish(self, ssh: SSHClient, testing: bool = False, exported: bool = True):
+        with self._open_sftp(ssh) as sftp:
+            uploader = self._uploader(ssh)
+
+            with self._span("check_backup"):
+                has_backup = self._manage_backup(sftp)
             if has_backup is None:
                 return
             
-            self._push_app(sftp, testing)
+            if exported:
+                release = self._push_app(ssh, sftp, uploader, testing)
+            else:
+                release = self._stream_app(ssh, sftp, uploader)
+            if not testing:
+                with self._span("go_live"):
+                    self._go_live(ssh, release)
 
         print(
             "\nCOMPLETE:"
@@ -50,24 +101,33 @@ class ServerShinyDeploy(ShinyDeploy):
         if has_backup is True:
             print(f"- Backup available at {self.base_url}/{self.deploy_name}-backup")
 
+    @timed("rollback")
     def rollback(self):
         self._check_git_requirements()
-        deployment_dir = PurePosixPath(self.dir_deployment) / self.deploy_name
 
-        with SSHClient() as ssh:
-            ssh = self._ssh_connection(ssh)
-            sftp = ssh.open_sftp()
-            if not self._deployed_dir_exists(sftp):
+        with self._connect() as ssh, self._open_sftp(ssh):
+            if not self._deployed_dir_exists():
                 print("\n>>> WARNING <<<: Backback STOPPED. No app directory exists to rollback from.\n")
                 return
-            if not self._backup_dir_exists(sftp):
+            if not self._backup_dir_exists():
                 print("\n>>> WARNING <<<: Backback STOPPED. No backup directory exists for rollback.\n")
                 return
-            
-            ssh.exec_command(f"rm -rf {deployment_dir}")
-            print(f"\n1. Removed `{self.deploy_name}`")
-            ssh.exec_command(f"mv {deployment_dir}-backup {deployment_dir}")
-            print(f"2. Renamed `{self.deploy_name}-backup` as `{self.deploy_name}`")
+
+            current = self._release_target(self.deploy_name)
+            backup = self._release_target(f"{self.deploy_name}-backup")
+            # one remote script, each step waiting for the previous one: the old release is only removed once switched
+            ops = RemoteOps(ssh)
+            if backup == f"{self.deploy_name}-backup":
+                backup = self._adopt_legacy_dir(ops, backup)
+            if current == self.deploy_name:
+                current = self._adopt_legacy_dir(ops, current)
+            ops.switch_link(PurePosixPath(self.dir_deployment) / self.deploy_name, backup)
+            self._remove_paths(ops, f"{self.deploy_name}-backup", current)
+            with self._span("switch_and_remove"):
+                ops.run()
+            self.dir_index.invalidate(self.deploy_name, f"{self.deploy_name}-backup")
+            print(f"\n1. Switched `{self.deploy_name}` to the `{self.deploy_name}-backup` release")
+            print(f"2. Removed the rolled back release `{current}`")
 
         print(
             "\nROLLBACK COMPLETE:"
@@ -75,82 +135,418 @@ class ServerShinyDeploy(ShinyDeploy):
             f"\n- Available at {self.base_url}/{self.deploy_name}"
         )
 
+    @timed("clean-rollback")
     def clean_rollback(self):
         self._check_git_requirements()
         deployment_dir = PurePosixPath(self.dir_deployment) / self.deploy_name
 
-        with SSHClient() as ssh:
-            ssh = self._ssh_connection(ssh)
-            sftp = ssh.open_sftp()
-            if not self._backup_dir_exists(sftp):
+        with self._connect() as ssh, self._open_sftp(ssh):
+            if not self._backup_dir_exists():
                 print("\n>>> WARNING <<<: Backback STOPPED. No backup directory exists to remove.\n")
                 return
             
-            ssh.exec_command(f"rm -rf {deployment_dir}-backup")
+            with self._span("remove"):
+                self._remove_paths(
+                    RemoteOps(ssh), f"{self.deploy_name}-backup", self._release_target(f"{self.deploy_name}-backup")
+                ).run()
+            self.dir_index.invalidate(f"{self.deploy_name}-backup")
             print(f"\nRemoved `{deployment_dir}-backup`")
             print("\nROLLBACK CLEANUP COMPLETE")
 
+    @timed("remove")
     def remove(self):
         self._check_git_requirements()
         deployment_dir = PurePosixPath(self.dir_deployment) / self.deploy_name
 
-        with SSHClient() as ssh:
-            ssh = self._ssh_connection(ssh)
-            sftp = ssh.open_sftp()
-            if not self._deployed_dir_exists(sftp):
+        with self._connect() as ssh, self._open_sftp(ssh):
+            if not self._deployed_dir_exists():
                 print("\n>>> WARNING <<<: App removal STOPPED. No app directory exists to remove.\n")
                 return
             
-            ssh.exec_command(f"rm -rf {deployment_dir}")
+            with self._span("remove"):
+                self._remove_paths(RemoteOps(ssh), self.deploy_name, self._release_target(self.deploy_name)).run()
+            self.dir_index.invalidate(self.deploy_name)
             print(f"\nRemoved `{deployment_dir}`")
             print("\nAPPLICATION REMOVAL COMPLETE")
 
+    def _prune_store_suffix(self) -> str:
+        if not self.shared_runtime:
+            return ""
+        return f" && {{ {remote_prune_command(PurePosixPath(self.dir_deployment) / STORE_DIRNAME)}; }}"
+
+    @contextmanager
+    def _connect(self) -> Iterator[SSHClient]:
+        """Connected client for one command; with `connection_persist`, through a connection kept open between commands."""
+        if self.ssh_client is not None:
+            yield self.ssh_client  # connected, and closed, by the deploy agent
+            return
+        if self.connection_persist and mux.supported():
+            with self._span("connect"):
+                client = mux.connect(self._ssh_target, self._connect_kwargs, self.connection_persist, self.host_key_policy)
+            with client:
+                yield client
+            return
+        with SSHClient() as ssh:
+            yield self._ssh_connection(ssh)
+
     def _ssh_connection(self, client: SSHClient) -> SSHClient:
-        client.set_missing_host_key_policy(AutoAddPolicy())
-        client.connect(
-            hostname=self.host, port=self.port, username=self.user, password=self.password.get_secret_value(), look_for_keys=False
-        )
+        set_host_key_policy(client, self.host_key_policy)
+        with self._span("connect"):
+            client.connect(**self._connect_kwargs())
         return client
 
-    def _deployed_dir_exists(self, sftp: SFTPClient):
-        directories = sftp.listdir(str(self.dir_deployment))
-        if self.deploy_name in directories:
-            return True
-        return False
+    def _connect_kwargs(self) -> dict:
+        kwargs = {"hostname": self.host, "port": self.port, "username": self.user}
+        if self.auth == "key":
+            # ssh-agent first, then `key_filename` or the default keys in ~/.ssh
+            key_filename = str(Path(self.key_filename).expanduser()) if self.key_filename else None
+            return {**kwargs, "key_filename": key_filename, "look_for_keys": key_filename is None}
+        if self.password is None:
+            self.password = SecretStr(getpass(f"SSH password for [{self.user}]: "))
+        return {**kwargs, "password": self.password.get_secret_value(), "look_for_keys": False}
+
+    def _password_required(self) -> bool:
+        """Whether connecting needs the password: password auth and no kept-open connection to reuse."""
+        if self.auth != "password" or self.password is not None:
+            return False
+        return not (self.connection_persist and mux.is_running(self._ssh_target))
+
+    @property
+    def _ssh_target(self) -> str:
+        return f"{self.user}@{self.host}:{self.port}"
+
+    def _open_sftp(self, ssh: SSHClient) -> SFTPClient:
+        """SFTP session that also backs `dir_index`; keep it open until the command is done with the index."""
+        sftp = ssh.open_sftp()
+        self.dir_index = DirIndex.remote(sftp, self.dir_deployment)
+        return sftp
+
+    def _deployed_dir_exists(self):
+        return self.dir_index.exists(self.deploy_name)
     
-    def _backup_dir_exists(self, sftp: SFTPClient):
-        directories = sftp.listdir(str(self.dir_deployment))
-        if f"{self.deploy_name}-backup" in directories:
-            return True
-        return False
+    def _backup_dir_exists(self):
+        return self.dir_index.exists(f"{self.deploy_name}-backup")
     
     def _confirm_depoy_dir_exists(self, sftp: SFTPClient):
-        directories = sftp.listdir()
-        if str(self.dir_deployment) not in directories:
-            raise DeployException(f"ACTION REQUIRED`{self.dir_deployment}` not found in the ssh target for user `{self.user}`. Create this directory, owned by this user, then try again.")
+        try:
+            sftp.stat(str(self.dir_deployment))
+        except FileNotFoundError:
+            raise DeployException(f"ACTION REQUIRED`{self.dir_deployment}` not found in the ssh target for user `{self.user}`. Create this directory, owned by this user, then try again.") from None
     def _manage_backup(self, sftp: SFTPClient):
         self._confirm_depoy_dir_exists(sftp)
 
         deployment_filepath = PurePosixPath(self.dir_deployment) / self.deploy_name
         print(deployment_filepath)
-        if self._deployed_dir_exists(sftp):
-            if self._backup_dir_exists(sftp):
+        if self._deployed_dir_exists():
+            if self._backup_dir_exists():
                 print(
                     "\n>>> WARNING <<<: Deployment STOPPED. Backup directory already exists. "
                     "Delete current backup directory using `shinylive_deploy <mode> --clean-rollback`, "
                     "or rollback before redeploying using `shinylive_deploy <mode> --rollback`.\n"
                 )
                 return None
-            sftp.rename(str(deployment_filepath), f"{deployment_filepath}-backup")
-            return True
+            return True  # the current release becomes the backup when the new one goes live
         return False
     
-    def _push_app(self, sftp: SFTPClient, testing: bool = False):
+    def _uploader(self, ssh: SSHClient) -> ParallelUploader | TarStreamUploader:
+        if self.transport == "tar":
+            return TarStreamUploader(ssh, compression=self.tar_compression)
+        elif self.transport == "sftp":
+            return ParallelUploader(ssh, workers=self.upload_workers)
+        raise DeployException(f"Unknown transport `{self.transport}`; expected `sftp` or `tar`")
+
+    def _push_app(
+        self, ssh: SSHClient, sftp: SFTPClient, uploader: ParallelUploader | TarStreamUploader, testing: bool = False
+    ) -> PurePosixPath:
+        """Uploads the staged app into a release directory, which is not live until `_go_live`.
+
+        An earlier upload that was interrupted is resumed, as long as the same release is still live on the server.
+        """
         staging_filepath = Path(self.dir_staging) / self.deploy_name
+        with self._span("manifest_diff") as span:
+            current = self._release_target(self.deploy_name)
+            current_filepath = PurePosixPath(self.dir_deployment) / current if current else None
+            manifest = Manifest.from_directory(staging_filepath)
+            previous = self._read_remote_manifest(sftp, current_filepath) if current else None
+            changed, removed = manifest.diff(previous or Manifest())
+            span.files = len(manifest.files)
+        checkpoint = self._resumable_checkpoint(sftp, current)
+        release = PurePosixPath(checkpoint.release) if checkpoint else release_path(self.deploy_name, new_release_id())
+        release_filepath = PurePosixPath(self.dir_deployment) / release
 
-        sftp.mkdir(str(PurePosixPath(self.dir_deployment) / self.deploy_name))
-        cmd = f"pscp -P {self.port} -r -pw <PASSWORD> {staging_filepath} {self.user}@{self.host}:{self.dir_deployment}"  # /homes/user/docker_volumes/shinyapps/
-        print(f"PSCP Command: {cmd}")
+        if previous is None:
+            print(f"Full upload: {len(changed)} files")
+        else:
+            print(
+                f"Delta upload: {len(changed)} added/changed, {len(removed)} removed, "
+                f"{len(manifest.files) - len(changed)} unchanged (compared to the live `{self.deploy_name}`)"
+            )
         if testing:
-            return
-        subprocess.run(cmd.replace("<PASSWORD>", self.password.get_secret_value()), shell=True, check=True)  # noqa: S602
+            return release
+
+        stale = self._stale_releases(ssh, sftp, resume=release.name if checkpoint else None)
+        needed = changed
+        if checkpoint:
+            with self._span("verify_partial") as span:
+                present, verified = self._verify_partial_release(ssh, release_filepath, manifest, previous, checkpoint)
+                span.files = len(verified)
+            needed = [name for name in manifest.files if name not in verified]
+            print(f"Resuming the interrupted upload into `{release}`: {len(verified)} files already in place (size and hash verified)")
+        from_store, to_store = {}, {}
+        if self.shared_runtime and (runtime := runtime_files(manifest, changed)):
+            with self._span("store_index"):
+                stored = self._remote_store_index(sftp)
+            from_store = {name: digest for name, digest in runtime.items() if digest in stored}
+            to_store = {name: digest for name, digest in runtime.items() if digest not in stored}
+            print(f"Shared runtime: {len(from_store)} files linked from `{STORE_DIRNAME}`, {len(to_store)} new")
+        to_upload = [name for name in needed if name not in from_store]
+
+        prepare = RemoteOps(ssh)
+        if checkpoint:
+            # partial or outdated files; uploads must replace files, never write into them
+            prepare.remove_files(release_filepath, [x for x in present if x not in verified])
+        else:
+            checkpoint = UploadCheckpoint(self._checkpoint_filepath, target=self._upload_target, release=str(release), base=current)
+            checkpoint.start()
+            unlinked = []
+            if previous is None:
+                prepare.add(f"mkdir -p {shlex.quote(str(release_filepath))}")
+            else:
+                # hardlink copy of the live release; files that change are unlinked before upload so it stays untouched
+                prepare.add(
+                    f"mkdir -p {shlex.quote(str(release_filepath))} "
+                    f"&& cp -al {shlex.quote(str(current_filepath))}/. {shlex.quote(str(release_filepath))}/"
+                )
+                unlinked = removed + [x for x in changed if x in previous.files]
+            prepare.remove_files(release_filepath, unlinked + [MANIFEST_FILENAME])
+        if isinstance(uploader, ParallelUploader):
+            prepare.make_dirs(release_filepath, to_upload)
+        with self._span("prepare_release"):
+            run_concurrently(stale, prepare)  # old releases are deleted while the new one is set up
+        if not checkpoint.prepared:
+            checkpoint.mark_prepared(unlinked)
+        if to_upload:
+            sizes = {name: (staging_filepath / name).stat().st_size for name in to_upload}
+            with self._span("upload") as span:
+                span.bytes = uploader.upload(
+                    staging_filepath, to_upload, release_filepath,
+                    on_uploaded=lambda name: checkpoint.mark_uploaded(name, manifest.files[name], sizes[name]),
+                )
+                span.files = len(to_upload)
+            print(
+                f"Uploaded {len(to_upload)} files ({sum(sizes.values()) / 1e6:.1f} MB, {span.bytes / 1e6:.1f} MB sent) "
+                f"via {uploader.description} in {span.seconds:.2f}s"
+            )
+        if from_store or to_store:
+            store_filepath = PurePosixPath(self.dir_deployment) / STORE_DIRNAME
+            with self._span("store_link"):
+                self._exec(ssh, "sh -s", stdin=remote_link_script(release_filepath, store_filepath, from_store, to_store))
+        self._write_manifest(sftp, release_filepath, manifest)
+        checkpoint.clear()
+        return release
+
+    def _stream_app(self, ssh: SSHClient, sftp: SFTPClient, uploader: ParallelUploader) -> PurePosixPath:
+        """`_export` and `_push_app` overlapped: files are uploaded into the new release while the export writes them.
+
+        What export post-processing rewrote, or what changed after it was sent, is caught up from the final manifest.
+        Interrupted pipelined uploads are not resumed; the next deploy removes their release as stale.
+        """
+        current = self._release_target(self.deploy_name)
+        if self._resumable_checkpoint(sftp, current):
+            print("Pipelined upload: an interrupted upload is resumed first, after the export")
+            self._export()
+            return self._push_app(ssh, sftp, uploader)
+        current_filepath = PurePosixPath(self.dir_deployment) / current if current else None
+        previous = self._read_remote_manifest(sftp, current_filepath) if current else None
+        release = release_path(self.deploy_name, new_release_id())
+        release_filepath = PurePosixPath(self.dir_deployment) / release
+
+        prepare = RemoteOps(ssh).add(f"mkdir -p {shlex.quote(str(release_filepath))}")
+        if previous is not None:
+            # hardlinks of the live release; StreamingUpload replaces the ones that change rather than writing into them
+            prepare.add(f"cp -al {shlex.quote(str(current_filepath))}/. {shlex.quote(str(release_filepath))}/")
+            prepare.remove_files(release_filepath, [MANIFEST_FILENAME])
+        with self._span("prepare_release"):
+            run_concurrently(self._stale_releases(ssh, sftp), prepare)
+
+        staging_filepath = Path(self.dir_staging) / self.deploy_name
+        if staging_filepath.exists():
+            shutil.rmtree(staging_filepath)  # only files written by this export are offered
+        in_place = previous.files if previous else {}
+        finished = threading.Event()
+        with self._span("export_and_upload") as span:
+            with (
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="export") as pool,
+                StreamingUpload(uploader, staging_filepath, release_filepath, in_place) as stream,
+            ):
+                export = pool.submit(self._compile)
+                export.add_done_callback(lambda _: finished.set())
+                for name in settled_files(staging_filepath, finished):
+                    stream.offer(name)
+                export.result()
+            span.files, span.bytes = len(stream.sent), stream.bytes
+        self._post_export()
+
+        with self._span("manifest_diff") as span:
+            manifest = Manifest.from_directory(staging_filepath)
+            span.files = len(manifest.files)
+        uploaded = {**in_place, **stream.sent}  # what the release directory holds now
+        changed = [name for name, digest in manifest.files.items() if uploaded.get(name) != digest]
+        removed = [name for name in uploaded if name not in manifest.files]
+        unchanged = [name for name in manifest.files if name not in stream.sent and name not in changed]
+        print(
+            f"Pipelined upload: {len(stream.sent)} files ({stream.bytes / 1e6:.1f} MB) sent during the export, "
+            f"{len(changed)} caught up after it, {len(removed)} removed, "
+            f"{len(unchanged)} unchanged (compared to the live `{self.deploy_name}`)"
+        )
+        if changed or removed:
+            with self._span("upload") as span:
+                RemoteOps(ssh).remove_files(
+                    release_filepath, removed + [name for name in changed if name in uploaded]
+                ).make_dirs(release_filepath, changed).run()
+                span.bytes = uploader.upload(staging_filepath, changed, release_filepath) if changed else 0
+                span.files = len(changed)
+        self._write_manifest(sftp, release_filepath, manifest)
+        return release
+
+    def _write_manifest(self, sftp: SFTPClient, release_filepath: PurePosixPath, manifest: Manifest):
+        with self._span("write_manifest"), BytesIO(manifest.dumps().encode()) as f:
+            sftp.putfo(f, str(release_filepath / MANIFEST_FILENAME))
+        _release_manifests[f"{self._ssh_target}/{release_filepath}"] = manifest
+
+    @property
+    def _checkpoint_filepath(self) -> Path:
+        return Path(self.dir_staging) / CHECKPOINT_DIRNAME / f"{self.deploy_name}.jsonl"
+
+    @property
+    def _upload_target(self) -> str:
+        return f"{self._ssh_target}/{self.dir_deployment}"
+
+    def _resumable_checkpoint(self, sftp: SFTPClient, current: str | None) -> UploadCheckpoint | None:
+        """Checkpoint of an interrupted upload to this server that was prepared from the release that is still live."""
+        checkpoint = UploadCheckpoint.load(self._checkpoint_filepath)
+        if checkpoint is None or not checkpoint.prepared:
+            return None
+        if checkpoint.target != self._upload_target or checkpoint.base != current:
+            return None
+        if checkpoint.release in (current, self._release_target(f"{self.deploy_name}-backup")):
+            return None
+        try:
+            sftp.stat(str(PurePosixPath(self.dir_deployment) / checkpoint.release))
+        except FileNotFoundError:
+            return None
+        return checkpoint
+
+    def _verify_partial_release(
+        self, ssh: SSHClient, release_filepath: PurePosixPath, manifest: Manifest, previous: Manifest | None,
+        checkpoint: UploadCheckpoint,
+    ) -> tuple[dict[str, int], set[str]]:
+        """Files in a partially uploaded release (name -> size), and those already matching the staged app.
+
+        A file matches when its size does and its hash is known to: recorded by the checkpoint, hardlinked from the
+        live release, or (e.g. for files extracted by an interrupted tar stream) hashed on the server.
+        """
+        root = shlex.quote(str(release_filepath))
+        output = self._exec(ssh, (
+            # tar uploads extract into `<release>.upload-*` first; keep whatever an interrupted stream got through
+            f'for tmp in {root}.upload-*; do [ -d "$tmp" ] && cp -rlf "$tmp"/. {root}/ && rm -rf "$tmp"; done; '
+            f"cd {root} && find . -type f -exec stat -c '%s %n' {{}} +"
+        ))
+        present = {}
+        for line in output.splitlines():
+            size, _, name = line.partition(" ")
+            present[name.removeprefix("./")] = int(size)
+
+        staging_filepath = Path(self.dir_staging) / self.deploy_name
+        verified, unconfirmed = set(), []
+        for name, digest in manifest.files.items():
+            size = (staging_filepath / name).stat().st_size
+            if present.get(name) != size:
+                continue
+            hardlinked = previous is not None and previous.files.get(name) == digest and name not in checkpoint.unlinked
+            if checkpoint.files.get(name) == (digest, size) or hardlinked:
+                verified.add(name)
+            else:
+                unconfirmed.append(name)
+        if unconfirmed:
+            output = self._exec(ssh, f"cd {root} && xargs -0 sha256sum --", stdin="\0".join(unconfirmed))
+            for line in output.splitlines():
+                digest, _, name = line.partition("  ")
+                if manifest.files.get(name) == digest:
+                    verified.add(name)
+        return present, verified
+
+    def _go_live(self, ssh: SSHClient, release: PurePosixPath):
+        """Atomically points `<deploy_name>` at `release`; the previously live release becomes `<deploy_name>-backup`."""
+        current = self._release_target(self.deploy_name)
+        ops = RemoteOps(ssh)
+        if current == self.deploy_name:
+            # directory deployed before the release layout; it can only be moved aside, not swapped atomically
+            current = self._adopt_legacy_dir(ops, current)
+        if current is not None:
+            ops.switch_link(PurePosixPath(self.dir_deployment) / f"{self.deploy_name}-backup", current)
+        ops.switch_link(PurePosixPath(self.dir_deployment) / self.deploy_name, str(release))
+        ops.run()
+        self.dir_index.invalidate(self.deploy_name, f"{self.deploy_name}-backup")
+
+    def _release_target(self, name: str) -> str | None:
+        return self.dir_index.target(name)
+
+    def _adopt_legacy_dir(self, ops: RemoteOps, name: str) -> str:
+        """Queues moving a directory deployed before the release layout into `.releases`; returns its release path."""
+        legacy = release_path(self.deploy_name, new_release_id("legacy-"))
+        legacy_filepath = PurePosixPath(self.dir_deployment) / legacy
+        ops.add(
+            f"mkdir -p {shlex.quote(str(legacy_filepath.parent))} "
+            f"&& mv -T {shlex.quote(str(PurePosixPath(self.dir_deployment) / name))} {shlex.quote(str(legacy_filepath))}"
+        )
+        return str(legacy)
+
+    def _stale_releases(self, ssh: SSHClient, sftp: SFTPClient, resume: str | None = None) -> RemoteOps:
+        """Removal of release directories of this deploy name that are neither live, the backup nor being resumed."""
+        ops = RemoteOps(ssh)
+        releases_filepath = PurePosixPath(self.dir_deployment) / release_path(self.deploy_name, "")
+        try:
+            existing = sftp.listdir(str(releases_filepath))
+        except FileNotFoundError:
+            return ops
+        keep = {
+            PurePosixPath(target).name
+            for target in (self._release_target(self.deploy_name), self._release_target(f"{self.deploy_name}-backup"))
+            if target
+        }
+        if resume:
+            keep |= {x for x in existing if x == resume or x.startswith(f"{resume}.upload-")}
+        stale = [shlex.quote(str(releases_filepath / x)) for x in existing if x not in keep]
+        if stale:
+            ops.add(f"rm -rf {' '.join(stale)}")
+        return ops
+
+    def _remove_paths(self, ops: RemoteOps, *names: str | None) -> RemoteOps:
+        """Queues rm -rf of links/releases relative to the deployment directory, then pruning of the shared store."""
+        filepaths = [shlex.quote(str(PurePosixPath(self.dir_deployment) / x)) for x in dict.fromkeys(names) if x]
+        return ops.add(f"rm -rf {' '.join(filepaths)}" + self._prune_store_suffix())
+
+    def _read_remote_manifest(self, sftp: SFTPClient, app_dir: str) -> Manifest | None:
+        key = f"{self._ssh_target}/{app_dir}"
+        if key in _release_manifests:
+            return _release_manifests[key]
+        try:
+            with sftp.open(str(PurePosixPath(app_dir) / MANIFEST_FILENAME)) as f:
+                manifest = Manifest.loads(f.read())
+        except FileNotFoundError:
+            return None
+        if RELEASES_DIRNAME in PurePosixPath(app_dir).parts:  # not a directory deployed before the release layout
+            _release_manifests[key] = manifest
+        return manifest
+
+    def _remote_store_index(self, sftp: SFTPClient) -> set[str]:
+        store_filepath = str(PurePosixPath(self.dir_deployment) / STORE_DIRNAME)
+        try:
+            return set(sftp.listdir(store_filepath))
+        except FileNotFoundError:
+            sftp.mkdir(store_filepath)
+            return set()
+
+    def _exec(self, ssh: SSHClient, cmd: str, stdin: str | None = None) -> str:
+        return exec_command(ssh, cmd, stdin)
@@ -0,0 +1,62 @@
+import os
+import re
+import shlex
+from pathlib import Path, PurePosixPath
+
+from .manifest import Manifest
+
+STORE_DIRNAME = ".shinylive-store"
+RUNTIME_PATTERN = re.compile(r"^shinylive(-[0-9a-f]{12})?/")  # plain or fingerprinted (`shinylive-<hash>/`) runtime
+
+
+def runtime_files(manifest: Manifest, names: list[str] | None = None) -> dict[str, str]:
+    """Runtime assets (the shared `shinylive/` tree) among `names` (default: all files), mapped to their hash."""
+    names = manifest.files if names is None else names
+    return {name: manifest.files[name] for name in names if RUNTIME_PATTERN.match(name)}
+
+
+def link_local_runtime(app_dir: Path, store_dir: Path, manifest: Manifest) -> int:
+    """Replaces runtime files in `app_dir` with hardlinks into `store_dir`, adding new blobs. Returns files deduplicated."""
+    store_dir.mkdir(exist_ok=True)
+    linked = 0
+    for name, digest in runtime_files(manifest).items():
+        filepath, blob = app_dir / name, store_dir / digest
+        if not blob.exists():
+            os.link(filepath, blob)
+        elif not blob.samefile(filepath):
+            tmp = filepath.with_name(f".{filepath.name}.link")
+            os.link(blob, tmp)
+            os.replace(tmp, filepath)
+            linked += 1
+    return linked
+
+
+def prune_local_store(store_dir: Path) -> int:
+    """Removes blobs no longer linked from any deployed app."""
+    removed = 0
+    if store_dir.exists():
+        for blob in store_dir.iterdir():
+            if blob.stat().st_nlink == 1:
+                blob.unlink()
+                removed += 1
+    return removed
+
+
+def remote_link_script(
+    app_dir: PurePosixPath, store_dir: PurePosixPath, from_store: dict[str, str], to_store: dict[str, str]
+) -> str:
+    """Shell script that links `from_store` files out of the store and adds uploaded `to_store` files to it."""
+    lines = ["set -e"]
+    parents = sorted({str(app_dir / PurePosixPath(name).parent) for name in from_store})
+    if parents:
+        lines.append("mkdir -p " + " ".join(shlex.quote(x) for x in parents))
+    for name, digest in from_store.items():
+        lines.append(f"ln -f {shlex.quote(str(store_dir / digest))} {shlex.quote(str(app_dir / name))}")
+    for name, digest in to_store.items():
+        # another app may have added the same blob meanwhile; either inode is fine
+        lines.append(f"ln {shlex.quote(str(app_dir / name))} {shlex.quote(str(store_dir / digest))} 2>/dev/null || true")
+    return "\n".join(lines) + "\n"
+
+
+def remote_prune_command(store_dir: PurePosixPath) -> str:
+    return f"[ ! -d {shlex.quote(str(store_dir))} ] || find {shlex.quote(str(store_dir))} -type f -links 1 -delete"
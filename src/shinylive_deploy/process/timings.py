@@ -0,0 +1,84 @@
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+TIMINGS_REPORT_FILENAME = ".deploy-timings.jsonl"
+
+
+@dataclass
+class Span:
+    name: str
+    seconds: float = 0.0
+    files: int | None = None
+    bytes: int | None = None  # transferred (or written), for throughput
+
+    @property
+    def throughput(self) -> float | None:
+        """Bytes per second, when the span moved a known amount of data."""
+        if self.bytes is None or self.seconds <= 0:
+            return None
+        return self.bytes / self.seconds
+
+
+@dataclass
+class Timings:
+    """Wall-clock time of each phase of one command, e.g. `deploy` or `rollback`, in the order they finished."""
+    command: str = ""
+    mode: str = ""
+    apps: list[str] = field(default_factory=list)
+    started: str = field(default_factory=lambda: datetime.now(UTC).isoformat(timespec="seconds"))
+    status: str = "ok"
+    total_seconds: float = 0.0
+    spans: list[Span] = field(default_factory=list)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """Times the block; callers may set `files`/`bytes` on the yielded span."""
+        span = Span(name)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - start
+            self.spans.append(span)
+
+    @contextmanager
+    def record(self) -> Iterator["Timings"]:
+        """Times the whole command, marking it failed if the block raises."""
+        start = time.perf_counter()
+        try:
+            yield self
+        except BaseException:
+            self.status = "failed"
+            raise
+        finally:
+            self.total_seconds = time.perf_counter() - start
+
+    def report(self) -> dict:
+        report = asdict(self)
+        for span, entry in zip(self.spans, report["spans"]):
+            entry["throughput"] = span.throughput
+        return report
+
+    def write(self, filepath: Path):
+        """Appends the report as one JSON line, so the file keeps a history across deploys."""
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.report()) + "\n")
+
+    def summary(self) -> str:
+        lines = [f"\nTIMINGS: `{self.command}` of {', '.join(self.apps)} ({self.mode}) {self.status} in {self.total_seconds:.2f}s"]
+        for span in self.spans:
+            line = f"- {span.name:<28} {span.seconds:8.2f}s"
+            if span.files is not None:
+                line += f"  {span.files} files"
+            if span.bytes is not None:
+                line += f"  {span.bytes / 1e6:.1f} MB"
+            if span.throughput is not None:
+                line += f"  {span.throughput / 1e6:.1f} MB/s"
+            lines.append(line)
+        return "\n".join(lines)
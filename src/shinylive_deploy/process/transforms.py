@@ -0,0 +1,134 @@
+import json
+import re
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import TextIO
+
+from .exceptions import DeployException
+from .fsops import replacing
+
+EntryTransform = Callable[[dict], dict | None]  # returns the entry, a modified copy, or None to drop it
+APP_JSON_TRANSFORMS = ("windows_paths", "strip", "minify")
+
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+_STRING_BODY = re.compile(r'(?:[^"\\]++|\\.)*+', re.DOTALL)  # up to the closing quote, a dangling backslash or the end
+
+
+def iter_json_array(f: TextIO, chunk_size: int = 2**16) -> Iterator[str]:
+    """Raw JSON text of each element of the top-level array in `f`, reading it in chunks.
+
+    Only the element being scanned is held in memory, so peak memory is bounded by the largest element rather than
+    the whole document. Elements must be objects, arrays or strings, as in `app.json`.
+    """
+    buf, pos, start = "", 0, None
+    depth, in_string, need_more = 0, False, True
+    while True:
+        if need_more:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                if depth or in_string:
+                    raise ValueError("Unexpected end of JSON array")
+                return
+            if start is None:
+                buf, pos = buf[pos:] + chunk, 0
+            else:
+                buf, pos, start = buf[start:] + chunk, pos - start, 0
+            need_more = False
+        if in_string:
+            end = _STRING_BODY.match(buf, pos).end()
+            if end == len(buf) or buf[end] != '"':
+                pos, need_more = end, True
+                continue
+            pos, in_string = end + 1, False
+        else:
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos, need_more = len(buf), True
+                continue
+            pos = match.end()
+            lexeme = match.group()
+            if lexeme in '"{[' and depth == 1:
+                start = match.start()
+            if lexeme == '"':
+                in_string = True
+                continue
+            depth += 1 if lexeme in "{[" else -1
+        if depth == 1 and start is not None:
+            yield buf[start:pos]
+            start = None
+
+
+def windows_paths(entry: dict) -> dict:
+    """Windows exports name files with `\\` separators, which break Python imports in the browser."""
+    if "\\" in entry.get("name", ""):
+        return {**entry, "name": entry["name"].replace("\\", "/")}
+    return entry
+
+
+def strip(patterns: list[str] | tuple[str, ...]) -> EntryTransform:
+    """Drops files matching any glob in `patterns` (e.g. tests or docs) from the bundle."""
+    def transform(entry: dict) -> dict | None:
+        return None if any(fnmatch(entry.get("name", ""), x) for x in patterns) else entry
+
+    return transform
+
+
+@dataclass
+class AppJsonResult:
+    changed: int = 0
+    removed: int = 0
+    size_before: int = 0
+    size_after: int = 0
+
+
+@dataclass
+class AppJsonPipeline:
+    transforms: list[EntryTransform] = field(default_factory=list)
+    minify: bool = False
+
+    @classmethod
+    def from_names(cls, names: list[str] | tuple[str, ...], strip_patterns: list[str] | tuple[str, ...] = ()) -> "AppJsonPipeline":
+        pipeline = cls()
+        for name in names:
+            if name not in APP_JSON_TRANSFORMS:
+                raise DeployException(f"Unknown app.json transform `{name}`; expected one of: {', '.join(APP_JSON_TRANSFORMS)}")
+            if name == "windows_paths":
+                pipeline.transforms.append(windows_paths)
+            elif name == "strip":
+                pipeline.transforms.append(strip(strip_patterns))
+            else:
+                pipeline.minify = True
+        return pipeline
+
+    def run(self, app_json_path: Path) -> AppJsonResult:
+        """Rewrites `app_json_path` in a single streaming pass, replacing the file only if anything changed."""
+        result = AppJsonResult(size_before=app_json_path.stat().st_size)
+        separators = (",", ":") if self.minify else (", ", ": ")  # the default matches `shinylive export` output
+        with replacing(app_json_path) as tmp_path:
+            with open(app_json_path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+                dst.write("[")
+                written = 0
+                for raw in iter_json_array(src):
+                    original = entry = json.loads(raw)
+                    for transform in self.transforms:
+                        if (entry := transform(entry)) is None:
+                            break
+                    if entry is None:
+                        result.removed += 1
+                        continue
+                    dst.write(separators[0] if written else "")
+                    if entry is original and not self.minify:
+                        dst.write(raw)  # untouched entries are copied byte for byte
+                    else:
+                        result.changed += entry is not original
+                        dst.write(json.dumps(entry, separators=separators))
+                    written += 1
+                dst.write("]")
+            if not (result.changed or result.removed or self.minify):
+                tmp_path.unlink()
+                result.size_after = result.size_before
+                return result
+        result.size_after = app_json_path.stat().st_size
+        return result
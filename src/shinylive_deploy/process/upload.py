@@ -0,0 +1,244 @@
+import gzip
+import hashlib
+import queue
+import shlex
+import tarfile
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path, PurePosixPath
+from typing import Self
+
+from paramiko import SFTPClient, SSHClient
+
+from .exceptions import DeployException
+from .manifest import hash_file
+
+SFTP_WINDOW_SIZE = 2**24  # larger flow-control window keeps pipelined writes going on high-latency links
+REMOTE_DECOMPRESS = {"gzip": "gzip -dc", "zstd": "zstd -dc", "none": "cat"}  # tar compression -> remote command
+
+
+class ParallelUploader:
+    """Uploads files concurrently over several SFTP channels of one already-open SSH connection."""
+
+    def __init__(self, ssh: SSHClient, workers: int = 4):
+        self.ssh = ssh
+        self.workers = max(1, int(workers))
+        self._local = threading.local()
+        self._clients: list[SFTPClient] = []
+        self._lock = threading.Lock()
+
+    @property
+    def description(self) -> str:
+        return f"sftp ({self.workers} channels)"
+
+    def upload(
+        self, local_root: Path, names: list[str], remote_root: PurePosixPath, on_uploaded: Callable[[str], None] | None = None
+    ) -> int:
+        """Uploads `names` (relative to both roots); remote parent directories must already exist. Returns bytes sent.
+
+        `on_uploaded` is called from the worker threads with each name once the server has confirmed the whole file.
+        """
+        # largest first, so a few huge files don't end up serialized at the tail of the queue
+        names = sorted(names, key=lambda x: (Path(local_root) / x).stat().st_size, reverse=True)
+
+        def put(name: str) -> int:
+            sent = self._put(Path(local_root) / name, PurePosixPath(remote_root) / name)
+            if on_uploaded:
+                on_uploaded(name)
+            return sent
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sftp-upload") as pool:
+                return sum(pool.map(put, names))
+        finally:
+            self.close()
+
+    def close(self):
+        for sftp in self._clients:
+            sftp.close()
+        self._clients.clear()
+
+    def _sftp(self) -> SFTPClient:
+        sftp = getattr(self._local, "sftp", None)
+        if sftp is None:
+            sftp = SFTPClient.from_transport(self.ssh.get_transport(), window_size=SFTP_WINDOW_SIZE)
+            self._local.sftp = sftp
+            with self._lock:
+                self._clients.append(sftp)
+        return sftp
+
+    def _put(self, local_path: Path, remote_path: PurePosixPath) -> int:
+        # `put` pipelines its writes; confirm=False skips the extra stat round trip per file
+        self._sftp().put(str(local_path), str(remote_path), confirm=False)
+        return local_path.stat().st_size
+
+
+class StreamingUpload:
+    """Uploads files of a tree that is still being written: `offer` queues a name, the uploader's SFTP workers send it.
+
+    Files are sent in chunks and hashed as they are read, so `sent` records the content that reached the server.
+    Files in `in_place` (name -> sha256, e.g. hardlinked from the live release) are skipped while unchanged, and
+    otherwise removed first so the upload replaces them instead of writing into the shared inode. The queue is bounded:
+    a fast writer waits for the uploads rather than piling files up.
+    """
+
+    def __init__(
+        self, uploader: ParallelUploader, local_root: Path, remote_root: PurePosixPath, in_place: dict[str, str],
+        queue_size: int = 64,
+    ):
+        self.uploader = uploader
+        self.local_root = Path(local_root)
+        self.remote_root = PurePosixPath(remote_root)
+        self.in_place = in_place
+        self.sent: dict[str, str] = {}  # name -> sha256 of the uploaded content
+        self.bytes = 0
+        self._queue: queue.Queue[str | None] = queue.Queue(maxsize=queue_size)
+        self._dirs = {PurePosixPath(".")} | {parent for name in in_place for parent in PurePosixPath(name).parents}
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._error: Exception | None = None
+
+    def __enter__(self) -> Self:
+        for i in range(self.uploader.workers):
+            thread = threading.Thread(target=self._work, name=f"sftp-stream-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self.uploader.close()
+        if self._error is not None and exc_type is None:
+            raise self._error
+
+    def offer(self, name: str):
+        self._queue.put(name)
+
+    def _work(self):
+        while (name := self._queue.get()) is not None:
+            if self._error is not None:
+                continue  # keep draining, so `offer` never blocks on a failed upload
+            try:
+                self._upload(name)
+            except Exception as e:  # noqa: BLE001
+                self._error = e
+
+    def _upload(self, name: str):
+        local_path = self.local_root / name
+        if name in self.in_place and hash_file(local_path) == self.in_place[name]:
+            return
+        sftp = self.uploader._sftp()
+        remote_path = self.remote_root / name
+        if name in self.in_place:
+            sftp.remove(str(remote_path))
+        self._make_parents(sftp, PurePosixPath(name))
+        with open(local_path, "rb") as f:
+            reader = _HashingReader(f)
+            sftp.putfo(reader, str(remote_path), confirm=False)  # reads fixed-size chunks
+        with self._lock:
+            self.sent[name] = reader.digest.hexdigest()
+            self.bytes += reader.size
+
+    def _make_parents(self, sftp: SFTPClient, name: PurePosixPath):
+        with self._lock:
+            for parent in reversed(name.parents):
+                if parent not in self._dirs:
+                    try:
+                        sftp.mkdir(str(self.remote_root / parent))
+                    except OSError:
+                        pass  # already there
+                    self._dirs.add(parent)
+
+
+class _HashingReader:
+    """File reader that hashes what is read, i.e. what was sent."""
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+
+
+class TarStreamUploader:
+    """Streams files as one compressed tar over a single SSH exec channel, extracted remotely by `tar -x`."""
+
+    def __init__(self, ssh: SSHClient, compression: str = "gzip"):
+        if compression not in REMOTE_DECOMPRESS:
+            raise DeployException(f"Unknown tar compression `{compression}`; expected one of: {', '.join(REMOTE_DECOMPRESS)}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError as e:
+                raise DeployException("`zstd` tar compression requires the `zstandard` package") from e
+        self.ssh = ssh
+        self.compression = compression
+
+    @property
+    def description(self) -> str:
+        return f"tar+{self.compression}" if self.compression != "none" else "tar"
+
+    def upload(
+        self, local_root: Path, names: list[str], remote_root: PurePosixPath, on_uploaded: Callable[[str], None] | None = None
+    ) -> int:
+        """Extracts into a temp directory next to `remote_root`, then hardlinks the result into place. Returns bytes sent.
+
+        Files are only known to be complete once the whole stream is extracted, so `on_uploaded` is called at the end.
+        """
+        root = shlex.quote(str(remote_root))
+        tmp = shlex.quote(f"{remote_root}.upload-XXXXXX")
+        cmd = (
+            f'tmp=$(mktemp -d {tmp}) && {REMOTE_DECOMPRESS[self.compression]} | tar -xf - -C "$tmp" '
+            f'&& cp -rlf "$tmp"/. {root}/ && rm -rf "$tmp"'
+        )
+        channel = self.ssh.get_transport().open_session(window_size=SFTP_WINDOW_SIZE)
+        channel.exec_command(cmd)
+        error = None
+        with channel.makefile("wb") as raw:
+            counted = _CountingWriter(raw)
+            try:
+                with self._compressor(counted) as stream, tarfile.open(fileobj=stream, mode="w|") as tar:
+                    for name in names:
+                        tar.add(Path(local_root) / name, arcname=name, recursive=False)
+            except OSError as e:
+                error = e  # usually the remote side went away, and its exit status says why
+        channel.shutdown_write()
+        if channel.recv_exit_status() != 0 or error:
+            stderr = channel.makefile_stderr("rb").read().decode(errors="replace")
+            raise DeployException(f"Remote tar extraction failed: `{cmd}`\n{stderr or error}")
+        for name in names if on_uploaded else ():
+            on_uploaded(name)
+        return counted.count
+
+    def _compressor(self, raw):
+        if self.compression == "gzip":
+            return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+        if self.compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor(level=6).stream_writer(raw, closefd=False)
+        return nullcontext(raw)
+
+
+class _CountingWriter:
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data) -> int:
+        self.raw.write(data)
+        self.count += len(data)
+        return len(data)
+
+    def flush(self):
+        self.raw.flush()
+
@@ -0,0 +1,38 @@
+import os
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+POLL_INTERVAL = 0.1  # seconds
+
+
+def settled_files(root: Path, finished: threading.Event, interval: float = POLL_INTERVAL) -> Iterator[str]:
+    """Posix paths (relative to `root`) of files as they are written under `root`, each yielded once.
+
+    While the writer runs, a file is yielded once its size and mtime stayed the same for one `interval`; after
+    `finished` is set, one last scan yields every file not seen yet. A file only looked finished when yielded, so
+    consumers must still check the final tree.
+    """
+    root = Path(root)
+    sizes: dict[str, tuple[int, int]] = {}
+    yielded: set[str] = set()
+    while True:
+        done = finished.is_set()  # checked before scanning, so the last scan sees everything written
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                name = path.relative_to(root).as_posix()
+                if name in yielded:
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if done or sizes.get(name) == (stat.st_size, stat.st_mtime_ns):
+                    yielded.add(name)
+                    yield name
+                else:
+                    sizes[name] = (stat.st_size, stat.st_mtime_ns)
+        if done:
+            return
+        finished.wait(interval)
@@ -0,0 +1,245 @@
+import email.utils
+import hashlib
+import mimetypes
+import os
+import re
+import signal
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preference order when the client accepts both
+FINGERPRINTED_DIR = re.compile(r"shinylive-[0-9a-f]{12}")  # runtime directory named by `fingerprint_runtime`
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+MIME_TYPES = {
+    ".wasm": "application/wasm",  # required for streaming compilation of the Pyodide runtime
+    ".js": "text/javascript",
+    ".mjs": "text/javascript",
+    ".json": "application/json",
+    ".whl": "application/zip",
+    ".data": "application/octet-stream",
+}
+
+
+@lru_cache(maxsize=4096)
+def strong_etag(path: str, inode: int, size: int, mtime_ns: int) -> str:
+    """Content hash of `path`; stat fields are part of the cache key so a replaced file is hashed again."""
+    with open(path, "rb") as f:
+        return f'"{hashlib.file_digest(f, "sha256").hexdigest()[:32]}"'
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    if "*" in accepted:
+        accepted.update(name for name, _ in ENCODINGS)
+    return accepted
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None | bool:
+    """(first, last) byte of a single `bytes=` range; None to ignore the header, False when unsatisfiable."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or match.groups() == ("", ""):
+        return None  # malformed or multiple ranges: respond with the full file
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        return (max(size - length, 0), size - 1) if length and size else False
+    if int(first) >= size or (last and int(last) < int(first)):
+        return False
+    return int(first), min(int(last), size - 1) if last else size - 1
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "shinylive_deploy"
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def log_message(self, format, *args):
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+    def _serve(self, head: bool):
+        url_path = urlsplit(self.path).path
+        parts = self._path_parts(unquote(url_path))
+        filepath = self._resolve(parts)
+        if filepath is None:
+            return self._send_status(HTTPStatus.NOT_FOUND)
+        if filepath.is_dir():
+            if not url_path.endswith("/"):
+                return self._send_status(HTTPStatus.MOVED_PERMANENTLY, {"Location": quote(unquote(url_path)) + "/"})
+            filepath = filepath / "index.html"
+            if not filepath.is_file():
+                return self._send_status(HTTPStatus.NOT_FOUND)
+
+        served, encoding, variants = filepath, None, False
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for name, suffix in ENCODINGS:
+            variant = filepath.with_name(filepath.name + suffix)
+            if variant.is_file():
+                variants = True
+                # ranges always refer to the identity encoding, so only whole-file responses are negotiated
+                if encoding is None and name in accepted and "Range" not in self.headers:
+                    served, encoding = variant, name
+
+        stat = served.stat()
+        etag = strong_etag(str(served), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+            "Cache-Control": CACHE_IMMUTABLE if self._fingerprinted(parts) else CACHE_REVALIDATE,
+        }
+        if variants:
+            headers["Vary"] = "Accept-Encoding"
+        if self._not_modified(etag, stat.st_mtime):
+            return self._send_status(HTTPStatus.NOT_MODIFIED, headers)
+
+        status, first, last = HTTPStatus.OK, 0, stat.st_size - 1
+        if "Range" in self.headers and self._if_range(etag, stat.st_mtime):
+            requested = parse_range(self.headers["Range"], stat.st_size)
+            if requested is False:
+                return self._send_status(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, {"Content-Range": f"bytes */{stat.st_size}"})
+            if requested:
+                status, (first, last) = HTTPStatus.PARTIAL_CONTENT, requested
+                headers["Content-Range"] = f"bytes {first}-{last}/{stat.st_size}"
+
+        self.send_response(status)
+        self.send_header("Content-Type", MIME_TYPES.get(filepath.suffix) or mimetypes.guess_type(filepath.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(last - first + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if not head and last >= first:
+            with open(served, "rb") as f:
+                self.connection.sendfile(f, first, last - first + 1)  # zero-copy where the platform supports it
+
+    def _path_parts(self, url_path: str) -> list[str] | None:
+        prefix = self.server.prefix
+        if url_path != prefix and not url_path.startswith(prefix + "/"):
+            return None
+        parts = [x for x in url_path[len(prefix):].split("/") if x]
+        # dot entries are internal (`.releases`, `.shinylive-store`, manifests, temporary links)
+        if any(x.startswith(".") or "\\" in x for x in parts):
+            return None
+        return parts
+
+    @staticmethod
+    def _fingerprinted(parts: list[str]) -> bool:
+        """Whether the request is for a file inside an app's fingerprinted runtime: `<app>/shinylive-<hash>/...`."""
+        return len(parts) > 2 and FINGERPRINTED_DIR.fullmatch(parts[1]) is not None
+
+    def _resolve(self, parts: list[str] | None) -> Path | None:
+        if parts is None:
+            return None
+        filepath = self.server.root.joinpath(*parts)
+        try:
+            resolved = filepath.resolve(strict=True)
+        except (OSError, RuntimeError):
+            return None
+        if not resolved.is_relative_to(self.server.root):
+            return None
+        return resolved
+
+    def _not_modified(self, etag: str, mtime: float) -> bool:
+        if (if_none_match := self.headers.get("If-None-Match")) is not None:
+            return if_none_match.strip() == "*" or etag in [x.strip().removeprefix("W/") for x in if_none_match.split(",")]
+        if (if_modified_since := self.headers.get("If-Modified-Since")) is not None:
+            try:
+                return int(mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _if_range(self, etag: str, mtime: float) -> bool:
+        if (if_range := self.headers.get("If-Range")) is None:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag
+        return if_range == email.utils.formatdate(mtime, usegmt=True)
+
+    def _send_status(self, status: HTTPStatus, headers: dict[str, str] | None = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class StaticServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: tuple[str, int], root: Path, prefix: str = "", access_log: bool = False):
+        self.root = Path(root).resolve()
+        self.prefix = "/" + prefix.strip("/") if prefix.strip("/") else ""
+        self.access_log = access_log
+        super().__init__(address, StaticHandler)
+
+    def get_request(self):
+        # the listening socket is non-blocking when shared by pre-forked workers; connections must not be
+        connection, address = self.socket.accept()
+        connection.setblocking(True)
+        return connection, address
+
+
+def serve(directory: Path, host: str, port: int, prefix: str = "", workers: int = 1, access_log: bool = False):
+    """Serves `directory` under `prefix` until interrupted, with `workers` pre-forked processes sharing one socket."""
+    server = StaticServer((host, port), directory, prefix, access_log)
+    if workers > 1 and not hasattr(os, "fork"):
+        print("\n>>> WARNING <<<: multiple workers require `os.fork`; serving with a single worker.")
+        workers = 1
+    print(f"\nServing `{directory}` at http://{host}:{server.server_address[1]}{server.prefix}/ ({workers} worker(s), Ctrl+C to stop)")
+
+    if workers <= 1:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    server.socket.setblocking(False)  # idle workers must not block in accept() after another worker took the connection
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os._exit(0)
+        children.append(pid)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+    finally:
+        server.server_close()
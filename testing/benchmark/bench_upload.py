@@ -0,0 +1,183 @@
+"""Upload benchmarks for `ServerShinyDeploy` against an in-process SFTP server; no SSH host or container required.
+
+    python benchmark/bench_upload.py --profiles small mixed --transports sftp tar --repeat 3
+
+Each run deploys a synthetic tree to an empty host ("full"), then redeploys it with a fraction of its files changed
+("delta"). Results are appended to `results.jsonl` next to this file and compared with the previous run of the same
+configuration, so performance changes can be tracked over time.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+from paramiko import SSHClient
+from pydantic import SecretStr
+from sftp_server import SFTPStandIn
+from trees import PROFILES, generate_tree, modify_tree
+
+from shinylive_deploy.config import Config, override_config
+from shinylive_deploy.process.gitinfo import find_git_dir, read_head
+from shinylive_deploy.process.server import ServerShinyDeploy
+from shinylive_deploy.process.timings import Timings
+
+RESULTS_FILEPATH = Path(__file__).parent / "results.jsonl"
+TRANSPORTS = ("sftp", "tar")
+SCENARIOS = ("full", "delta")
+BENCH_CONFIG = Config(app_name="bench", deploy_local={}, deploy_server={})
+DEPLOY_NAME = "bench-test"
+
+
+@dataclass
+class Result:
+    profile: str
+    transport: str
+    scenario: str
+    scale: float
+    latency: float
+    workers: int
+    files: int  # in the tree
+    bytes: int
+    seconds: float  # median over repeats, from connecting to going live
+    upload_seconds: float  # median over repeats
+    uploaded_files: int
+    sent_bytes: int  # payload handed to the transport, after any compression
+    sftp_requests: int
+    exec_commands: int
+    wire_bytes_up: int  # including SSH framing and encryption overhead
+    wire_bytes_down: int
+
+    @property
+    def key(self) -> tuple:
+        return self.profile, self.transport, self.scenario, self.scale, self.latency, self.workers
+
+
+def publish(server: SFTPStandIn, staging_dir: Path, transport: str, workers: int) -> Timings:
+    """Deploys `staging_dir/<DEPLOY_NAME>` to `server` like `shinylive_deploy deploy test`, minus the export."""
+    with override_config(BENCH_CONFIG):
+        deployer = ServerShinyDeploy(
+            mode="test", app_name="bench", base_url="http://bench", dir_deployment="shinyapps", dir_staging=str(staging_dir),
+            host="127.0.0.1", port=server.port, user="bench", password=SecretStr("bench"),
+            transport=transport, upload_workers=workers, timings_report="",
+        )
+    deployer.timings = Timings(command="publish", mode=deployer.mode, apps=[deployer.deploy_name])
+    with contextlib.redirect_stdout(io.StringIO()), SSHClient() as ssh, deployer.timings.record():
+        deployer._publish(deployer._ssh_connection(ssh))
+    return deployer.timings
+
+
+def run_benchmark(
+    tree: Path, profile: str, transport: str, scale: float = 1.0, latency: float = 0.0, workers: int = 4,
+    repeat: int = 3, changed: float = 0.05,
+) -> list[Result]:
+    """Full and delta deploys of the pre-generated `tree`, each on a fresh host, `repeat` times."""
+    files = [x for x in tree.rglob("*") if x.is_file()]
+    runs = {scenario: [] for scenario in SCENARIOS}
+    for i in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            remote, staging = Path(tmp) / "remote", Path(tmp) / "staging"
+            (remote / "shinyapps").mkdir(parents=True)
+            shutil.copytree(tree, staging / DEPLOY_NAME)
+            with SFTPStandIn(remote, latency=latency) as server:
+                for scenario in SCENARIOS:
+                    if scenario == "delta":
+                        modify_tree(staging / DEPLOY_NAME, changed, seed=i)
+                    server.stats.reset()
+                    timings = publish(server, staging, transport, workers)
+                    runs[scenario].append((timings, server.stats.snapshot()))
+
+    results = []
+    for scenario, scenario_runs in runs.items():
+        uploads = [next((x for x in timings.spans if x.name == "upload"), None) for timings, _ in scenario_runs]
+        timings, stats = scenario_runs[-1]
+        results.append(Result(
+            profile=profile, transport=transport, scenario=scenario, scale=scale, latency=latency, workers=workers,
+            files=len(files), bytes=sum(x.stat().st_size for x in files),
+            seconds=statistics.median(x.total_seconds for x, _ in scenario_runs),
+            upload_seconds=statistics.median(x.seconds if x else 0.0 for x in uploads),
+            uploaded_files=uploads[-1].files if uploads[-1] else 0,
+            sent_bytes=uploads[-1].bytes if uploads[-1] else 0,
+            sftp_requests=stats["sftp_requests"], exec_commands=stats["exec_commands"],
+            wire_bytes_up=stats["bytes_received"], wire_bytes_down=stats["bytes_sent"],
+        ))
+    return results
+
+
+def previous_results(filepath: Path) -> dict[tuple, dict]:
+    """Latest saved result per configuration."""
+    if not filepath.exists():
+        return {}
+    latest = {}
+    for line in filepath.read_text().splitlines():
+        entry = json.loads(line)
+        latest[tuple(entry[x] for x in ("profile", "transport", "scenario", "scale", "latency", "workers"))] = entry
+    return latest
+
+
+def save_results(filepath: Path, results: list[Result]):
+    repo = Path(__file__).resolve().parent
+    context = {
+        "recorded": datetime.now(UTC).isoformat(timespec="seconds"),
+        "commit": read_head(repo).commit if find_git_dir(repo) else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps({**asdict(result), **context}) + "\n" for result in results)
+
+
+def print_results(results: list[Result], previous: dict[tuple, dict]):
+    print(
+        f"\n{'profile':<8} {'transport':<9} {'scenario':<8} {'files':>6} {'MB':>7} {'seconds':>8} {'upload s':>8} "
+        f"{'MB/s':>7} {'requests':>8} {'exec':>5} {'wire MB':>8}  vs previous"
+    )
+    for result in results:
+        throughput = result.sent_bytes / result.upload_seconds / 1e6 if result.upload_seconds else 0.0
+        change = ""
+        if (before := previous.get(result.key)) and before["seconds"]:
+            change = f"{(result.seconds - before['seconds']) / before['seconds']:+.1%} ({(before['commit'] or '?')[:8]})"
+        print(
+            f"{result.profile:<8} {result.transport:<9} {result.scenario:<8} {result.files:>6} {result.bytes / 1e6:>7.1f} "
+            f"{result.seconds:>8.2f} {result.upload_seconds:>8.2f} {throughput:>7.1f} {result.sftp_requests:>8} "
+            f"{result.exec_commands:>5} {result.wire_bytes_up / 1e6:>8.1f}  {change}"
+        )
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplies file counts and sizes of the profiles.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every SFTP request and command.")
+    parser.add_argument("--workers", type=int, default=4, help="`upload_workers` for the sftp transport.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--changed", type=float, default=0.05, help="Fraction of files changed for the delta deploy.")
+    parser.add_argument("--results", type=Path, default=RESULTS_FILEPATH)
+    parser.add_argument("--no-save", action="store_true", help="Don't append the results to `--results`.")
+    args = parser.parse_args(argv)
+
+    previous = previous_results(args.results)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles:
+            tree = Path(tmp) / profile
+            generate_tree(tree, profile, args.scale)
+            for transport in args.transports:
+                results += run_benchmark(
+                    tree, profile, transport, args.scale, args.latency, args.workers, args.repeat, args.changed
+                )
+    print_results(results, previous)
+    if not args.no_save:
+        save_results(args.results, results)
+        print(f"\nResults appended to `{args.results}`")
+
+
+if __name__ == "__main__":
+    main()
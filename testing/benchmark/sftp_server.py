@@ -0,0 +1,251 @@
+"""In-process SSH/SFTP server standing in for the deployment host in upload benchmarks.
+
+Serves a local directory over SFTP and runs `exec` commands with the local shell inside it, so `ServerShinyDeploy`
+can deploy to it unchanged. Every SFTP request, exec command and byte on the wire is counted; `latency` delays each
+request and command to emulate a distant host.
+"""
+# ruff: noqa: S602
+import logging
+import os
+import socket
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Self
+
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface
+from paramiko.sftp import SFTP_OK
+
+LOG_CHANNEL = "benchmark.sftp_server"
+logging.getLogger(LOG_CHANNEL).setLevel(logging.CRITICAL)  # clients disconnecting abruptly is expected here
+
+
+@dataclass
+class ServerStats:
+    sftp_requests: int = 0
+    exec_commands: int = 0
+    bytes_received: int = 0  # client -> server, including SSH framing
+    bytes_sent: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **counts: int):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def reset(self):
+        self.add(**{name: -value for name, value in self.snapshot().items()})
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {x.name: getattr(self, x.name) for x in fields(self) if not x.name.startswith("_")}
+
+
+class _CountingSocket:
+    def __init__(self, sock: socket.socket, stats: ServerStats):
+        self._sock = sock
+        self._stats = stats
+
+    def send(self, data) -> int:
+        sent = self._sock.send(data)
+        self._stats.add(bytes_sent=sent)
+        return sent
+
+    def recv(self, size: int) -> bytes:
+        data = self._sock.recv(size)
+        self._stats.add(bytes_received=len(data))
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self._sock, name)
+
+
+class _Handle(SFTPHandle):
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        return SFTP_OK
+
+
+def _errno_result(method):
+    def wrapper(*args, **kwargs):
+        try:
+            result = method(*args, **kwargs)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        return SFTP_OK if result is None else result
+
+    return wrapper
+
+
+class _LocalSFTP(SFTPServerInterface):
+    """SFTP operations on the server's root directory; absolute paths are treated as relative to it."""
+    def __init__(self, server: "_SSHServer", *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.stand_in = server.stand_in
+        self.root = server.stand_in.root
+
+    def _path(self, path: str) -> str:
+        return str(self.root / self.canonicalize(path).lstrip("/"))
+
+    def canonicalize(self, path: str) -> str:
+        return os.path.normpath("/" + path.lstrip("/"))
+
+    @_errno_result
+    def list_folder(self, path):
+        directory = self._path(path)
+        attributes = []
+        for name in os.listdir(directory):
+            attribute = SFTPAttributes.from_stat(os.lstat(os.path.join(directory, name)))
+            attribute.filename = name
+            attributes.append(attribute)
+        return attributes
+
+    @_errno_result
+    def stat(self, path):
+        return SFTPAttributes.from_stat(os.stat(self._path(path)))
+
+    @_errno_result
+    def lstat(self, path):
+        return SFTPAttributes.from_stat(os.lstat(self._path(path)))
+
+    @_errno_result
+    def open(self, path, flags, attr):
+        fd = os.open(self._path(path), flags, 0o644)
+        if flags & os.O_WRONLY:
+            mode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            mode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            mode = "rb"
+        handle = _Handle(flags)
+        handle.filename = self._path(path)
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    @_errno_result
+    def remove(self, path):
+        os.remove(self._path(path))
+
+    @_errno_result
+    def rename(self, oldpath, newpath):
+        os.rename(self._path(oldpath), self._path(newpath))
+
+    @_errno_result
+    def posix_rename(self, oldpath, newpath):
+        os.replace(self._path(oldpath), self._path(newpath))
+
+    @_errno_result
+    def mkdir(self, path, attr):
+        os.mkdir(self._path(path))
+
+    @_errno_result
+    def rmdir(self, path):
+        os.rmdir(self._path(path))
+
+    def chattr(self, path, attr):
+        return SFTP_OK
+
+    @_errno_result
+    def symlink(self, target_path, path):
+        os.symlink(target_path, self._path(path))
+
+    @_errno_result
+    def readlink(self, path):
+        return os.readlink(self._path(path))
+
+
+class _CountingSFTPServer(SFTPServer):
+    def _process(self, t, request_number, msg):
+        stand_in = self.server.stand_in  # `server` is the `_LocalSFTP` of this session
+        stand_in.stats.add(sftp_requests=1)
+        if stand_in.latency:
+            time.sleep(stand_in.latency)
+        return super()._process(t, request_number, msg)
+
+
+class _SSHServer(paramiko.ServerInterface):
+    def __init__(self, stand_in: "SFTPStandIn"):
+        self.stand_in = stand_in
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_exec_request(self, channel, command):
+        self.stand_in.stats.add(exec_commands=1)
+        threading.Thread(target=self._exec, args=(channel, command), daemon=True).start()
+        return True
+
+    def _exec(self, channel, command: bytes):
+        if self.stand_in.latency:
+            time.sleep(self.stand_in.latency)
+        process = subprocess.Popen(
+            command.decode(), shell=True, cwd=self.stand_in.root,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+
+        def feed_stdin():
+            while data := channel.recv(2**16):
+                process.stdin.write(data)
+            process.stdin.close()
+
+        threading.Thread(target=feed_stdin, daemon=True).start()
+        stdout, stderr = process.stdout.read(), process.stderr.read()
+        channel.sendall(stdout)
+        channel.sendall_stderr(stderr)
+        channel.send_exit_status(process.wait())
+        channel.close()
+
+
+class SFTPStandIn:
+    """`with SFTPStandIn(root) as server:` accepts any password on `127.0.0.1:server.port` until the block exits."""
+    _host_key: paramiko.RSAKey | None = None
+
+    def __init__(self, root: Path, latency: float = 0.0):
+        self.root = Path(root)
+        self.latency = latency
+        self.stats = ServerStats()
+        self._socket: socket.socket | None = None
+        self._transports: list[paramiko.Transport] = []
+
+    @property
+    def port(self) -> int:
+        return self._socket.getsockname()[1]
+
+    def __enter__(self) -> Self:
+        if SFTPStandIn._host_key is None:
+            SFTPStandIn._host_key = paramiko.RSAKey.generate(2048)  # slow; shared by every server in the process
+        self._socket = socket.create_server(("127.0.0.1", 0), backlog=64)
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._socket.close()
+        for transport in self._transports:
+            transport.close()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return  # listening socket closed
+            transport = paramiko.Transport(_CountingSocket(connection, self.stats))
+            transport.set_log_channel(LOG_CHANNEL)
+            transport.add_server_key(self._host_key)
+            transport.set_subsystem_handler("sftp", _CountingSFTPServer, _LocalSFTP)
+            transport.start_server(server=_SSHServer(self))
+            self._transports.append(transport)
@@ -0,0 +1,50 @@
+# ruff: noqa: S101
+"""Smoke tests of the benchmark harness at a tiny scale; `python bench_upload.py` runs the benchmarks."""
+import pytest
+from bench_upload import DEPLOY_NAME, TRANSPORTS, publish, run_benchmark
+from sftp_server import SFTPStandIn
+from trees import generate_tree, modify_tree
+
+from shinylive_deploy.process.manifest import MANIFEST_FILENAME
+
+
+def tree_contents(directory) -> dict[str, bytes]:
+    return {
+        x.relative_to(directory).as_posix(): x.read_bytes()
+        for x in directory.rglob("*") if x.is_file() and x.name != MANIFEST_FILENAME
+    }
+
+
+def test_generate_tree_is_deterministic(tmp_path):
+    first = generate_tree(tmp_path / "first", "mixed", scale=0.02)
+    second = generate_tree(tmp_path / "second", "mixed", scale=0.02)
+    assert first == second
+    assert tree_contents(tmp_path / "first") == tree_contents(tmp_path / "second")
+    assert modify_tree(tmp_path / "second", 0.1) >= 1
+    assert tree_contents(tmp_path / "first") != tree_contents(tmp_path / "second")
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_publish_to_stand_in(tmp_path, transport):
+    remote, staging = tmp_path / "remote", tmp_path / "staging"
+    (remote / "shinyapps").mkdir(parents=True)
+    files, _ = generate_tree(staging / DEPLOY_NAME, "mixed", scale=0.02)
+    with SFTPStandIn(remote) as server:
+        timings = publish(server, staging, transport, workers=2)
+        stats = server.stats.snapshot()
+    assert timings.status == "ok"
+    assert tree_contents(remote / "shinyapps" / DEPLOY_NAME) == tree_contents(staging / DEPLOY_NAME)
+    upload = next(x for x in timings.spans if x.name == "upload")
+    assert upload.files == files
+    assert stats["bytes_received"] > upload.bytes
+    assert stats["exec_commands"] >= 1
+
+
+def test_run_benchmark(tmp_path):
+    generate_tree(tmp_path / "tree", "small", scale=0.02)
+    full, delta = run_benchmark(tmp_path / "tree", "small", "sftp", scale=0.02, repeat=1, changed=0.1)
+    assert (full.scenario, delta.scenario) == ("full", "delta")
+    assert full.uploaded_files == full.files
+    assert 0 < delta.uploaded_files < full.files
+    assert delta.sftp_requests < full.sftp_requests
+    assert delta.wire_bytes_up < full.wire_bytes_up
@@ -0,0 +1,82 @@
+"""Synthetic export trees shaped like `shinylive export` output, for upload benchmarks.
+
+Sizes are deterministic for a given profile, scale and seed. Text files (`.js`, `.py`, `.json`, ...) compress
+like source code, binary ones (`.wasm`, `.whl`, `.zip`) are incompressible, as in the real runtime.
+"""
+# ruff: noqa: S311
+import random
+from pathlib import Path
+
+WORDS = (
+    "def", "class", "return", "import", "from", "self", "value", "name", "path", "data", "async", "await", "function",
+    "const", "let", "export", "module", "shiny", "render", "input", "output", "reactive", "ui", "app", "server",
+    "pyodide", "package", "wheel", "load",
+)
+BINARY_SUFFIXES = {".wasm", ".whl", ".zip", ".data"}
+
+# (directory, count, suffix, size) per profile; sizes in bytes before `scale`
+PROFILES: dict[str, list[tuple[str, int, str, int]]] = {
+    # thousands of small files: dominated by per-file round trips
+    "small": [
+        ("shinylive/pyodide/lib", 1500, ".py", 2_000),
+        ("shinylive/js", 600, ".js", 4_000),
+        ("shinylive/css", 100, ".css", 1_500),
+        ("edit", 40, ".html", 1_000),
+    ],
+    # a few large binaries: dominated by bandwidth
+    "huge": [
+        ("shinylive/pyodide", 2, ".wasm", 30_000_000),
+        ("shinylive/pyodide", 2, ".zip", 15_000_000),
+        ("", 1, ".json", 50_000),
+    ],
+    # roughly the shape of a real export
+    "mixed": [
+        ("shinylive/pyodide", 1, ".wasm", 10_000_000),
+        ("shinylive/pyodide", 1, ".zip", 2_500_000),
+        ("shinylive/pyodide", 60, ".whl", 250_000),
+        ("shinylive/js", 150, ".js", 40_000),
+        ("shinylive/pyodide/lib", 400, ".py", 6_000),
+        ("shinylive/css", 20, ".css", 8_000),
+        ("", 1, ".json", 400_000),
+        ("edit", 3, ".html", 2_000),
+    ],
+}
+
+
+def _text(rng: random.Random, size: int) -> bytes:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).encode()[:size]
+
+
+def generate_tree(directory: Path, profile: str, scale: float = 1.0, seed: int = 0) -> tuple[int, int]:
+    """Writes the `profile` tree into `directory`, `scale` multiplying both file counts and sizes; returns (files, bytes)."""
+    rng = random.Random(f"{profile}-{seed}")
+    files = total = 0
+    for subdir, count, suffix, size in PROFILES[profile]:
+        count, size = max(1, round(count * scale)), max(1, round(size * scale))
+        (directory / subdir).mkdir(parents=True, exist_ok=True)
+        for i in range(count):
+            name = "app" if subdir == "" and suffix == ".json" else f"file{i:05d}"
+            content = rng.randbytes(size) if suffix in BINARY_SUFFIXES else _text(rng, size)
+            (directory / subdir / f"{name}{suffix}").write_bytes(content)
+            files += 1
+            total += len(content)
+    index = b'<script src="./shinylive/load-shinylive-sw.js"></script>'
+    (directory / "index.html").write_bytes(index)
+    return files + 1, total + len(index)
+
+
+def modify_tree(directory: Path, fraction: float, seed: int = 0) -> int:
+    """Rewrites `fraction` of the files (at least one) with new content of the same size; returns how many."""
+    rng = random.Random(f"modify-{seed}")
+    filepaths = sorted(x for x in directory.rglob("*") if x.is_file())
+    chosen = rng.sample(filepaths, max(1, round(len(filepaths) * fraction)))
+    for filepath in chosen:
+        size = filepath.stat().st_size
+        filepath.write_bytes(rng.randbytes(size) if filepath.suffix in BINARY_SUFFIXES else _text(rng, size))
+    return len(chosen)
@@ -2,8 +2,10 @@
 import os
 import shutil
 import subprocess
+import tempfile
 from pathlib import Path
 
+import pytest
 from shinylive_deploy.config import create_config
 
 create_config()
@@ -46,4 +48,24 @@ def pytest_sessionfinish(session, exitstatus):
         shutil.rmtree(staging_app_dir.resolve())
     staging_app_dir = Path(__file__).parent.parent / "staging" / "app1-beta"
     if staging_app_dir.exists():
-        shutil.rmtree(staging_app_dir.resolve())
\ No newline at end of file
+        shutil.rmtree(staging_app_dir.resolve())
+
+
+@pytest.fixture
+def short_tmp_path():
+    """Temp directory short enough for Unix socket paths; pytest's `tmp_path` can exceed the AF_UNIX limit."""
+    directory = Path(tempfile.mkdtemp(prefix="sd-", dir="/tmp" if Path("/tmp").is_dir() else None))  # noqa: S108
+    yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def write_tree():
+    """Writes `{relative path: text}` files under a root directory, creating parent directories as needed."""
+    def write(root: Path, files: dict[str, str]):
+        for name, content in files.items():
+            filepath = root / name
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            filepath.write_text(content)
+
+    return write
@@ -0,0 +1,51 @@
+# ruff: noqa: S101
+import tempfile
+import threading
+import time
+
+import pytest
+from shinylive_deploy.process import ipc
+from shinylive_deploy.process.agent import DeployAgent, forward, stop_agent
+
+unix_only = pytest.mark.skipif(not ipc.supported(), reason="Unix sockets only")
+
+
+@unix_only
+def test_forward_without_agent(short_tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(short_tmp_path))
+    assert forward("releases", deploy_mode="local") is False
+    assert stop_agent() is False
+
+
+@unix_only
+def test_agent_runs_forwarded_commands(short_tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(tempfile, "tempdir", str(short_tmp_path))
+    agent = DeployAgent(idle=60)
+    errors = []
+
+    def serve():
+        try:
+            agent.serve()
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not ipc.is_alive(agent.path):
+        if errors:
+            raise errors[0]
+        assert time.monotonic() < deadline, "the agent did not start"
+        time.sleep(0.01)
+
+    assert forward("releases", deploy_mode="local") is True
+    assert "RELEASES" in capsys.readouterr().out
+    with pytest.raises(SystemExit) as e:
+        forward("unknown", deploy_mode="local")
+    assert e.value.code == 1
+    assert "Unknown command" in capsys.readouterr().err
+
+    assert stop_agent() is True
+    thread.join(5)
+    assert not errors
+    assert not agent.path.exists()
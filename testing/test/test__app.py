@@ -15,6 +15,7 @@ def test_initalize_config_local():
     assert config.dir_staging == "staging"
     assert config.prod_branch == "main"
     assert config.beta_branch == "main"
+    assert config.history == 1
     with pytest.raises(AttributeError):
         assert config.host
     with pytest.raises(AttributeError):
@@ -43,6 +44,9 @@ def test_initalize_config_prod(monkeypatch):
     assert isinstance(config.password, SecretStr)
     assert config.password.get_secret_value() == "password"
     assert config.port == 2222
+    assert config.upload_workers == 4
+    assert config.transport == "sftp"
+    assert config.tar_compression == "gzip"
         
 def test_initalize_config_test(monkeypatch):
     """temporarily patches the object in the test context"""
@@ -82,4 +86,10 @@ def test_initalize_config_beta(monkeypatch):
     assert config.user == "shinylive"
     assert isinstance(config.password, SecretStr)
     assert config.password.get_secret_value() == "password"
-    assert config.port == 2222
\ No newline at end of file
+    assert config.port == 2222
+
+def test_initalize_config_transport_override(monkeypatch):
+    monkeypatch.setattr('shinylive_deploy.process.getpass', lambda _: "password")
+
+    config = initialize("test", transport="tar")
+    assert config.transport == "tar"
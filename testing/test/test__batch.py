@@ -0,0 +1,56 @@
+# ruff: noqa: S101
+import json
+import shutil
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from shinylive_deploy.process import deploy_apps, initialize, initialize_all
+
+
+def reset_local_dirs():
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    staging_dir = Path(__file__).parent.parent / "staging"
+
+    if deploy_dir.exists():
+        shutil.rmtree(deploy_dir.resolve())
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir.resolve())
+
+    deploy_dir.mkdir()
+    staging_dir.mkdir()
+
+    with open(deploy_dir / ".gitignore", "w") as f:
+        f.write("*\n!.gitignore")
+    with open(staging_dir / ".gitignore", "w") as f:
+        f.write("*\n!.gitignore")
+
+
+@pytest.fixture()
+def dirs_session():
+    reset_local_dirs()
+    yield
+    reset_local_dirs()
+
+
+def test_initialize_all_single_app():
+    deployers = initialize_all("local")
+    assert [x.app_name for x in deployers] == ["app1"]
+    assert deployers[0].dir_development == "src"
+
+
+def test_deploy_apps_local(capfd, dirs_session):
+    shinylive_ = initialize("local")
+    deployers = [shinylive_, replace(shinylive_, app_name="app2")]
+    deploy_apps(deployers)
+    out, _ = capfd.readouterr()
+    assert "BATCH DEPLOYMENT: 2 apps (app1, app2)" in out
+    assert "- `app1` compiled and deployed locally as `app1`" in out
+    assert "- `app2` compiled and deployed locally as `app2`" in out
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    assert Path(deploy_dir / "app1" / "app.json").exists() is True
+    assert Path(deploy_dir / "app2" / "app.json").exists() is True
+    report = json.loads((Path(__file__).parent.parent / "staging" / ".deploy-timings.jsonl").read_text())
+    assert report["command"] == "deploy-all"
+    assert report["apps"] == ["app1", "app2"]
+    assert {"export", "go_live:app1", "go_live:app2"} <= {x["name"] for x in report["spans"]}
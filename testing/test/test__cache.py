@@ -0,0 +1,38 @@
+# ruff: noqa: S101
+from shinylive_deploy.process.cache import ExportCache, source_key
+
+
+def test_source_key_tracks_content(tmp_path, write_tree):
+    write_tree(tmp_path, {"app.py": "print(1)", "module/__init__.py": ""})
+    first = source_key(tmp_path, "0.1.0", "app1")
+    assert source_key(tmp_path, "0.1.0", "app1") == first
+    assert source_key(tmp_path, "0.2.0", "app1") != first
+    (tmp_path / "app.py").write_text("print(2)")
+    assert source_key(tmp_path, "0.1.0", "app1") != first
+
+
+def test_source_key_ignores_unexported_files(tmp_path, write_tree):
+    write_tree(tmp_path, {"app.py": "print(1)"})
+    first = source_key(tmp_path, "0.1.0")
+    write_tree(tmp_path, {"__pycache__/app.cpython-312.pyc": "x", ".hidden": "x", ".venv/lib.py": "x"})
+    assert source_key(tmp_path, "0.1.0") == first
+
+
+def test_export_cache_roundtrip(tmp_path, write_tree):
+    export_dir = tmp_path / "staging" / "app1"
+    write_tree(export_dir, {"app.json": "[]", "shinylive/shinylive.js": "js"})
+    cache = ExportCache(root=tmp_path / "staging", app_name="app1", key="abc")
+    assert cache.restore(tmp_path / "staging" / "app1-test") is False
+
+    cache.save(export_dir)
+    assert cache.restore(tmp_path / "staging" / "app1-test") is True
+    assert (tmp_path / "staging" / "app1-test" / "shinylive" / "shinylive.js").read_text() == "js"
+
+
+def test_export_cache_keeps_latest_only(tmp_path, write_tree):
+    export_dir = tmp_path / "staging" / "app1"
+    write_tree(export_dir, {"app.json": "[]"})
+    ExportCache(root=tmp_path / "staging", app_name="app1", key="old").save(export_dir)
+    new = ExportCache(root=tmp_path / "staging", app_name="app1", key="new")
+    new.save(export_dir)
+    assert [x.name for x in new.path.parent.iterdir()] == ["new"]
@@ -0,0 +1,55 @@
+# ruff: noqa: S101
+from concurrent.futures import ThreadPoolExecutor
+
+from shinylive_deploy.process.checkpoint import UploadCheckpoint
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    filepath = tmp_path / "checkpoints" / "app1.jsonl"
+    checkpoint = UploadCheckpoint(filepath, target="user@host:22/shinyapps", release=".releases/app1/1", base=".releases/app1/0")
+    checkpoint.start()
+    assert UploadCheckpoint.load(filepath).prepared is False
+    checkpoint.mark_prepared(["app.json"])
+    checkpoint.mark_uploaded("app.json", "abc", 10)
+
+    loaded = UploadCheckpoint.load(filepath)
+    assert (loaded.target, loaded.release, loaded.base) == ("user@host:22/shinyapps", ".releases/app1/1", ".releases/app1/0")
+    assert loaded.prepared is True
+    assert loaded.unlinked == {"app.json"}
+    assert loaded.files == {"app.json": ("abc", 10)}
+
+    checkpoint.clear()
+    assert UploadCheckpoint.load(filepath) is None
+
+
+def test_checkpoint_restart_discards_previous_progress(tmp_path):
+    filepath = tmp_path / "app1.jsonl"
+    first = UploadCheckpoint(filepath, release="1")
+    first.start()
+    first.mark_prepared([])
+    first.mark_uploaded("a.js", "abc", 1)
+    UploadCheckpoint(filepath, release="2").start()
+    loaded = UploadCheckpoint.load(filepath)
+    assert loaded.release == "2"
+    assert loaded.files == {}
+
+
+def test_checkpoint_ignores_interrupted_line(tmp_path):
+    filepath = tmp_path / "app1.jsonl"
+    checkpoint = UploadCheckpoint(filepath, release="1")
+    checkpoint.start()
+    checkpoint.mark_prepared([])
+    checkpoint.mark_uploaded("a.js", "abc", 1)
+    with open(filepath, "a") as f:
+        f.write('{"name": "b.js", "dig')
+    assert UploadCheckpoint.load(filepath).files == {"a.js": ("abc", 1)}
+
+
+def test_checkpoint_concurrent_uploads(tmp_path):
+    filepath = tmp_path / "app1.jsonl"
+    checkpoint = UploadCheckpoint(filepath, release="1")
+    checkpoint.start()
+    names = [f"file{i}.js" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda x: checkpoint.mark_uploaded(x, "abc", 1), names))
+    assert set(UploadCheckpoint.load(filepath).files) == set(names)
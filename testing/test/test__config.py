@@ -0,0 +1,32 @@
+# ruff: noqa: S101
+import os
+
+from shinylive_deploy.config import config, load_config, override_config, toml_text
+from shinylive_deploy.process import initialize
+from shinylive_deploy.process.base import ShinyDeploy
+
+
+def write_config(filepath, app_name):
+    filepath.write_text(toml_text.replace('app_name = "app1"', f'app_name = "{app_name}"'))
+    return filepath
+
+
+def test_load_config_cached_until_changed(tmp_path):
+    filepath = write_config(tmp_path / "shinylive_deploy.toml", "cached")
+    first = load_config(filepath)
+    assert load_config(filepath) is first
+    write_config(filepath, "changed-app")
+    stat = filepath.stat()
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_config(filepath).app_name == "changed-app"
+
+
+def test_override_config(tmp_path):
+    filepath = write_config(tmp_path / "other.toml", "other")
+    assert config.app_name == "app1"
+    with override_config(filepath):
+        assert config.app_name == "other"
+        assert ShinyDeploy().app_name == "other"
+        assert initialize("local").app_name == "other"
+    assert config.app_name == "app1"
+    assert ShinyDeploy().app_name == "app1"
@@ -21,4 +21,7 @@ def test_create_config_file():
     assert toml["deploy"]["server"]["user"] == "shinylive"
     assert toml["deploy"]["server"]["port"] == 2222
     assert toml["deploy"]["server"]["directory"] == "shinyapps"
-    assert toml["deploy"]["server"]["base_url"] == "http://localhost:5000"
\ No newline at end of file
+    assert toml["deploy"]["server"]["base_url"] == "http://localhost:5000"
+    assert toml["deploy"]["server"]["upload_workers"] == 4
+    assert toml["deploy"]["server"]["transport"] == "sftp"
+    assert toml["deploy"]["server"]["tar_compression"] == "gzip"
\ No newline at end of file
@@ -0,0 +1,40 @@
+# ruff: noqa: S101
+import os
+
+from shinylive_deploy.process.dirindex import DirIndex
+
+
+def test_dir_index_targets(tmp_path):
+    (tmp_path / ".releases" / "app1" / "1").mkdir(parents=True)
+    os.symlink(".releases/app1/1", tmp_path / "app1")
+    (tmp_path / "app2").mkdir()
+    index = DirIndex.local(tmp_path)
+    assert index.target("app1") == ".releases/app1/1"
+    assert index.target("app2") == "app2"
+    assert index.target("app3") is None
+    assert index.exists("app1") and not index.exists("app3")
+
+
+def test_dir_index_absolute_target(tmp_path):
+    # Windows junctions store absolute targets; they are read back as release paths
+    (tmp_path / ".releases" / "app1" / "1").mkdir(parents=True)
+    os.symlink(tmp_path / ".releases" / "app1" / "1", tmp_path / "app1")
+    assert DirIndex.local(tmp_path).target("app1") == ".releases/app1/1"
+
+
+def test_dir_index_caches_until_invalidated(tmp_path):
+    lookups = []
+
+    def lstat(filepath):
+        lookups.append(filepath)
+        return os.lstat(filepath)
+
+    index = DirIndex(tmp_path, lstat, os.readlink)
+    assert not index.exists("app1")
+    (tmp_path / "app1").mkdir()
+    assert not index.exists("app1")
+    assert len(lookups) == 1
+
+    index.invalidate("app1", None)
+    assert index.exists("app1")
+    assert len(lookups) == 2
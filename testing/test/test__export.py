@@ -0,0 +1,44 @@
+# ruff: noqa: S101
+import re
+
+import pytest
+from shinylive_deploy.process.base import DeployException
+from shinylive_deploy.process.export import ExportError, ExportResult, export_app, load_inprocess_export
+
+
+def test_load_inprocess_export_is_cached():
+    assert load_inprocess_export() is not None
+    assert load_inprocess_export() is load_inprocess_export()
+
+
+def test_export_unknown_backend(tmp_path):
+    with pytest.raises(DeployException, match=re.escape("Unknown export backend `shell`")):
+        export_app(tmp_path, tmp_path / "out", backend="shell")
+
+
+def test_export_inprocess_structured_error(tmp_path):
+    # no app.py in the app directory; shinylive rejects it before touching any assets
+    with pytest.raises(ExportError) as e:
+        export_app(tmp_path, tmp_path / "out", backend="inprocess")
+    assert e.value.backend == "inprocess"
+    assert e.value.appdir == tmp_path
+    assert "must contain a file named app.py" in str(e.value)
+
+
+def test_export_subprocess_error(tmp_path):
+    with pytest.raises(ExportError) as e:
+        export_app(tmp_path, tmp_path / "out", backend="subprocess")
+    assert e.value.backend == "subprocess"
+    assert isinstance(e.value, DeployException)
+
+
+def test_export_subprocess_output_is_relayed(tmp_path, capsys):
+    # captured streams have no file descriptor (like a deploy agent's client), so the CLI's output is passed on
+    with pytest.raises(ExportError):
+        export_app(tmp_path, tmp_path / "out", backend="subprocess")
+    assert "app.py" in capsys.readouterr().err
+
+
+def test_export_result_summary():
+    result = ExportResult(backend="inprocess", timings={"import": 0.25, "export": 1.5})
+    assert result.summary() == "import 0.25s, export 1.50s"
@@ -0,0 +1,43 @@
+# ruff: noqa: S101
+from pathlib import Path
+
+from shinylive_deploy.process.fingerprint import fingerprint_runtime, runtime_fingerprint
+
+
+def write_export(root: Path):
+    files = {
+        "index.html": '<script src="./shinylive/load-shinylive-sw.js"></script><script src="./shinylive-sw.js"></script>',
+        "edit/index.html": '<link rel="stylesheet" href="../shinylive/shinylive.css">',
+        "app.json": '[{"name": "app.py", "content": "# see shinylive/ docs"}]',
+        "shinylive-sw.js": "self.addEventListener('fetch', () => {});",
+        "shinylive/shinylive.js": 'import "./pyodide/pyodide.js";',
+        "shinylive/shinylive.css": "body {}",
+        "shinylive/pyodide/pyodide.js": "pyodide",
+    }
+    for name, content in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(content)
+
+
+def test_fingerprint_runtime(tmp_path):
+    write_export(tmp_path)
+    fingerprinted = fingerprint_runtime(tmp_path)
+    assert fingerprinted == f"shinylive-{runtime_fingerprint(tmp_path / fingerprinted)}"
+    assert (tmp_path / "shinylive").exists() is False
+    assert (tmp_path / fingerprinted / "pyodide" / "pyodide.js").exists() is True
+    assert (tmp_path / "index.html").read_text() == (
+        f'<script src="./{fingerprinted}/load-shinylive-sw.js"></script><script src="./shinylive-sw.js"></script>'
+    )
+    assert (tmp_path / "edit" / "index.html").read_text() == f'<link rel="stylesheet" href="../{fingerprinted}/shinylive.css">'
+    # app sources and the runtime's own relative imports are left alone
+    assert "# see shinylive/ docs" in (tmp_path / "app.json").read_text()
+    assert (tmp_path / fingerprinted / "shinylive.js").read_text() == 'import "./pyodide/pyodide.js";'
+    assert fingerprint_runtime(tmp_path) is None
+
+
+def test_runtime_fingerprint_tracks_content(tmp_path):
+    write_export(tmp_path)
+    first = runtime_fingerprint(tmp_path / "shinylive")
+    assert runtime_fingerprint(tmp_path / "shinylive") == first
+    (tmp_path / "shinylive" / "shinylive.css").write_text("body { margin: 0 }")
+    assert runtime_fingerprint(tmp_path / "shinylive") != first
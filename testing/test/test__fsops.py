@@ -0,0 +1,116 @@
+# ruff: noqa: S101
+import errno
+import os
+import sys
+import types
+
+import pytest
+
+from shinylive_deploy.process import fsops
+from shinylive_deploy.process.fsops import copy_tree, link_dir, link_tree, move_tree, remove_tree, replace_dir, replacing
+
+
+def test_move_tree_same_filesystem(tmp_path):
+    (tmp_path / "src" / "sub").mkdir(parents=True)
+    (tmp_path / "src" / "sub" / "app.json").write_text("[]")
+    assert move_tree(tmp_path / "src", tmp_path / "dst") == "rename"
+    assert (tmp_path / "dst" / "sub" / "app.json").read_text() == "[]"
+    assert (tmp_path / "src").exists() is False
+
+
+def test_move_tree_cross_device(tmp_path, monkeypatch):
+    def rename(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.json").write_text("[]")
+    monkeypatch.setattr(fsops.os, "rename", rename)
+    assert move_tree(tmp_path / "src", tmp_path / "dst") == "copy"
+    assert (tmp_path / "dst" / "app.json").read_text() == "[]"
+    assert (tmp_path / "src").exists() is False
+
+
+def test_copy_tree_is_independent(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.json").write_text("[]")
+    copy_tree(tmp_path / "src", tmp_path / "dst")
+    (tmp_path / "dst" / "app.json").write_text("changed")
+    assert (tmp_path / "src" / "app.json").read_text() == "[]"
+
+
+def test_link_tree_shares_inodes(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.json").write_text("[]")
+    link_tree(tmp_path / "src", tmp_path / "dst")
+    assert (tmp_path / "dst" / "app.json").samefile(tmp_path / "src" / "app.json")
+
+
+def test_remove_tree_keeps_symlink_target(tmp_path):
+    (tmp_path / "release").mkdir()
+    (tmp_path / "release" / "app.json").write_text("[]")
+    os.symlink("release", tmp_path / "app")
+    remove_tree(tmp_path / "app")
+    remove_tree(tmp_path / "missing")
+    assert (tmp_path / "app").is_symlink() is False
+    assert (tmp_path / "release" / "app.json").exists() is True
+    remove_tree(tmp_path / "release")
+    assert (tmp_path / "release").exists() is False
+
+
+def test_link_dir_symlink(tmp_path):
+    (tmp_path / ".releases" / "r1").mkdir(parents=True)
+    assert link_dir(tmp_path / ".releases" / "r1", tmp_path / "app") == "symlink"
+    assert os.readlink(tmp_path / "app") == os.path.join(".releases", "r1")
+
+
+def test_link_dir_fallbacks(tmp_path, monkeypatch):
+    def symlink(*args, **kwargs):
+        raise OSError(errno.EPERM, "Operation not permitted")
+
+    (tmp_path / "r1").mkdir()
+    (tmp_path / "r1" / "app.json").write_text("[]")
+    monkeypatch.setattr(os, "symlink", symlink)
+    assert link_dir(tmp_path / "r1", tmp_path / "app") == "copy"
+    assert (tmp_path / "app" / "app.json").samefile(tmp_path / "r1" / "app.json")
+
+    junctions = []
+    monkeypatch.setattr(sys, "platform", "win32")
+    monkeypatch.setitem(sys.modules, "_winapi", types.SimpleNamespace(CreateJunction=lambda *x: junctions.append(x)))
+    assert link_dir(tmp_path / "r1", tmp_path / "app2") == "junction"
+    assert junctions == [(str(tmp_path / "r1"), str(tmp_path / "app2"))]
+
+
+def test_replace_dir(tmp_path):
+    (tmp_path / "r1").mkdir()
+    (tmp_path / "r2").mkdir()
+    os.symlink("r1", tmp_path / "app")
+    os.symlink("r2", tmp_path / "tmp-link")
+    replace_dir(tmp_path / "tmp-link", tmp_path / "app")
+    assert os.readlink(tmp_path / "app") == "r2"
+    (tmp_path / "copy").mkdir()
+    (tmp_path / "copy" / "app.json").write_text("[]")
+    replace_dir(tmp_path / "copy", tmp_path / "app")  # a directory can't be renamed over a link in one step
+    assert (tmp_path / "app").is_symlink() is False
+    assert (tmp_path / "app" / "app.json").exists() is True
+    assert (tmp_path / "r2").exists() is True
+
+
+def test_replacing_breaks_hardlinks(tmp_path):
+    (tmp_path / "app.json").write_text("old")
+    os.link(tmp_path / "app.json", tmp_path / "cached.json")
+    with replacing(tmp_path / "app.json") as tmp_file:
+        tmp_file.write_text("new")
+    assert (tmp_path / "app.json").read_text() == "new"
+    assert (tmp_path / "cached.json").read_text() == "old"
+    assert sorted(x.name for x in tmp_path.iterdir()) == ["app.json", "cached.json"]
+
+
+def test_replacing_keeps_file_unless_written(tmp_path):
+    (tmp_path / "app.json").write_text("old")
+    with replacing(tmp_path / "app.json"):
+        pass
+    with pytest.raises(ValueError), replacing(tmp_path / "app.json") as tmp_file:
+        tmp_file.write_text("partial")
+        raise ValueError
+    assert (tmp_path / "app.json").read_text() == "old"
+    assert [x.name for x in tmp_path.iterdir()] == ["app.json"]
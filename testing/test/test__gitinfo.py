@@ -0,0 +1,90 @@
+# ruff: noqa: S101
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from shinylive_deploy.process.gitinfo import find_git_dir, read_head
+
+COMMIT = "a" * 40
+OTHER = "b" * 40
+
+
+def make_git_dir(root: Path, head: str) -> Path:
+    git_dir = root / ".git"
+    (git_dir / "refs" / "heads").mkdir(parents=True)
+    (git_dir / "HEAD").write_text(head + "\n")
+    return git_dir
+
+
+def test_branch_from_loose_ref(tmp_path):
+    git_dir = make_git_dir(tmp_path, "ref: refs/heads/main")
+    (git_dir / "refs" / "heads" / "main").write_text(COMMIT + "\n")
+    (tmp_path / "src").mkdir()
+    head = read_head(tmp_path / "src")
+    assert head.git_dir == git_dir
+    assert head.branch == "main"
+    assert head.commit == COMMIT
+    assert not head.detached
+
+
+def test_branch_from_packed_refs(tmp_path):
+    git_dir = make_git_dir(tmp_path, "ref: refs/heads/feature/x")
+    (git_dir / "packed-refs").write_text(f"# pack-refs with: peeled\n{OTHER} refs/heads/main\n{COMMIT} refs/heads/feature/x\n")
+    head = read_head(tmp_path)
+    assert head.branch == "feature/x"
+    assert head.commit == COMMIT
+
+
+def test_unborn_branch(tmp_path):
+    make_git_dir(tmp_path, "ref: refs/heads/main")
+    head = read_head(tmp_path)
+    assert head.branch == "main"
+    assert head.commit is None
+
+
+def test_detached_head(tmp_path):
+    make_git_dir(tmp_path, COMMIT)
+    head = read_head(tmp_path)
+    assert head.detached
+    assert head.commit == COMMIT
+
+
+def test_worktree(tmp_path):
+    main_git_dir = make_git_dir(tmp_path / "main", "ref: refs/heads/main")
+    (main_git_dir / "refs" / "heads" / "feature").write_text(COMMIT + "\n")
+    worktree_git_dir = main_git_dir / "worktrees" / "feature"
+    worktree_git_dir.mkdir(parents=True)
+    (worktree_git_dir / "HEAD").write_text("ref: refs/heads/feature\n")
+    (worktree_git_dir / "commondir").write_text("../..\n")
+    (tmp_path / "feature").mkdir()
+    (tmp_path / "feature" / ".git").write_text(f"gitdir: {worktree_git_dir}\n")
+
+    head = read_head(tmp_path / "feature")
+    assert find_git_dir(tmp_path / "feature") == worktree_git_dir.resolve()
+    assert head.branch == "feature"
+    assert head.commit == COMMIT
+
+
+def test_head_change_is_picked_up(tmp_path):
+    git_dir = make_git_dir(tmp_path, "ref: refs/heads/main")
+    assert read_head(tmp_path).branch == "main"
+    (git_dir / "HEAD").write_text("ref: refs/heads/development\n")
+    assert read_head(tmp_path).branch == "development"
+
+
+def test_read_head_commit(tmp_path):
+    def git(*args) -> str:
+        return subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True, text=True).stdout  # noqa: S603 S607
+
+    try:
+        git("init", "-b", "main")
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("git is not available")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "test")
+    (tmp_path / "app.py").write_text("print('hello')\n")
+    assert read_head(tmp_path).commit is None  # no commits yet
+    git("add", "app.py")
+    git("commit", "-m", "init")
+    assert read_head(tmp_path).commit == git("rev-parse", "HEAD").strip()
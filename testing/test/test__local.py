@@ -1,5 +1,9 @@
 # ruff: noqa: S101
+import errno
+import json
+import os
 import shutil
+from dataclasses import replace
 from pathlib import Path
 
 import pytest
@@ -168,3 +172,172 @@ def test_deploy_local_remove_no_app(capfd, dirs_session):
     out, _ = capfd.readouterr()
     # confirm blocked message still NOT displayed
     assert ">>> WARNING <<<: App removal STOPPED. No app directory exists to remove." != out
+
+
+def test_deploy_local_release_symlinks(dirs_session):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    shinylive_ = initialize("local")
+    shinylive_.deploy()
+    first = os.readlink(deploy_dir / "app1")
+    shinylive_.deploy()
+    assert (deploy_dir / "app1").is_symlink() is True
+    assert os.readlink(deploy_dir / "app1-backup") == first
+    assert len(list((deploy_dir / ".releases" / "app1").iterdir())) == 2
+    shinylive_.rollback()
+    assert os.readlink(deploy_dir / "app1") == first
+    assert (deploy_dir / "app1-backup").exists() is False
+    assert [x.name for x in (deploy_dir / ".releases" / "app1").iterdir()] == [Path(first).name]
+
+
+def test_deploy_local_adopts_legacy_dir(dirs_session):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    (deploy_dir / "app1").mkdir()
+    (deploy_dir / "app1" / "app.json").write_text("legacy")
+    shinylive_ = initialize("local")
+    shinylive_.deploy()
+    assert os.readlink(deploy_dir / "app1-backup").startswith(".releases/app1/legacy-")
+    assert (deploy_dir / "app1-backup" / "app.json").read_text() == "legacy"
+    shinylive_.rollback()
+    assert (deploy_dir / "app1" / "app.json").read_text() == "legacy"
+
+
+def test_deploy_local_history(capfd, dirs_session):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    releases_dir = deploy_dir / ".releases" / "app1"
+    shinylive_ = replace(initialize("local"), history=3)
+    for _ in range(5):
+        shinylive_.deploy()
+    out, _ = capfd.readouterr()
+    assert deployment_stopped_msg not in out
+    assert "unchanged files hardlinked from the live release" in out
+    # live release plus three previous ones, unchanged files shared between all of them
+    releases = sorted(x.name for x in releases_dir.iterdir())
+    assert len(releases) == 4
+    assert os.readlink(deploy_dir / "app1") == f".releases/app1/{releases[-1]}"
+    assert os.readlink(deploy_dir / "app1-backup") == f".releases/app1/{releases[-2]}"
+    assert (releases_dir / releases[0] / "app.json").samefile(releases_dir / releases[-1] / "app.json")
+
+    shinylive_.rollback(to=releases[0])
+    assert os.readlink(deploy_dir / "app1") == f".releases/app1/{releases[0]}"
+    assert os.readlink(deploy_dir / "app1-backup") == f".releases/app1/{releases[-1]}"
+    shinylive_.rollback()
+    assert os.readlink(deploy_dir / "app1") == f".releases/app1/{releases[-1]}"
+    assert os.readlink(deploy_dir / "app1-backup") == f".releases/app1/{releases[-2]}"
+    assert len(list(releases_dir.iterdir())) == 3
+    shinylive_.releases()
+    out, _ = capfd.readouterr()
+    assert f"- {releases[-1]} (live)\n- {releases[-2]} (backup)\n- {releases[1]}\n" in out
+
+
+def test_deploy_local_without_symlinks(capfd, dirs_session, monkeypatch):
+    def symlink(*args, **kwargs):
+        raise OSError(errno.EPERM, "Operation not permitted")
+
+    monkeypatch.setattr(os, "symlink", symlink)
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    shinylive_ = initialize("local")
+    shinylive_.deploy()
+    shinylive_.deploy()
+    out, _ = capfd.readouterr()
+    assert "Symlinks are not supported" in out
+    assert (deploy_dir / "app1").is_symlink() is False
+    assert (deploy_dir / "app1" / "app.json").exists() is True
+    assert (deploy_dir / "app1-backup" / "app.json").exists() is True
+    shinylive_.rollback()
+    assert (deploy_dir / "app1").is_symlink() is False
+    assert (deploy_dir / "app1" / "app.json").exists() is True
+
+
+def fail_second_switch(monkeypatch, shinylive_):
+    switch_link, calls = type(shinylive_)._switch_link, []
+
+    def flaky(self, name, target):
+        calls.append(name)
+        if len(calls) == 2:
+            raise OSError(errno.EIO, "Input/output error")
+        switch_link(self, name, target)
+
+    monkeypatch.setattr(type(shinylive_), "_switch_link", flaky)
+
+
+def test_deploy_local_go_live_failure_restores_links(dirs_session, monkeypatch):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    shinylive_ = replace(initialize("local"), history=3)
+    shinylive_.deploy()
+    shinylive_.deploy()
+    live, backup = os.readlink(deploy_dir / "app1"), os.readlink(deploy_dir / "app1-backup")
+    fail_second_switch(monkeypatch, shinylive_)
+    with pytest.raises(OSError):
+        shinylive_.deploy()
+    assert os.readlink(deploy_dir / "app1") == live
+    assert os.readlink(deploy_dir / "app1-backup") == backup
+
+
+def test_deploy_local_rollback_failure_restores_links(dirs_session, monkeypatch):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    shinylive_ = replace(initialize("local"), history=3)
+    for _ in range(3):
+        shinylive_.deploy()
+    live, backup = os.readlink(deploy_dir / "app1"), os.readlink(deploy_dir / "app1-backup")
+    fail_second_switch(monkeypatch, shinylive_)
+    with pytest.raises(OSError):
+        shinylive_.rollback()
+    assert os.readlink(deploy_dir / "app1") == live
+    assert os.readlink(deploy_dir / "app1-backup") == backup
+    assert (deploy_dir / live / "app.json").exists() is True
+
+
+def test_deploy_local_rollback_to_unknown_release(capfd, dirs_session):
+    shinylive_ = initialize("local")
+    shinylive_.deploy()
+    shinylive_.rollback(to="20000101T000000000000Z")
+    out, _ = capfd.readouterr()
+    assert ">>> WARNING <<<: Rollback STOPPED. No release `20000101T000000000000Z` exists for `app1`." in out
+
+
+def test_deploy_local_precompress(capfd, dirs_session):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    shinylive_ = replace(initialize("local"), precompress=("gzip",))
+    shinylive_.deploy()
+    out, _ = capfd.readouterr()
+    assert "Precompressed (gzip):" in out
+    assert (deploy_dir / "app1" / "shinylive" / "shinylive.js.gz").exists() is True
+
+
+def test_deploy_local_fingerprint_runtime(capfd, dirs_session):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    shinylive_ = replace(initialize("local"), fingerprint_runtime=True)
+    shinylive_.deploy()
+    out, _ = capfd.readouterr()
+    assert "Fingerprinted runtime: `shinylive/` renamed to `shinylive-" in out
+    assert (deploy_dir / "app1" / "shinylive").exists() is False
+    assert len(list((deploy_dir / "app1").glob("shinylive-*/shinylive.js"))) == 1
+
+
+def test_deploy_local_app_json_transforms(capfd, dirs_session):
+    deploy_dir = Path(__file__).parent.parent / "src_test_webserver" / "shinyapps"
+    shinylive_ = replace(initialize("local"), app_json_transforms=("minify",))
+    shinylive_.deploy()
+    out, _ = capfd.readouterr()
+    assert "app.json transforms (minify): 0 files rewritten, 0 removed" in out
+    assert '", "' not in (deploy_dir / "app1" / "app.json").read_text()
+
+
+def test_deploy_local_timings(capfd, dirs_session):
+    shinylive_ = initialize("local")
+    shinylive_.show_timings = True
+    shinylive_.deploy()
+    shinylive_.rollback()
+    out, _ = capfd.readouterr()
+    assert "TIMINGS: `deploy` of app1 (local) ok in" in out
+    assert "TIMINGS: `rollback` of app1 (local) ok in" in out
+
+    report_file = Path(__file__).parent.parent / "staging" / ".deploy-timings.jsonl"
+    deploy, rollback = [json.loads(x) for x in report_file.read_text().splitlines()]
+    assert deploy["command"] == "deploy"
+    assert deploy["apps"] == ["app1"]
+    assert deploy["status"] == "ok"
+    assert [x["name"] for x in deploy["spans"]] == ["export", "check_backup", "move", "manifest", "go_live", "prune"]
+    assert deploy["total_seconds"] >= sum(x["seconds"] for x in deploy["spans"])
+    assert rollback["command"] == "rollback"
+    assert rollback["spans"] == []  # no backup to roll back to
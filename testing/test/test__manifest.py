@@ -0,0 +1,53 @@
+# ruff: noqa: S101
+import os
+
+from shinylive_deploy.process.manifest import MANIFEST_FILENAME, Manifest, hash_file
+
+
+def test_manifest_from_directory(tmp_path, write_tree):
+    write_tree(tmp_path, {"app.json": "[]", "shinylive/shinylive.js": "js", MANIFEST_FILENAME: "{}"})
+    manifest = Manifest.from_directory(tmp_path)
+    assert sorted(manifest.files) == ["app.json", "shinylive/shinylive.js"]
+    assert manifest.files["app.json"] == hash_file(tmp_path / "app.json")
+
+
+def test_manifest_roundtrip(tmp_path, write_tree):
+    write_tree(tmp_path, {"app.json": "[]", "shinylive/shinylive.js": "js"})
+    manifest = Manifest.from_directory(tmp_path)
+    assert Manifest.loads(manifest.dumps()) == manifest
+
+
+def test_manifest_diff():
+    previous = Manifest(files={"app.json": "a", "index.html": "b", "old.js": "c"})
+    current = Manifest(files={"app.json": "z", "index.html": "b", "new.js": "d"})
+    changed, removed = current.diff(previous)
+    assert sorted(changed) == ["app.json", "new.js"]
+    assert removed == ["old.js"]
+
+
+def test_manifest_diff_empty_previous():
+    current = Manifest(files={"app.json": "a", "index.html": "b"})
+    changed, removed = current.diff(Manifest())
+    assert sorted(changed) == ["app.json", "index.html"]
+    assert removed == []
+
+
+def test_hash_file_cached_by_stat(tmp_path):
+    filepath = tmp_path / "app.json"
+    filepath.write_text("[1]")
+    os.utime(filepath, ns=(10**18, 10**18))
+    digest = hash_file(filepath)
+    assert hash_file(filepath) == digest
+
+    filepath.write_text("[2]")  # same size; the new mtime is what invalidates
+    assert hash_file(filepath) != digest
+
+
+def test_hash_file_skips_recently_modified(tmp_path):
+    filepath = tmp_path / "app.json"
+    filepath.write_text("[1]")
+    first = hash_file(filepath)
+    stat = filepath.stat()
+    filepath.write_text("[2]")
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # rewritten within the mtime granularity
+    assert hash_file(filepath) != first
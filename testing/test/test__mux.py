@@ -0,0 +1,69 @@
+# ruff: noqa: S101
+import socket
+import tempfile
+
+import pytest
+from shinylive_deploy.process import ipc
+from shinylive_deploy.process.ipc import read_line
+from shinylive_deploy.process.mux import _MuxChannel, _pump_output
+from shinylive_deploy.process.server import ServerShinyDeploy
+
+unix_only = pytest.mark.skipif(not ipc.supported(), reason="Unix sockets only")
+
+
+class _FinishedChannel:
+    """Output of a remote command that already exited, read like a paramiko Channel."""
+    def __init__(self, stdout: bytes, stderr: bytes, status: int):
+        self.stdout, self.stderr, self.status = [stdout], [stderr], status
+
+    def recv(self, size):
+        return self.stdout.pop() if self.stdout else b""
+
+    def recv_stderr(self, size):
+        return self.stderr.pop() if self.stderr else b""
+
+    def recv_exit_status(self):
+        return self.status
+
+
+@unix_only
+def test_socket_path_is_private(short_tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(short_tmp_path))
+    path = ipc.socket_path("mux:user@host:22")
+    assert path == ipc.socket_path("mux:user@host:22") != ipc.socket_path("mux:user@host:2222")
+    assert path.parent.stat().st_mode & 0o777 == 0o700
+    assert not ipc.is_alive(path)
+
+
+@unix_only
+def test_exec_output_is_framed():
+    daemon_side, client_side = socket.socketpair()
+    daemon_side.sendall(b'{"ok": true}\n')
+    channel = _MuxChannel(client_side)
+    channel.exec_command("ls")
+    assert read_line(daemon_side) == {"exec": "ls", "window_size": None}
+
+    _pump_output(daemon_side, _FinishedChannel(b"out", b"err", 3))
+    daemon_side.close()
+    assert channel.makefile("rb").read() == b"out"
+    assert channel.makefile_stderr("rb").read() == b"err"
+    assert channel.recv_exit_status() == 3
+
+
+def test_connect_kwargs_key_auth():
+    deployer = ServerShinyDeploy(host="host", user="user", auth="key", key_filename="~/.ssh/deploy_key")
+    kwargs = deployer._connect_kwargs()
+    assert kwargs["key_filename"].endswith("/.ssh/deploy_key")
+    assert kwargs["look_for_keys"] is False
+    assert "password" not in kwargs
+    assert deployer._password_required() is False
+
+
+@unix_only
+def test_socket_path_too_deep_for_af_unix(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / ("x" * 100)))
+    path = ipc.socket_path("mux:user@host:22")
+    assert str(path).startswith(ipc.FALLBACK_BASE)
+    listener, _ = ipc.bind(path)
+    listener.close()
+    path.unlink()
@@ -0,0 +1,54 @@
+# ruff: noqa: S101
+import gzip
+import importlib.util
+import re
+
+import pytest
+from shinylive_deploy.process.base import DeployException
+from shinylive_deploy.process.precompress import precompress
+
+
+def write_export(root):
+    (root / "shinylive").mkdir(parents=True)
+    (root / "shinylive" / "shinylive.js").write_text("console.log('runtime');" * 200)
+    (root / "app.json").write_text('[{"name": "app.py", "content": "x"}]' * 100)
+    (root / "shinylive-sw.js").write_text("sw")  # below the size threshold
+    (root / "logo.png").write_bytes(b"\x89PNG" * 1000)  # already compressed format
+
+
+def test_precompress_gzip_siblings(tmp_path):
+    export_dir = tmp_path / "app1"
+    write_export(export_dir)
+    assert precompress(export_dir, tmp_path / "cache", ["gzip"], workers=1) == (2, 0)
+    gz = export_dir / "shinylive" / "shinylive.js.gz"
+    assert gzip.decompress(gz.read_bytes()) == (export_dir / "shinylive" / "shinylive.js").read_bytes()
+    assert (export_dir / "app.json.gz").exists() is True
+    assert (export_dir / "shinylive-sw.js.gz").exists() is False
+    assert (export_dir / "logo.png.gz").exists() is False
+
+
+def test_precompress_reuses_cache(tmp_path):
+    for name in ("first", "second"):
+        write_export(tmp_path / name)
+    precompress(tmp_path / "first", tmp_path / "cache", ["gzip"], workers=1)
+    assert precompress(tmp_path / "second", tmp_path / "cache", ["gzip"], workers=1) == (0, 2)
+    assert (tmp_path / "second" / "app.json.gz").samefile(tmp_path / "first" / "app.json.gz")
+
+
+def test_precompress_prunes_unused_cache_entries(tmp_path):
+    write_export(tmp_path / "app1")
+    precompress(tmp_path / "app1", tmp_path / "cache", ["gzip"], workers=1)
+    (tmp_path / "app1" / "app.json").write_text("[]" * 1000)
+    precompress(tmp_path / "app1", tmp_path / "cache", ["gzip"], workers=1)
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+
+def test_precompress_unknown_encoding(tmp_path):
+    with pytest.raises(DeployException, match=re.escape("Unknown precompress encoding `zip`")):
+        precompress(tmp_path, tmp_path / "cache", ["zip"])
+
+
+@pytest.mark.skipif(importlib.util.find_spec("brotli") is not None, reason="brotli installed")
+def test_precompress_brotli_missing(tmp_path):
+    with pytest.raises(DeployException, match=re.escape("`br` precompression requires the `brotli` package")):
+        precompress(tmp_path, tmp_path / "cache", ["gzip", "br"])
@@ -0,0 +1,15 @@
+# ruff: noqa: S101
+from pathlib import PurePosixPath
+
+from shinylive_deploy.process.releases import RELEASES_DIRNAME, new_release_id, release_path
+
+
+def test_new_release_id_sortable():
+    first, second = new_release_id(), new_release_id()
+    assert first <= second
+    assert first.endswith("Z")
+    assert new_release_id("legacy-").startswith("legacy-")
+
+
+def test_release_path():
+    assert release_path("app1", "20240101T000000000000Z") == PurePosixPath(RELEASES_DIRNAME, "app1", "20240101T000000000000Z")
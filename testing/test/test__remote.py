@@ -0,0 +1,130 @@
+# ruff: noqa: S101 S602 S607
+import socket
+import subprocess
+import threading
+from types import SimpleNamespace
+
+import paramiko
+import pytest
+from paramiko import RejectPolicy, SSHClient
+from shinylive_deploy.process.base import DeployException
+from shinylive_deploy.process.remote import MAX_ARGS, RemoteOps, set_host_key_policy
+
+
+def _run_locally(ops: RemoteOps, cwd) -> subprocess.CompletedProcess:
+    return subprocess.run(["sh", "-s"], input=ops.script(), cwd=cwd, capture_output=True, text=True, check=False)
+
+
+class _ShellServer(paramiko.ServerInterface):
+    """Runs exec requests with the local shell in `cwd`, sending stdout and stderr as they are written."""
+    def __init__(self, cwd):
+        self.cwd = cwd
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_auth_none(self, username):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "none"
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self._exec, args=(channel, command), daemon=True).start()
+        return True
+
+    def _exec(self, channel, command: bytes):
+        process = subprocess.Popen(
+            command.decode(), shell=True, cwd=self.cwd,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+
+        def pump(stream, send):
+            while data := stream.read1(2**16):
+                send(data)
+
+        pumps = [
+            threading.Thread(target=pump, args=(process.stdout, channel.sendall), daemon=True),
+            threading.Thread(target=pump, args=(process.stderr, channel.sendall_stderr), daemon=True),
+        ]
+        for thread in pumps:
+            thread.start()
+        while data := channel.recv(2**16):
+            process.stdin.write(data)
+        process.stdin.close()
+        for thread in pumps:
+            thread.join()
+        channel.send_exit_status(process.wait())
+        channel.close()
+
+
+@pytest.fixture
+def shell_ssh(tmp_path):
+    """Stand-in for a connected SSHClient whose commands run locally, over a real paramiko channel."""
+    client_sock, server_sock = socket.socketpair()
+    server = paramiko.Transport(server_sock)
+    server.add_server_key(paramiko.RSAKey.generate(1024))
+    threading.Thread(target=server.start_server, kwargs={"server": _ShellServer(tmp_path)}, daemon=True).start()
+    client = paramiko.Transport(client_sock)
+    client.start_client()
+    client.auth_none("deploy")
+    yield SimpleNamespace(get_transport=lambda: client)
+    client.close()
+    server.close()
+
+
+def test_remote_ops_script_stops_at_first_failure(tmp_path):
+    ops = RemoteOps(ssh=None).add("touch a", "false", "touch b")
+    result = _run_locally(ops, tmp_path)
+    assert result.returncode == 1
+    assert "shinylive_deploy: failed step 1" in result.stderr
+    assert (tmp_path / "a").exists()
+    assert not (tmp_path / "b").exists()
+
+
+def test_remote_ops_switch_link(tmp_path):
+    (tmp_path / "release1").mkdir()
+    (tmp_path / "release2").mkdir()
+    ops = RemoteOps(ssh=None).switch_link("app", "release1").switch_link("app", "release2")
+    assert _run_locally(ops, tmp_path).returncode == 0
+    assert (tmp_path / "app").readlink().name == "release2"
+    assert sorted(x.name for x in tmp_path.iterdir()) == ["app", "release1", "release2"]
+
+
+def test_remote_ops_files_and_dirs(tmp_path):
+    names = [f"dir {i % 3}/file{i}" for i in range(MAX_ARGS + 10)]
+    ops = RemoteOps(ssh=None).make_dirs("release", names + ["deep/er/x.js", "deep/y.js", "top.js"])
+    assert ops.commands == ["mkdir -p -- release/deep/er 'release/dir 0' 'release/dir 1' 'release/dir 2'"]
+    ops.add("touch " + " ".join(f"'release/{x}'" for x in names))
+    ops.remove_files("release", names[1:])
+    assert len(ops.commands) == 4  # removal split into two commands
+    assert _run_locally(ops, tmp_path).returncode == 0
+    assert [x.name for x in (tmp_path / "release").rglob("file*")] == ["file0"]
+
+
+def test_set_host_key_policy(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))  # no known_hosts to load
+    client = SSHClient()
+    set_host_key_policy(client, "reject")
+    assert isinstance(client._policy, RejectPolicy)
+    with pytest.raises(DeployException, match="Unknown host key policy `trust`"):
+        set_host_key_policy(client, "trust")
+
+
+def test_remote_ops_large_stderr(shell_ssh):
+    # more stderr than the channel window holds (2 MB) must not stall the command before stdout ends
+    ops = RemoteOps(shell_ssh).add("echo started", "head -c 5000000 /dev/zero | tr '\\0' x >&2; exit 3")
+    errors = []
+
+    def run():
+        try:
+            ops.run()
+        except DeployException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive(), "the remote command hung"
+    assert "exit 3" in str(errors[0])
+    assert str(errors[0]).count("x") > 4_000_000
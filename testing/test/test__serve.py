@@ -0,0 +1,121 @@
+# ruff: noqa: S101
+import gzip
+import os
+import threading
+from http.client import HTTPConnection
+
+import pytest
+from shinylive_deploy.process.fingerprint import fingerprint_runtime
+from shinylive_deploy.serve import (
+    CACHE_IMMUTABLE,
+    CACHE_REVALIDATE,
+    FINGERPRINTED_DIR,
+    StaticServer,
+    accepted_encodings,
+    parse_range,
+)
+
+
+@pytest.fixture()
+def server(tmp_path):
+    release = tmp_path / ".releases" / "app1" / "20240101T000000000000Z"
+    (release / "shinylive-0123456789ab").mkdir(parents=True)
+    (release / "index.html").write_text("<html></html>")
+    (release / "deadbeef.js").write_text("js")
+    (release / "app.json").write_text("0123456789" * 100)
+    (release / "app.json.gz").write_bytes(gzip.compress((release / "app.json").read_bytes()))
+    (release / "shinylive-0123456789ab" / "pyodide.asm.wasm").write_bytes(b"\0asm" * 10)
+    os.symlink(".releases/app1/20240101T000000000000Z", tmp_path / "app1")
+    server = StaticServer(("127.0.0.1", 0), tmp_path, prefix="/apps")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, headers=None, method="GET"):
+    connection = HTTPConnection("127.0.0.1", server.server_address[1])
+    connection.request(method, path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+    assert accepted_encodings("*") >= {"gzip", "br"}
+    assert accepted_encodings("") == {""}
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=95-200", 100) == (95, 99)
+    assert parse_range("bytes=100-", 100) is False
+    assert parse_range("bytes=0-1,5-6", 100) is None
+
+
+def test_serve_index_and_redirect(server):
+    response, _ = request(server, "/apps/app1")
+    assert response.status == 301
+    assert response.getheader("Location") == "/apps/app1/"
+    response, body = request(server, "/apps/app1/")
+    assert response.status == 200
+    assert body == b"<html></html>"
+    assert response.getheader("Cache-Control") == CACHE_REVALIDATE
+
+
+def test_serve_precompressed_variant(server):
+    response, body = request(server, "/apps/app1/app.json", {"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert gzip.decompress(body) == b"0123456789" * 100
+    response, body = request(server, "/apps/app1/app.json")
+    assert response.getheader("Content-Encoding") is None
+    assert body == b"0123456789" * 100
+
+
+def test_serve_etag_not_modified(server):
+    response, _ = request(server, "/apps/app1/app.json")
+    etag = response.getheader("ETag")
+    response, body = request(server, "/apps/app1/app.json", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+    response, _ = request(server, "/apps/app1/app.json", {"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert response.status == 200  # the gzip variant is a different representation
+
+
+def test_serve_range(server):
+    response, body = request(server, "/apps/app1/app.json", {"Range": "bytes=10-14", "Accept-Encoding": "gzip"})
+    assert response.status == 206
+    assert response.getheader("Content-Range") == "bytes 10-14/1000"
+    assert body == b"01234"
+    response, _ = request(server, "/apps/app1/app.json", {"Range": "bytes=5000-"})
+    assert response.status == 416
+
+
+def test_serve_immutable_fingerprinted(server):
+    response, body = request(server, "/apps/app1/shinylive-0123456789ab/pyodide.asm.wasm", method="HEAD")
+    assert response.getheader("Cache-Control") == CACHE_IMMUTABLE
+    assert response.getheader("Content-Type") == "application/wasm"
+    assert response.getheader("Content-Length") == "40"
+    assert body == b""
+
+
+def test_serve_hex_looking_names_revalidate(server):
+    response, _ = request(server, "/apps/app1/deadbeef.js")
+    assert response.getheader("Cache-Control") == CACHE_REVALIDATE
+
+
+def test_fingerprinted_dir_matches_fingerprint_runtime(tmp_path):
+    (tmp_path / "shinylive").mkdir()
+    (tmp_path / "shinylive" / "shinylive.js").write_text("js")
+    assert FINGERPRINTED_DIR.fullmatch(fingerprint_runtime(tmp_path))
+
+
+@pytest.mark.parametrize("path", ["/apps/.releases/app1/", "/apps/app1/../../", "/apps/missing", "/other/app1/"])
+def test_serve_not_found(server, path):
+    response, _ = request(server, path)
+    assert response.status == 404
@@ -0,0 +1,28 @@
+# ruff: noqa: S101 S603
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = ("paramiko", "git", "pydantic", "shinylive")
+IMPORT_BUDGET_US = 250_000  # generous for slow CI machines; typically well under 100 ms
+
+
+def import_times(code: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per module imported by `code`, from `python -X importtime`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if match := re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line):
+            times[match.group(3)] = int(match.group(1))
+    return times
+
+
+def test_cli_import_is_lazy():
+    times = import_times("import shinylive_deploy.app")
+    assert not [x for x in times if x.split(".")[0] in HEAVY_MODULES]
+    assert times["shinylive_deploy.app"] < IMPORT_BUDGET_US
+
+
+def test_local_initialize_skips_server_dependencies():
+    times = import_times("from shinylive_deploy.process import initialize; initialize('local')")
+    assert not [x for x in times if x.split(".")[0] in HEAVY_MODULES]
@@ -0,0 +1,49 @@
+# ruff: noqa: S101
+from pathlib import PurePosixPath
+
+from shinylive_deploy.process.manifest import Manifest
+from shinylive_deploy.process.store import link_local_runtime, prune_local_store, remote_link_script, runtime_files
+
+
+def test_runtime_files():
+    manifest = Manifest(files={"app.json": "a", "shinylive/shinylive.js": "b", "shinylive/pyodide/pyodide.js": "c"})
+    assert runtime_files(manifest) == {"shinylive/shinylive.js": "b", "shinylive/pyodide/pyodide.js": "c"}
+    assert runtime_files(manifest, ["app.json", "shinylive/shinylive.js"]) == {"shinylive/shinylive.js": "b"}
+
+
+def test_runtime_files_fingerprinted():
+    manifest = Manifest(files={"shinylive-0123456789ab/shinylive.js": "b", "shinylive-sw.js": "c"})
+    assert runtime_files(manifest) == {"shinylive-0123456789ab/shinylive.js": "b"}
+
+
+def test_link_local_runtime_shares_files(tmp_path, write_tree):
+    store = tmp_path / "store"
+    files = {"app.json": "app", "shinylive/shinylive.js": "runtime"}
+    write_tree(tmp_path / "app1", files)
+    write_tree(tmp_path / "app2", files)
+
+    assert link_local_runtime(tmp_path / "app1", store, Manifest.from_directory(tmp_path / "app1")) == 0
+    assert link_local_runtime(tmp_path / "app2", store, Manifest.from_directory(tmp_path / "app2")) == 1
+    assert (tmp_path / "app1" / "shinylive" / "shinylive.js").samefile(tmp_path / "app2" / "shinylive" / "shinylive.js")
+    assert not (tmp_path / "app1" / "app.json").samefile(tmp_path / "app2" / "app.json")
+    assert (tmp_path / "app2" / "shinylive" / "shinylive.js").read_text() == "runtime"
+
+
+def test_prune_local_store(tmp_path, write_tree):
+    store = tmp_path / "store"
+    write_tree(tmp_path / "app1", {"shinylive/shinylive.js": "runtime"})
+    link_local_runtime(tmp_path / "app1", store, Manifest.from_directory(tmp_path / "app1"))
+    assert prune_local_store(store) == 0
+    (tmp_path / "app1" / "shinylive" / "shinylive.js").unlink()
+    assert prune_local_store(store) == 1
+    assert list(store.iterdir()) == []
+
+
+def test_remote_link_script():
+    script = remote_link_script(
+        PurePosixPath("shinyapps/app1"), PurePosixPath("shinyapps/.store"),
+        from_store={"shinylive/a.js": "aaa"}, to_store={"shinylive/b.js": "bbb"},
+    )
+    assert "mkdir -p shinyapps/app1/shinylive" in script
+    assert "ln -f shinyapps/.store/aaa shinyapps/app1/shinylive/a.js" in script
+    assert "ln shinyapps/app1/shinylive/b.js shinyapps/.store/bbb" in script
@@ -0,0 +1,50 @@
+# ruff: noqa: S101
+import json
+
+import pytest
+
+from shinylive_deploy.process.timings import Span, Timings
+
+
+def test_span_records_duration_and_counters():
+    timings = Timings(command="deploy", mode="local", apps=["app1"])
+    with timings.span("upload") as span:
+        span.files, span.bytes = 3, 2_000_000
+    assert [x.name for x in timings.spans] == ["upload"]
+    assert span.seconds > 0
+    assert span.throughput == span.bytes / span.seconds
+
+
+def test_throughput_unknown_without_bytes():
+    assert Span("export", seconds=1.0).throughput is None
+    assert Span("upload", seconds=0.0, bytes=10).throughput is None
+
+
+def test_record_marks_failures():
+    timings = Timings(command="deploy")
+    with pytest.raises(RuntimeError), timings.record(), timings.span("export"):
+        raise RuntimeError
+    assert timings.status == "failed"
+    assert [x.name for x in timings.spans] == ["export"]
+    assert timings.total_seconds >= timings.spans[0].seconds
+
+
+def test_write_appends_json_lines(tmp_path):
+    filepath = tmp_path / "reports" / "timings.jsonl"
+    for command in ("deploy", "rollback"):
+        timings = Timings(command=command, mode="prod", apps=["app1"])
+        with timings.record(), timings.span("upload") as span:
+            span.bytes = 100
+        timings.write(filepath)
+    reports = [json.loads(x) for x in filepath.read_text().splitlines()]
+    assert [x["command"] for x in reports] == ["deploy", "rollback"]
+    assert reports[0]["spans"][0]["name"] == "upload"
+    assert reports[0]["spans"][0]["bytes"] == 100
+    assert reports[0]["spans"][0]["throughput"] > 0
+
+
+def test_summary():
+    timings = Timings(command="deploy", mode="prod", apps=["app1", "app2"], spans=[Span("upload:app1", 2.0, files=4, bytes=8_000_000)])
+    summary = timings.summary()
+    assert "TIMINGS: `deploy` of app1, app2 (prod) ok in" in summary
+    assert "4 files  8.0 MB  4.0 MB/s" in summary
@@ -0,0 +1,69 @@
+# ruff: noqa: S101
+import io
+import json
+import re
+from pathlib import Path
+
+import pytest
+from shinylive_deploy.process.base import DeployException
+from shinylive_deploy.process.transforms import AppJsonPipeline, iter_json_array, strip, windows_paths
+
+SAMPLE = Path(__file__).resolve().parent / "sample_files" / "windows_path_app.json"
+
+
+def test_iter_json_array_small_chunks():
+    text = SAMPLE.read_text()
+    for chunk_size in (1, 7, 2**16):
+        elements = list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+        assert [json.loads(x) for x in elements] == json.loads(text)
+
+
+def test_iter_json_array_escapes_and_nesting():
+    data = [{"name": "a\\\"b", "content": "\\\\\"}]{[", "nested": [1, {"x": "]"}]}, "plain", ["x"]]
+    text = json.dumps(data)
+    for chunk_size in (1, 3, 64):
+        assert [json.loads(x) for x in iter_json_array(io.StringIO(text), chunk_size=chunk_size)] == data
+
+
+def test_iter_json_array_truncated():
+    with pytest.raises(ValueError, match="Unexpected end"):
+        list(iter_json_array(io.StringIO('[{"name": "app.py", "content": "x'), chunk_size=4))
+
+
+def test_pipeline_windows_paths(tmp_path):
+    app_json = tmp_path / "app.json"
+    app_json.write_text(SAMPLE.read_text())
+    result = AppJsonPipeline(transforms=[windows_paths]).run(app_json)
+    assert result.changed == 2
+    assert [x["name"] for x in json.loads(app_json.read_text())] == ["app.py", "module/__init__.py", "module2/subdir/__init__.py"]
+    # untouched entries are copied byte for byte
+    assert app_json.read_text().startswith(SAMPLE.read_text()[:SAMPLE.read_text().index('}, {') + 1])
+
+
+def test_pipeline_no_changes_keeps_file(tmp_path):
+    app_json = tmp_path / "app.json"
+    app_json.write_text('[{"name": "app.py", "content": "x", "type": "text"}]')
+    inode = app_json.stat().st_ino
+    result = AppJsonPipeline(transforms=[windows_paths]).run(app_json)
+    assert (result.changed, result.removed) == (0, 0)
+    assert app_json.stat().st_ino == inode
+    assert list(tmp_path.iterdir()) == [app_json]
+
+
+def test_pipeline_strip_and_minify(tmp_path):
+    app_json = tmp_path / "app.json"
+    app_json.write_text(json.dumps([
+        {"name": "app.py", "content": "x", "type": "text"},
+        {"name": "tests/test_app.py", "content": "y", "type": "text"},
+        {"name": "README.md", "content": "z", "type": "text"},
+    ]))
+    result = AppJsonPipeline.from_names(["strip", "minify"], strip_patterns=["tests/*", "*.md"]).run(app_json)
+    assert result.removed == 2
+    assert result.size_after < result.size_before
+    assert app_json.read_text() == '[{"name":"app.py","content":"x","type":"text"}]'
+    assert strip(["*.md"])({"name": "app.py"}) == {"name": "app.py"}
+
+
+def test_pipeline_unknown_transform():
+    with pytest.raises(DeployException, match=re.escape("Unknown app.json transform `gzip`")):
+        AppJsonPipeline.from_names(["gzip"])
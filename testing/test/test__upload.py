@@ -0,0 +1,74 @@
+# ruff: noqa: S101
+import hashlib
+from pathlib import PurePosixPath
+
+import pytest
+from shinylive_deploy.process.server import ServerShinyDeploy
+from shinylive_deploy.process.upload import StreamingUpload
+
+
+class _RecordingSFTP:
+    """Remote side of an upload, kept in memory."""
+    def __init__(self, files: dict[str, bytes]):
+        self.files = files
+        self.dirs = set()
+        self.removed = []
+
+    def remove(self, path):
+        self.removed.append(path)
+        del self.files[path]
+
+    def mkdir(self, path):
+        self.dirs.add(path)
+
+    def putfo(self, f, path, file_size=0, confirm=True):
+        self.files[path] = b""
+        while data := f.read(4):  # in chunks, like paramiko
+            self.files[path] += data
+
+
+class _Uploader:
+    workers = 2
+
+    def __init__(self, sftp):
+        self.sftp = sftp
+
+    def _sftp(self):
+        return self.sftp
+
+    def close(self):
+        pass
+
+
+def test_streaming_upload_replaces_changed_files(tmp_path):
+    (tmp_path / "shinylive").mkdir()
+    (tmp_path / "shinylive" / "same.js").write_text("same")
+    (tmp_path / "shinylive" / "new.js").write_text("new")
+    (tmp_path / "app.json").write_text("changed")
+    in_place = {"shinylive/same.js": hashlib.sha256(b"same").hexdigest(), "app.json": hashlib.sha256(b"old").hexdigest()}
+    sftp = _RecordingSFTP({"/r/shinylive/same.js": b"same", "/r/app.json": b"old"})
+
+    with StreamingUpload(_Uploader(sftp), tmp_path, PurePosixPath("/r"), in_place) as stream:
+        for name in ("shinylive/same.js", "shinylive/new.js", "app.json"):
+            stream.offer(name)
+
+    assert stream.sent == {
+        "shinylive/new.js": hashlib.sha256(b"new").hexdigest(), "app.json": hashlib.sha256(b"changed").hexdigest()
+    }
+    assert sftp.removed == ["/r/app.json"]  # hardlinked: replaced, never written into
+    assert sftp.files["/r/app.json"] == b"changed"
+    assert sftp.dirs == set()  # `shinylive/` already exists in the release
+
+
+def test_streaming_upload_raises_worker_errors(tmp_path):
+    with pytest.raises(FileNotFoundError), StreamingUpload(_Uploader(_RecordingSFTP({})), tmp_path, PurePosixPath("/r"), {}) as stream:
+        stream.offer("missing.js")
+
+
+def test_pipelined_upload_requirements(capsys):
+    deployer = ServerShinyDeploy(host="host", user="user", pipeline_upload=True)
+    assert deployer._pipelined(testing=False) is True
+    assert deployer._pipelined(testing=True) is False
+    deployer.fingerprint_runtime = True  # renames the runtime after the export
+    assert deployer._pipelined(testing=False) is False
+    assert "exporting first" in capsys.readouterr().out
@@ -0,0 +1,22 @@
+# ruff: noqa: S101
+import threading
+
+from shinylive_deploy.process.watch import settled_files
+
+
+def test_settled_files_yields_each_file_once(tmp_path):
+    (tmp_path / "shinylive").mkdir()
+    (tmp_path / "shinylive" / "shinylive.js").write_text("js")
+    finished = threading.Event()
+    names = settled_files(tmp_path, finished, interval=0.01)
+    assert next(names) == "shinylive/shinylive.js"  # unchanged across two scans
+
+    (tmp_path / "app.json").write_text("[]")
+    finished.set()
+    assert list(names) == ["app.json"]
+
+
+def test_settled_files_of_missing_directory(tmp_path):
+    finished = threading.Event()
+    finished.set()
+    assert list(settled_files(tmp_path / "staging", finished)) == []
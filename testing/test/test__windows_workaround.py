@@ -1,9 +1,11 @@
 # ruff: noqa: S101 S603 S607
+import json
 import shutil
 from pathlib import Path
 
 import pytest
 from shinylive_deploy.process.base import WindowsPaths
+from shinylive_deploy.process.transforms import AppJsonPipeline, windows_paths
 
 
 def reset_local_dirs():
@@ -21,21 +23,28 @@ def dirs_session():
     reset_local_dirs()
 
 
+def find_impacted(app_js_path: Path) -> list[str]:
+    with open(app_js_path) as f:
+        return [x["name"] for x in json.load(f) if "\\" in x["name"]]
+
+
 def test_fix_windows_paths(dirs_session):
-    # original_copy = Path(__file__).resolve().parent / "sample_files" / "app.json"
     app_js_path = Path(__file__).resolve().parent / "sample_files" / "temp-app.json"
-    # shutil.copy(original_copy, app_js_path)
-
-    with open(app_js_path) as f:
-        first_check = f.read()
-    results = WindowsPaths._find_impacted(first_check)
-    assert results
+    assert find_impacted(app_js_path)
 
     # Run tested operation
     WindowsPaths.workaround(app_js_path)
 
     # Check that no path issues are found
-    with open(app_js_path) as f:
-        second_check = f.read()
-    results = WindowsPaths._find_impacted(second_check)
-    assert not results
+    assert not find_impacted(app_js_path)
+
+
+def test_fix_windows_paths_pipeline(dirs_session):
+    app_js_path = Path(__file__).resolve().parent / "sample_files" / "temp-app.json"
+    impacted = find_impacted(app_js_path)
+
+    result = AppJsonPipeline(transforms=[windows_paths]).run(app_js_path)
+
+    assert result.changed == len(impacted)
+    assert not find_impacted(app_js_path)
+    assert AppJsonPipeline(transforms=[windows_paths]).run(app_js_path).changed == 0